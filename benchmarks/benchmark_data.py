@@ -0,0 +1,44 @@
+import math
+from datetime import datetime
+
+import pandas as pd
+
+from crewrostering.preprocessing.flight_data_preprocessor import FlightDataPreprocessor
+from data.generators.flight_schedule_generator import FlightScheduleGenerator
+
+
+def generate_benchmark_flights(number_of_flights, number_of_days=31, seed=42):
+    """
+    Generate a synthetic schedule with (at least) the requested number of flights
+
+    The fleet is replicated until one month of rotations holds enough flights, and the
+    schedule is then cut to the first number_of_flights departures.
+    """
+    aircraft_fleet_df = pd.read_csv('../assets/resources/aircraft_fleet.csv')
+
+    # Roughly 6.5 flights per aircraft per day with the default rotations
+    flights_per_fleet_day = 6.5 * len(aircraft_fleet_df)
+    fleet_multiplier = max(1, math.ceil(number_of_flights / (flights_per_fleet_day * number_of_days)))
+
+    flight_schedule_generator = FlightScheduleGenerator(aircraft_fleet_df, datetime(2025, 10, 1), seed=seed)
+    flight_schedule_generator.generate_flights(number_of_days=number_of_days, fleet_multiplier=fleet_multiplier)
+
+    return flight_schedule_generator.generate_dataframe().head(number_of_flights).reset_index(drop=True)
+
+
+def load_benchmark_data(number_of_flights, number_of_days=31, seed=42):
+    """
+    Load crew, history and regulations from the assets with a synthetic flight schedule
+
+    Returns: FlightDataPreprocessor with all data preprocessed
+    """
+    flight_data_preprocessor = FlightDataPreprocessor()
+    flight_data_preprocessor.load_data()
+
+    # Swap the scheduled flights for the synthetic schedule and preprocess them again
+    flights_df = generate_benchmark_flights(number_of_flights, number_of_days, seed)
+    flight_data_preprocessor.flights_df = flight_data_preprocessor.apply_schema(flights_df, 'flights_df')
+    flight_data_preprocessor.clean_data()
+    flight_data_preprocessor.preprocess_flights_data()
+
+    return flight_data_preprocessor
@@ -0,0 +1,58 @@
+import argparse
+import time
+
+from benchmarks.benchmark_data import load_benchmark_data
+from crewrostering.preprocessing.flight_connection_graph import FlightConnectionGraph
+from crewrostering.preprocessing.pairing_duties_generator import PairingDutiesGenerator
+
+
+def run_benchmark(flight_counts):
+    print(f"{'flights':>8} {'connections':>12} {'graph':>8} {'search':>8} "
+          f"{'duties':>7} {'1-sector':>9} {'return duties':>14} {'return 1-sector':>16}")
+
+    for number_of_flights in flight_counts:
+        flight_data_preprocessor = load_benchmark_data(number_of_flights)
+        flights_df = flight_data_preprocessor.flights_df
+        regulations_dict = flight_data_preprocessor.regulations_dict
+
+        # Time the two stages of the connection graph engine separately
+        pairing_duties_generator = PairingDutiesGenerator(flights_df,
+                                                          regulations_dict['max_flight_duty_period_hours'],
+                                                          regulations_dict['max_sectors_day'],
+                                                          'connection_graph')
+
+        t = time.time()
+        flight_connection_graph = FlightConnectionGraph(flights_df,
+                                                        pairing_duties_generator.min_turnaround_hours,
+                                                        pairing_duties_generator.max_turnaround_hours)
+        flight_connection_graph.build_connections()
+        graph_time = time.time() - t
+
+        t = time.time()
+        flight_connection_graph.find_duties(pairing_duties_generator.home_base_icao,
+                                            pairing_duties_generator.max_flight_duty_period_hours - pairing_duties_generator.duty_buffer_hours,
+                                            pairing_duties_generator.max_sectors_day)
+        search_time = time.time() - t
+
+        pairing_duties_generator.generate_pairings()
+        graph_duties_df = pairing_duties_generator.pairing_duties_df
+
+        # Out-and-back pairing on the same flights for comparison
+        return_flights_generator = PairingDutiesGenerator(flights_df,
+                                                          regulations_dict['max_flight_duty_period_hours'],
+                                                          regulations_dict['max_sectors_day'],
+                                                          'return_flights')
+        return_flights_generator.generate_pairings()
+        return_duties_df = return_flights_generator.pairing_duties_df
+
+        print(f"{len(flights_df):>8} {flight_connection_graph.number_of_connections():>12} {graph_time:>7.2f}s {search_time:>7.2f}s "
+              f"{len(graph_duties_df):>7} {(graph_duties_df['sector_count'] == 1).sum():>9} "
+              f"{len(return_duties_df):>14} {(return_duties_df['sector_count'] == 1).sum():>16}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark multi-sector duty generation on the connection graph")
+    parser.add_argument('--flights', type=int, nargs='+', default=[4000, 8000, 16000, 32000])
+    args = parser.parse_args()
+
+    run_benchmark(args.flights)
@@ -0,0 +1,103 @@
+import argparse
+import time
+
+from ortools.sat.python import cp_model
+
+from benchmarks.model_build_benchmark import build_scheduler
+from crewrostering.preprocessing.feasible_assignments_filter import FeasibleAssignmentsFilter
+from crewrostering.solvers.aircraft_sat_solver import AircraftSatSolver
+
+
+def build_crew_day_constraints(crew_scheduler, constraint_builder):
+    """
+    Build the model, timing and counting the per crew-day constraints (sectors, flight duty period, overlap and
+    worked on date) separately from the other families
+
+    Returns: The AircraftSatSolver, the number of per crew-day constraints and their build time
+    """
+    feasible_assignments_filter = FeasibleAssignmentsFilter(None,
+                                                            crew_scheduler.pairing_duties_df,
+                                                            crew_scheduler.crew_df,
+                                                            crew_scheduler.time_off_df,
+                                                            crew_scheduler.regulations_dict,
+                                                            crew_scheduler.crew_availability_index,
+                                                            crew_scheduler.qualification_encoder)
+    feasible_assignments_filter.filter_qualified_crew_members()
+    feasible_assignments_filter.filter_feasible_assignments()
+
+    solver = AircraftSatSolver(None, crew_scheduler.historical_flights_df)
+    solver.initialize_data(feasible_assignments_filter)
+    solver.create_variables()
+    solver.add_objective_balance_workload()
+
+    constraints_data = crew_scheduler.package_solver_data_for_constraints(solver)
+
+    number_of_constraints = len(solver.model.Proto().constraints)
+
+    t = time.time()
+    if constraint_builder == 'fused':
+        crew_scheduler.apply_crew_day_constraint(solver, constraints_data)
+    else:
+        crew_scheduler.no_duties_overlap_constraint(solver, constraints_data)
+        crew_scheduler.apply_max_sectors_constraint(solver, constraints_data)
+        crew_scheduler.apply_flight_duty_period_hours_constraint(solver, constraints_data)
+        crew_scheduler.apply_worked_on_day_constraint(solver, constraints_data)
+    crew_day_build_time = time.time() - t
+
+    number_of_crew_day_constraints = len(solver.model.Proto().constraints) - number_of_constraints
+
+    crew_scheduler.apply_flight_coverage_constraint(solver, constraints_data)
+    crew_scheduler.apply_max_duty_and_flight_time_hours_constraints(solver, constraints_data)
+    crew_scheduler.apply_max_flight_time_hours_period_constraints(solver, constraints_data)
+    crew_scheduler.apply_min_weekly_rest_days_constraint(solver, constraints_data)
+
+    return solver, number_of_crew_day_constraints, crew_day_build_time
+
+
+def run_benchmark(flight_counts, constraint_builders, time_limit_seconds, workers):
+    rows = []
+
+    for number_of_flights in flight_counts:
+        crew_scheduler = build_scheduler(number_of_flights)
+
+        for constraint_builder in constraint_builders:
+            solver, number_of_crew_day_constraints, crew_day_build_time = build_crew_day_constraints(crew_scheduler, constraint_builder)
+
+            model_proto = solver.model.Proto()
+
+            row = (f"{number_of_flights:>8} {constraint_builder:>9} {number_of_crew_day_constraints:>9} {crew_day_build_time:>8.2f}s "
+                   f"{len(model_proto.variables):>10} {len(model_proto.constraints):>12}")
+
+            if time_limit_seconds > 0:
+                cp_solver = cp_model.CpSolver()
+                cp_solver.parameters.max_time_in_seconds = time_limit_seconds
+                cp_solver.parameters.num_search_workers = workers
+
+                t = time.time()
+                status = cp_solver.Solve(solver.model)
+                solve_time = time.time() - t
+
+                objective = f"{cp_solver.ObjectiveValue():.0f}" if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else "-"
+                row += f" {cp_solver.StatusName(status):>10} {objective:>10} {solve_time:>8.2f}s"
+
+            rows.append(row)
+
+    header = f"{'flights':>8} {'builder':>9} {'crew day':>9} {'build':>9} {'variables':>10} {'constraints':>12}"
+    if time_limit_seconds > 0:
+        header += f" {'status':>10} {'objective':>10} {'solve':>9}"
+
+    print(header)
+
+    for row in rows:
+        print(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the fused and separate per crew-day constraint builders")
+    parser.add_argument('--flights', type=int, nargs='+', default=[100, 400])
+    parser.add_argument('--builders', nargs='+', choices=['fused', 'separate'], default=['separate', 'fused'])
+    parser.add_argument('--time-limit', type=float, default=300, help="Solver time limit per model in seconds, 0 to only build")
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    run_benchmark(args.flights, args.builders, args.time_limit, args.workers)
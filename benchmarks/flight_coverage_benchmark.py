@@ -0,0 +1,120 @@
+import argparse
+import time
+
+from ortools.sat.python.cp_model import LinearExpr
+
+from benchmarks.model_build_benchmark import build_scheduler
+from crewrostering.constraints.flight_coverage_constraint import FlightCoverageConstraint
+from crewrostering.preprocessing.feasible_assignments_filter import FeasibleAssignmentsFilter
+from crewrostering.solvers.aircraft_sat_solver import AircraftSatSolver
+
+
+def build_coverage_by_key_scan(solver):
+    """
+    Reference implementation: scan every variable key for every duty and role, and filter the cabin
+    crew frame once per candidate to check the purser flag (the construction used before the index)
+    """
+    constraints = []
+    model_index = solver.model_index
+
+    x_crew_to_duties = {
+        role: {
+            (role_assignments.crew_ids[crew], model_index.duty_ids[duty]): x_assignment_variable
+            for crew, duty, x_assignment_variable in zip(role_assignments.pair_crew, role_assignments.pair_duty,
+                                                         role_assignments.assignment_variables)
+        }
+        for role, role_assignments in model_index.roles.items()
+    }
+
+    qualified_cabin_crew_df = solver.qualified_cabin_crew_df
+
+    for duty_id in model_index.duties_df['duty_id']:
+        duty_data = model_index.duties_df[model_index.duties_df['duty_id'] == duty_id].iloc[0]
+
+        for role, required_column in [('captains', 'captains_required'),
+                                      ('first_officers', 'first_officers_required'),
+                                      ('cabin_crew', 'cabin_crew_required')]:
+            x_crew_assigned_to_this_duty = [x_assignment_variable
+                                            for (crew_id, pair_duty_id), x_assignment_variable in x_crew_to_duties[role].items()
+                                            if pair_duty_id == duty_id]
+
+            if x_crew_assigned_to_this_duty:
+                constraints.append(LinearExpr.Sum(x_crew_assigned_to_this_duty) == int(duty_data[required_column]))
+
+        x_total_pursers_assigned_this_duty = []
+        for (crew_id, pair_duty_id), x_assignment_variable in x_crew_to_duties['cabin_crew'].items():
+            if pair_duty_id == duty_id:
+                crew_info = qualified_cabin_crew_df[qualified_cabin_crew_df['crew_id'] == crew_id].iloc[0]
+
+                if crew_info['purser'] == 'YES':
+                    x_total_pursers_assigned_this_duty.append(x_assignment_variable)
+
+        if x_total_pursers_assigned_this_duty:
+            constraints.append(LinearExpr.Sum(x_total_pursers_assigned_this_duty) >= 1)
+
+    return constraints
+
+
+def run_benchmark(flight_counts, key_scan_max_duties):
+    rows = []
+
+    for number_of_flights in flight_counts:
+        crew_scheduler = build_scheduler(number_of_flights)
+
+        feasible_assignments_filter = FeasibleAssignmentsFilter(None,
+                                                                crew_scheduler.pairing_duties_df,
+                                                                crew_scheduler.crew_df,
+                                                                crew_scheduler.time_off_df,
+                                                                crew_scheduler.regulations_dict,
+                                                                crew_scheduler.crew_availability_index,
+                                                                crew_scheduler.qualification_encoder)
+        feasible_assignments_filter.filter_qualified_crew_members()
+        feasible_assignments_filter.filter_feasible_assignments()
+
+        solver = AircraftSatSolver(None, crew_scheduler.historical_flights_df)
+        solver.initialize_data(feasible_assignments_filter)
+        solver.create_variables()
+
+        constraints_data = crew_scheduler.package_solver_data_for_constraints(solver)
+
+        # Only build the constraints, adding them to the model isn't part of the comparison
+        t = time.time()
+        flight_coverage_constraint = FlightCoverageConstraint(constraints_data, solver)
+        for role, role_assignments in solver.model_index.roles.items():
+            flight_coverage_constraint.require_crew_for_flights(role_assignments, solver.model_index.crew_required[role])
+        flight_coverage_constraint.require_purser_for_flights(solver.model_index.roles['cabin_crew'])
+        by_duty_time = time.time() - t
+
+        number_of_duties = solver.model_index.number_of_duties
+
+        if number_of_duties <= key_scan_max_duties:
+            t = time.time()
+            build_coverage_by_key_scan(solver)
+            key_scan_time = time.time() - t
+
+            key_scan_label = f"{key_scan_time:.2f}s"
+            speedup_label = f"{key_scan_time / by_duty_time:.0f}x"
+        else:
+            key_scan_label = "skipped"
+            speedup_label = "-"
+
+        number_of_crew = sum(role_assignments.number_of_crew for role_assignments in solver.model_index.roles.values())
+
+        rows.append(f"{number_of_flights:>8} {number_of_duties:>7} {number_of_crew:>5} {solver.model_index.number_of_pairs():>10} "
+                    f"{len(flight_coverage_constraint.constraints_variables_list):>12} {key_scan_label:>9} {by_duty_time:>7.2f}s {speedup_label:>8}")
+
+    print(f"{'flights':>8} {'duties':>7} {'crew':>5} {'variables':>10} {'constraints':>12} {'key scan':>9} {'by duty':>8} {'speedup':>8}")
+
+    for row in rows:
+        print(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark flight coverage and purser constraint construction")
+    parser.add_argument('--flights', type=int, nargs='+', default=[1600, 4900],
+                        help="Scheduled flights, 4900 flights pair into about 3000 duties with the 550 crew in assets/")
+    parser.add_argument('--key-scan-max-duties', type=int, default=1000,
+                        help="Skip the quadratic key-scan builder above this many duties")
+    args = parser.parse_args()
+
+    run_benchmark(args.flights, args.key_scan_max_duties)
@@ -0,0 +1,104 @@
+import argparse
+import contextlib
+import io
+import time
+
+from ortools.sat.python import cp_model
+
+from benchmarks.model_build_benchmark import build_scheduler
+from benchmarks.warm_start_benchmark import build_solver, solve_timed
+from crewrostering.preprocessing.feasible_assignments_filter import FeasibleAssignmentsFilter
+from crewrostering.solvers.aircraft_sat_solver import AircraftSatSolver
+from crewrostering.solvers.greedy_rosterer import GreedyRosterer
+from crewrostering.solvers.solver_config import SolverConfig
+
+
+def greedy_roster(crew_scheduler):
+    """
+    Filter the feasible assignments and roster them greedily, timing the roster only
+
+    Returns: (GreedyRosterer, roster time)
+    """
+    feasible_assignments_filter = FeasibleAssignmentsFilter(None,
+                                                            crew_scheduler.pairing_duties_df,
+                                                            crew_scheduler.crew_df,
+                                                            crew_scheduler.time_off_df,
+                                                            crew_scheduler.regulations_dict,
+                                                            crew_scheduler.crew_availability_index,
+                                                            crew_scheduler.qualification_encoder)
+    feasible_assignments_filter.filter_qualified_crew_members()
+    feasible_assignments_filter.filter_feasible_assignments()
+
+    solver = AircraftSatSolver(None, crew_scheduler.historical_flights_df)
+    solver.initialize_data(feasible_assignments_filter)
+
+    greedy_rosterer = GreedyRosterer(solver, crew_scheduler.regulations_dict)
+
+    t = time.time()
+    greedy_rosterer.roster()
+
+    return greedy_rosterer, time.time() - t
+
+
+def verify_roster(crew_scheduler, pair_is_assigned_by_role, time_limit):
+    """
+    Fix every assignment variable of the full model to the roster, so the solve checks every constraint on it
+
+    Returns: Status name of the fixed model
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        solver = build_solver(crew_scheduler)
+
+    for role, role_assignments in solver.model_index.roles.items():
+        for x_assignment_variable, is_assigned in zip(role_assignments.assignment_variables, pair_is_assigned_by_role[role].tolist()):
+            solver.model.Add(x_assignment_variable == int(is_assigned))
+
+    cp_solver = cp_model.CpSolver()
+    SolverConfig(max_time_in_seconds=time_limit, log_search_progress=False).apply(cp_solver)
+
+    return cp_solver.StatusName(cp_solver.Solve(solver.model))
+
+
+def run_benchmark(flight_counts, time_limit):
+    rows = []
+
+    for number_of_flights in flight_counts:
+        crew_scheduler = build_scheduler(number_of_flights)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            greedy_rosterer, roster_time = greedy_roster(crew_scheduler)
+
+        number_of_assignments = sum(int(pair_is_assigned.sum()) for pair_is_assigned in greedy_rosterer.pair_is_assigned_by_role.values())
+        status = verify_roster(crew_scheduler, greedy_rosterer.pair_is_assigned_by_role, time_limit)
+
+        rows.append(f"{number_of_flights:>8} {'greedy':>16} {status:>10} {roster_time:>9.2f}s {roster_time:>9.2f}s "
+                    f"{number_of_assignments:>12} {greedy_rosterer.number_of_uncovered_duties():>10}")
+
+        for engine, greedy_hints in [('cp-sat', False), ('cp-sat+greedy', True)]:
+            crew_scheduler = build_scheduler(number_of_flights)
+            crew_scheduler.greedy_hints = greedy_hints
+
+            solver, cp_solver, status, first_solution_time, solve_time = solve_timed(crew_scheduler, time_limit)
+
+            # The objective counts the assignments
+            number_of_assignments = '-'
+            if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                number_of_assignments = int(cp_solver.ObjectiveValue())
+
+            rows.append(f"{number_of_flights:>8} {engine:>16} {cp_solver.StatusName(status):>10} "
+                        f"{first_solution_time if first_solution_time is not None else float('nan'):>9.2f}s {solve_time:>9.2f}s "
+                        f"{number_of_assignments:>12} {'-':>10}")
+
+    print(f"{'flights':>8} {'engine':>16} {'status':>10} {'first':>10} {'solve':>10} {'assignments':>12} {'uncovered':>10}")
+
+    for row in rows:
+        print(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the greedy roster against CP-SAT, cold and hinted with the greedy roster")
+    parser.add_argument('--flights', type=int, nargs='+', default=[100, 400])
+    parser.add_argument('--time-limit', type=float, default=600)
+    args = parser.parse_args()
+
+    run_benchmark(args.flights, args.time_limit)
@@ -0,0 +1,73 @@
+import argparse
+import time
+
+from benchmarks.model_build_benchmark import build_scheduler, build_variables
+
+# Constraint families with weighted hour, sector or flight duty period sums, and the crew scheduler method adding each
+CONSTRAINT_FAMILIES = {
+    'flight_hours_year': 'apply_max_flight_time_hours_year_constraint',
+    'flight_hours_12_months': 'apply_max_flight_time_hours_12_months_constraint',
+    'duty_hours_7_days': 'apply_max_duty_time_hours_7_days_constraint',
+    'duty_hours_28_days': 'apply_max_duty_time_hours_28_days_constraint',
+    'flight_hours_28_days': 'apply_max_flight_time_hours_28_days_constraint',
+    'flight_duty_period': 'apply_flight_duty_period_hours_constraint',
+    'crew_day': 'apply_crew_day_constraint'
+}
+
+
+def build_family(crew_scheduler, solver, constraints_data, family, linear_builder):
+    """
+    Add one constraint family to the model with the given linear builder
+
+    Returns: The number of constraints and linear terms added, and the build time
+    """
+    model_proto = solver.model.Proto()
+    first_constraint = len(model_proto.constraints)
+
+    crew_scheduler.linear_builder = linear_builder
+
+    t = time.time()
+    getattr(crew_scheduler, CONSTRAINT_FAMILIES[family])(solver, constraints_data)
+    build_time = time.time() - t
+
+    number_of_terms = sum(len(model_proto.constraints[constraint].linear.vars)
+                          for constraint in range(first_constraint, len(model_proto.constraints)))
+
+    return len(model_proto.constraints) - first_constraint, number_of_terms, build_time
+
+
+def run_benchmark(flight_counts, families, linear_builders):
+    rows = []
+
+    for number_of_flights in flight_counts:
+        crew_scheduler = build_scheduler(number_of_flights)
+        solver, constraints_data = build_variables(crew_scheduler)
+
+        for family in families:
+            baseline_build_time = None
+
+            for linear_builder in linear_builders:
+                number_of_constraints, number_of_terms, build_time = build_family(crew_scheduler, solver, constraints_data,
+                                                                                  family, linear_builder)
+
+                if baseline_build_time is None:
+                    baseline_build_time = build_time
+
+                rows.append(f"{number_of_flights:>8} {family:>22} {linear_builder:>10} {number_of_constraints:>12} {number_of_terms:>10} "
+                            f"{build_time:>8.2f}s {1e6 * build_time / max(number_of_terms, 1):>8.2f} {baseline_build_time / build_time:>8.2f}x")
+
+    print(f"{'flights':>8} {'family':>22} {'builder':>10} {'constraints':>12} {'terms':>10} {'build':>9} {'us/term':>8} {'speedup':>9}")
+
+    for row in rows:
+        print(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark building the weighted sum constraints as expressions or as linear protos")
+    parser.add_argument('--flights', type=int, nargs='+', default=[400, 1500])
+    parser.add_argument('--families', nargs='+', choices=list(CONSTRAINT_FAMILIES), default=list(CONSTRAINT_FAMILIES))
+    parser.add_argument('--builders', nargs='+', choices=['expression', 'proto'], default=['expression', 'proto'],
+                        help="Linear builders to compare, the first one is the baseline for the speedup")
+    args = parser.parse_args()
+
+    run_benchmark(args.flights, args.families, args.builders)
@@ -0,0 +1,102 @@
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.benchmark_data import load_benchmark_data
+from crewrostering.crew_scheduler import CrewScheduler
+from crewrostering.preprocessing.feasible_assignments_filter import FeasibleAssignmentsFilter
+from crewrostering.preprocessing.pairing_duties_generator import PairingDutiesGenerator
+from crewrostering.solvers.aircraft_sat_solver import AircraftSatSolver
+
+
+def build_scheduler(number_of_flights, number_of_days=31):
+    """
+    Crew scheduler holding the preprocessed benchmark data and its pairing duties, without artifact cache
+    """
+    flight_data_preprocessor = load_benchmark_data(number_of_flights, number_of_days)
+
+    crew_scheduler = CrewScheduler(use_artifact_cache=False)
+    crew_scheduler.historical_flights_df = flight_data_preprocessor.historical_flights_df
+    crew_scheduler.crew_df = flight_data_preprocessor.crew_df
+    crew_scheduler.time_off_df = flight_data_preprocessor.time_off_df
+    crew_scheduler.crew_availability_index = flight_data_preprocessor.crew_availability_index
+    crew_scheduler.qualification_encoder = flight_data_preprocessor.qualification_encoder
+    crew_scheduler.regulations_dict = flight_data_preprocessor.regulations_dict
+
+    pairing_duties_generator = PairingDutiesGenerator(flight_data_preprocessor.flights_df,
+                                                      crew_scheduler.regulations_dict['max_flight_duty_period_hours'],
+                                                      crew_scheduler.regulations_dict['max_sectors_day'])
+    pairing_duties_generator.generate_pairings()
+    crew_scheduler.pairing_duties_df = pairing_duties_generator.pairing_duties_df
+
+    return crew_scheduler
+
+
+def build_variables(crew_scheduler):
+    """
+    Filter feasible assignments, create the variables and the objective like process_aircraft
+
+    Returns: The AircraftSatSolver holding the model without constraints, and the data for the constraint classes
+    """
+    feasible_assignments_filter = FeasibleAssignmentsFilter(None,
+                                                            crew_scheduler.pairing_duties_df,
+                                                            crew_scheduler.crew_df,
+                                                            crew_scheduler.time_off_df,
+                                                            crew_scheduler.regulations_dict,
+                                                            crew_scheduler.crew_availability_index,
+                                                            crew_scheduler.qualification_encoder)
+    feasible_assignments_filter.filter_qualified_crew_members()
+    feasible_assignments_filter.filter_feasible_assignments()
+
+    solver = AircraftSatSolver(None, crew_scheduler.historical_flights_df)
+    solver.initialize_data(feasible_assignments_filter)
+    solver.create_variables()
+    solver.add_objective_balance_workload()
+
+    return solver, crew_scheduler.package_solver_data_for_constraints(solver)
+
+
+def build_model(crew_scheduler):
+    """
+    Build the variables and add all constraint families like process_aircraft
+
+    Returns: The AircraftSatSolver holding the built model
+    """
+    solver, constraints_data = build_variables(crew_scheduler)
+
+    crew_scheduler.add_constraints(solver, constraints_data)
+
+    return solver
+
+
+def run_benchmark(flight_counts, number_of_days):
+    results = []
+
+    for number_of_flights in flight_counts:
+        crew_scheduler = build_scheduler(number_of_flights, number_of_days)
+
+        tracemalloc.start()
+        t = time.time()
+        solver = build_model(crew_scheduler)
+        build_time = time.time() - t
+        peak_memory_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        tracemalloc.stop()
+
+        model_proto = solver.model.Proto()
+        results.append((number_of_flights, len(crew_scheduler.pairing_duties_df), len(model_proto.variables),
+                        len(model_proto.constraints), build_time, peak_memory_mb))
+
+    print(f"{'flights':>8} {'duties':>7} {'variables':>10} {'constraints':>12} {'build':>9} {'peak memory':>12}")
+
+    for number_of_flights, number_of_duties, number_of_variables, number_of_constraints, build_time, peak_memory_mb in results:
+        print(f"{number_of_flights:>8} {number_of_duties:>7} {number_of_variables:>10} {number_of_constraints:>12} "
+              f"{build_time:>8.2f}s {peak_memory_mb:>9.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CP-SAT model build time and memory")
+    parser.add_argument('--flights', type=int, nargs='+', default=[100, 400])
+    parser.add_argument('--days', type=int, default=31)
+    args = parser.parse_args()
+
+    run_benchmark(args.flights, args.days)
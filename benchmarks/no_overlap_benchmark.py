@@ -0,0 +1,54 @@
+import argparse
+import time
+
+from ortools.sat.python import cp_model
+
+from benchmarks.model_build_benchmark import build_model, build_scheduler
+
+
+def run_benchmark(flight_counts, overlap_modes, time_limit_seconds, workers):
+    rows = []
+
+    for number_of_flights in flight_counts:
+        crew_scheduler = build_scheduler(number_of_flights)
+
+        # The overlap mode applies to the separate constraint builder, the fused one always uses cliques
+        crew_scheduler.constraint_builder = 'separate'
+
+        for overlap_mode in overlap_modes:
+            crew_scheduler.overlap_mode = overlap_mode
+
+            t = time.time()
+            solver = build_model(crew_scheduler)
+            build_time = time.time() - t
+
+            model_proto = solver.model.Proto()
+
+            cp_solver = cp_model.CpSolver()
+            cp_solver.parameters.max_time_in_seconds = time_limit_seconds
+            cp_solver.parameters.num_search_workers = workers
+
+            t = time.time()
+            status = cp_solver.Solve(solver.model)
+            solve_time = time.time() - t
+
+            objective = f"{cp_solver.ObjectiveValue():.0f}" if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else "-"
+
+            rows.append(f"{number_of_flights:>8} {overlap_mode:>10} {len(model_proto.variables):>10} {len(model_proto.constraints):>12} "
+                        f"{build_time:>8.2f}s {cp_solver.StatusName(status):>10} {objective:>10} {solve_time:>8.2f}s")
+
+    print(f"{'flights':>8} {'mode':>10} {'variables':>10} {'constraints':>12} {'build':>9} {'status':>10} {'objective':>10} {'solve':>9}")
+
+    for row in rows:
+        print(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark conflict clique and interval no-overlap models")
+    parser.add_argument('--flights', type=int, nargs='+', default=[100, 400])
+    parser.add_argument('--modes', nargs='+', choices=['cliques', 'intervals'], default=['cliques', 'intervals'])
+    parser.add_argument('--time-limit', type=float, default=300, help="Solver time limit per model in seconds")
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    run_benchmark(args.flights, args.modes, args.time_limit, args.workers)
@@ -0,0 +1,133 @@
+import argparse
+import time
+import warnings
+
+import pandas as pd
+
+from benchmarks.benchmark_data import load_benchmark_data
+from crewrostering.preprocessing.pairing_duties_generator import PairingDutiesGenerator
+
+
+def generate_duties_row_by_row(pairing_duties_generator):
+    """
+    Reference implementation: look up every flight with a full-frame filter and append
+    one single-row DataFrame per duty (the construction used before the batched builder)
+    """
+    flights_df = pairing_duties_generator.flights_for_aircraft_df
+    duty_buffer_hours = pairing_duties_generator.duty_buffer_hours
+    pairing_duties_df = pd.DataFrame([], columns=pairing_duties_generator.columns)
+
+    for outbound_flight_id, inbound_flight_id in pairing_duties_generator.pairings:
+        outbound_flight = flights_df[flights_df['flight_id'] == outbound_flight_id].iloc[0]
+        inbound_flight = flights_df[flights_df['flight_id'] == inbound_flight_id].iloc[0]
+
+        flight_time_hours = outbound_flight["flight_time_hours"] + inbound_flight["flight_time_hours"]
+        duty_seconds = (inbound_flight["scheduled_arrival_utc"] - outbound_flight["scheduled_departure_utc"]).total_seconds()
+        duty_time_hours = round(duty_buffer_hours + duty_seconds / 3600, 2)
+
+        new_row = pd.DataFrame([{
+            "duty_id": len(pairing_duties_df),
+            "outbound_flight_id": outbound_flight_id,
+            "inbound_flight_id": inbound_flight_id,
+            "outbound_departure_icao": outbound_flight['departure_icao'],
+            "outbound_arrival_icao": outbound_flight['arrival_icao'],
+            "inbound_departure_icao": inbound_flight['departure_icao'],
+            "inbound_arrival_icao": inbound_flight['arrival_icao'],
+            "aircraft_type": outbound_flight['aircraft_type'],
+            "aircraft_registration": outbound_flight['aircraft_registration'],
+            "flight_time_hours": flight_time_hours,
+            "duty_time_hours": duty_time_hours,
+            "scheduled_departure_utc": outbound_flight["scheduled_departure_utc"],
+            "scheduled_outbound_arrival_utc": outbound_flight["scheduled_arrival_utc"],
+            "scheduled_inbound_departure_utc": inbound_flight["scheduled_departure_utc"],
+            "scheduled_arrival_utc": inbound_flight["scheduled_arrival_utc"],
+            'sector_count': 2,
+            'captains_required': inbound_flight["captains_required"],
+            'first_officers_required': inbound_flight["first_officers_required"],
+            'cabin_crew_required': inbound_flight["cabin_crew_required"]
+        }])
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', FutureWarning)
+            pairing_duties_df = pd.concat([pairing_duties_df, new_row], ignore_index=True)
+
+    for flight_id in pairing_duties_generator.unpaired_flight_ids:
+        flight = flights_df[flights_df['flight_id'] == flight_id].iloc[0]
+
+        new_row = pd.DataFrame([{
+            "duty_id": len(pairing_duties_df),
+            "outbound_flight_id": flight_id,
+            "inbound_flight_id": None,
+            "outbound_departure_icao": flight['departure_icao'],
+            "outbound_arrival_icao": flight['arrival_icao'],
+            "inbound_departure_icao": flight['departure_icao'],
+            "inbound_arrival_icao": flight['arrival_icao'],
+            "aircraft_type": flight['aircraft_type'],
+            "aircraft_registration": flight['aircraft_registration'],
+            "flight_time_hours": flight["flight_time_hours"],
+            "duty_time_hours": duty_buffer_hours + flight["flight_time_hours"],
+            "scheduled_departure_utc": flight['scheduled_departure_utc'],
+            "scheduled_arrival_utc": flight['scheduled_arrival_utc'],
+            'sector_count': 1,
+            'captains_required': flight["captains_required"],
+            'first_officers_required': flight["first_officers_required"],
+            'cabin_crew_required': flight["cabin_crew_required"]
+        }])
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', FutureWarning)
+            pairing_duties_df = pd.concat([pairing_duties_df, new_row], ignore_index=True)
+
+    return pairing_duties_df
+
+
+def generate_duties_batched(pairing_duties_generator):
+    flights_by_id_df = pairing_duties_generator.flights_for_aircraft_df.set_index('flight_id')
+
+    paired_duties_df = pairing_duties_generator.generate_duties_for_pairings(flights_by_id_df)
+    unpaired_duties_df = pairing_duties_generator.generate_duties_for_unpaired_flights(flights_by_id_df)
+
+    return pd.concat([paired_duties_df, unpaired_duties_df], ignore_index=True)
+
+
+def run_benchmark(flight_counts, row_by_row_max_flights):
+    print(f"{'flights':>8} {'duties':>8} {'pairing':>9} {'row-by-row':>11} {'batched':>9} {'speedup':>8}")
+
+    for number_of_flights in flight_counts:
+        flight_data_preprocessor = load_benchmark_data(number_of_flights)
+
+        pairing_duties_generator = PairingDutiesGenerator(flight_data_preprocessor.flights_df,
+                                                          flight_data_preprocessor.regulations_dict['max_flight_duty_period_hours'])
+
+        # Time the full pairing stage, then each duty builder on the same pairings
+        t = time.time()
+        pairing_duties_generator.generate_pairings()
+        pairing_time = time.time() - t
+
+        t = time.time()
+        generate_duties_batched(pairing_duties_generator)
+        batched_time = time.time() - t
+
+        if number_of_flights <= row_by_row_max_flights:
+            t = time.time()
+            generate_duties_row_by_row(pairing_duties_generator)
+            row_by_row_time = time.time() - t
+
+            row_by_row_label = f"{row_by_row_time:.2f}s"
+            speedup_label = f"{row_by_row_time / batched_time:.0f}x"
+        else:
+            row_by_row_label = "skipped"
+            speedup_label = "-"
+
+        print(f"{number_of_flights:>8} {len(pairing_duties_generator.pairing_duties_df):>8} {pairing_time:>8.2f}s "
+              f"{row_by_row_label:>11} {batched_time:>8.3f}s {speedup_label:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batched vs row-by-row pairing duty construction")
+    parser.add_argument('--flights', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--row-by-row-max-flights', type=int, default=10000,
+                        help="Skip the quadratic row-by-row builder above this many flights")
+    args = parser.parse_args()
+
+    run_benchmark(args.flights, args.row_by_row_max_flights)
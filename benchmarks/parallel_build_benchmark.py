@@ -0,0 +1,71 @@
+import argparse
+import os
+import time
+
+from benchmarks.model_build_benchmark import build_scheduler
+from crewrostering.preprocessing.feasible_assignments_filter import FeasibleAssignmentsFilter
+from crewrostering.solvers.aircraft_sat_solver import AircraftSatSolver
+
+
+def build_constraints(crew_scheduler, constraint_workers):
+    """
+    Build the variables, then time adding all constraint families with the given number of workers
+
+    Returns: The AircraftSatSolver and the constraint build time
+    """
+    feasible_assignments_filter = FeasibleAssignmentsFilter(None,
+                                                            crew_scheduler.pairing_duties_df,
+                                                            crew_scheduler.crew_df,
+                                                            crew_scheduler.time_off_df,
+                                                            crew_scheduler.regulations_dict,
+                                                            crew_scheduler.crew_availability_index,
+                                                            crew_scheduler.qualification_encoder)
+    feasible_assignments_filter.filter_qualified_crew_members()
+    feasible_assignments_filter.filter_feasible_assignments()
+
+    solver = AircraftSatSolver(None, crew_scheduler.historical_flights_df)
+    solver.initialize_data(feasible_assignments_filter)
+    solver.create_variables()
+    solver.add_objective_balance_workload()
+
+    constraints_data = crew_scheduler.package_solver_data_for_constraints(solver)
+
+    crew_scheduler.constraint_workers = constraint_workers
+
+    t = time.time()
+    crew_scheduler.add_constraints(solver, constraints_data)
+
+    return solver, time.time() - t
+
+
+def run_benchmark(flight_counts, worker_counts):
+    rows = []
+
+    for number_of_flights in flight_counts:
+        crew_scheduler = build_scheduler(number_of_flights)
+        sequential_build_time = None
+
+        for constraint_workers in worker_counts:
+            solver, build_time = build_constraints(crew_scheduler, constraint_workers)
+
+            if sequential_build_time is None:
+                sequential_build_time = build_time
+
+            rows.append(f"{number_of_flights:>8} {constraint_workers:>8} {len(solver.model.Proto().constraints):>12} "
+                        f"{build_time:>8.2f}s {sequential_build_time / build_time:>8.2f}x")
+
+    print(f"Available cores: {os.cpu_count()}")
+    print(f"{'flights':>8} {'workers':>8} {'constraints':>12} {'build':>9} {'speedup':>9}")
+
+    for row in rows:
+        print(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark constraint generation scaling over worker processes")
+    parser.add_argument('--flights', type=int, nargs='+', default=[1500])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help="Worker counts to compare, the first one is the baseline for the speedup")
+    args = parser.parse_args()
+
+    run_benchmark(args.flights, args.workers)
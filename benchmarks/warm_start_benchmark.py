@@ -0,0 +1,142 @@
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+import pandas as pd
+from ortools.sat.python import cp_model
+
+from benchmarks.model_build_benchmark import build_scheduler
+from crewrostering.preprocessing.feasible_assignments_filter import FeasibleAssignmentsFilter
+from crewrostering.preprocessing.prior_roster import PriorRoster
+from crewrostering.solvers.solver_config import SolverConfig
+
+
+class FirstSolutionTimer(cp_model.CpSolverSolutionCallback):
+    def __init__(self):
+        """
+        Records the wall time of the first solution the search finds
+        """
+        super().__init__()
+        self.first_solution_time = None
+
+    def on_solution_callback(self):
+        if self.first_solution_time is None:
+            self.first_solution_time = self.WallTime()
+
+
+def cancel_one_duty(crew_scheduler, seed=0):
+    """
+    Change the schedule by cancelling one duty, the duty ids are numbered again like a fresh pairing run does
+    """
+    pairing_duties_df = crew_scheduler.pairing_duties_df
+    cancelled_position = np.random.default_rng(seed).integers(len(pairing_duties_df))
+
+    pairing_duties_df = pairing_duties_df.drop(pairing_duties_df.index[cancelled_position]).reset_index(drop=True)
+    pairing_duties_df['duty_id'] = np.arange(len(pairing_duties_df))
+
+    crew_scheduler.pairing_duties_df = pairing_duties_df
+
+
+def build_solver(crew_scheduler):
+    """
+    Returns: The AircraftSatSolver with the model of all duties, built like process_aircraft
+    """
+    feasible_assignments_filter = FeasibleAssignmentsFilter(None,
+                                                            crew_scheduler.pairing_duties_df,
+                                                            crew_scheduler.crew_df,
+                                                            crew_scheduler.time_off_df,
+                                                            crew_scheduler.regulations_dict,
+                                                            crew_scheduler.crew_availability_index,
+                                                            crew_scheduler.qualification_encoder)
+    feasible_assignments_filter.filter_qualified_crew_members()
+    feasible_assignments_filter.filter_feasible_assignments()
+
+    return crew_scheduler.build_model(None, feasible_assignments_filter)
+
+
+def solve_timed(crew_scheduler, time_limit):
+    """
+    Build and solve the model, timing the first solution
+
+    Returns: (solver, CpSolver, status, first solution time, solve time)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        solver = build_solver(crew_scheduler)
+
+    cp_solver = cp_model.CpSolver()
+    SolverConfig(max_time_in_seconds=time_limit, log_search_progress=False).apply(cp_solver)
+
+    first_solution_timer = FirstSolutionTimer()
+    t = time.time()
+    status = cp_solver.Solve(solver.model, first_solution_timer)
+
+    return solver, cp_solver, status, first_solution_timer.first_solution_time, time.time() - t
+
+
+def roster_of(solver, cp_solver):
+    """
+    Returns: DataFrame with the crew_id and duty_flight_ids of the solved assignments, like crew_schedule_output.csv
+    """
+    rows = []
+    duty_flight_ids = solver.model_index.duties_df['flight_ids'].astype(str).to_numpy()
+
+    for role_assignments in solver.model_index.roles.values():
+        for crew, duty, x_assignment_variable in zip(role_assignments.pair_crew.tolist(),
+                                                     role_assignments.pair_duty.tolist(),
+                                                     role_assignments.assignment_variables):
+            if cp_solver.Value(x_assignment_variable):
+                rows.append({'crew_id': role_assignments.crew_ids[crew], 'duty_flight_ids': duty_flight_ids[duty]})
+
+    return pd.DataFrame(rows, columns=['crew_id', 'duty_flight_ids'])
+
+
+def run_benchmark(flight_counts, time_limit, deviation_weight):
+    rows = []
+
+    for number_of_flights in flight_counts:
+        # Published roster of the unchanged schedule
+        crew_scheduler = build_scheduler(number_of_flights)
+        solver, cp_solver, status, _, _ = solve_timed(crew_scheduler, time_limit)
+
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            print(f"No roster for the unchanged schedule of {number_of_flights} flights within {time_limit}s")
+            continue
+
+        prior_roster = PriorRoster(roster_of(solver, cp_solver))
+
+        for mode, mode_prior_roster, mode_deviation_weight in [('cold', None, 0),
+                                                               ('hints', prior_roster, 0),
+                                                               ('hints+penalty', prior_roster, deviation_weight)]:
+            crew_scheduler = build_scheduler(number_of_flights)
+            cancel_one_duty(crew_scheduler)
+            crew_scheduler.prior_roster = mode_prior_roster
+            crew_scheduler.deviation_weight = mode_deviation_weight
+
+            solver, cp_solver, status, first_solution_time, solve_time = solve_timed(crew_scheduler, time_limit)
+
+            # Prior assignments the changed roster gave up, including those of the cancelled duty
+            given_up = '-'
+            if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                given_up = len(prior_roster.prior_keys - PriorRoster(roster_of(solver, cp_solver)).prior_keys)
+
+            rows.append(f"{number_of_flights:>8} {mode:>14} {cp_solver.StatusName(status):>10} "
+                        f"{first_solution_time if first_solution_time is not None else float('nan'):>9.2f}s {solve_time:>9.2f}s "
+                        f"{given_up:>10}")
+
+    print(f"{'flights':>8} {'mode':>14} {'status':>10} {'first':>10} {'solve':>10} {'given up':>10}")
+
+    for row in rows:
+        print(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark re-solving a schedule with one cancelled duty cold and warm started "
+                                                 "from the previous roster")
+    parser.add_argument('--flights', type=int, nargs='+', default=[100, 400])
+    parser.add_argument('--time-limit', type=float, default=600)
+    parser.add_argument('--deviation-weight', type=int, default=10)
+    args = parser.parse_args()
+
+    run_benchmark(args.flights, args.time_limit, args.deviation_weight)
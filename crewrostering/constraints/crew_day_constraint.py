@@ -0,0 +1,146 @@
+import numpy as np
+from ortools.sat.python.cp_model import LinearExpr
+
+from crewrostering.constraints.constraint import Constraint
+from crewrostering.constraints.duty_conflict_graph import DutyConflictGraph
+from crewrostering.constraints.linear_constraints import add_weighted_sum_at_most
+
+
+class CrewDayConstraint(Constraint):
+    def __init__(self, constraints_data, solver, max_sectors_day, max_flight_duty_period_hours, linear_builder='proto'):
+        super().__init__(constraints_data, solver)
+
+        # Maximum flights and flight duty period hours allowed per crew member per day
+        self.max_sectors_day = max_sectors_day
+        self.max_flight_duty_period_hours = max_flight_duty_period_hours
+
+        # How the sector and hour sums are built: 'proto' writes the linear constraints from the arrays, 'expression' as a WeightedSum
+        self.linear_builder = linear_builder
+
+        self.number_of_sector_constraints = 0
+        self.number_of_flight_duty_period_constraints = 0
+        self.number_of_at_most_one_constraints = 0
+        self.number_of_worked_on_day_constraints = 0
+
+        # Overlapping duties don't depend on the crew, so the conflict graph is built once for all roles
+        self.duty_conflict_graph = DutyConflictGraph(self.model_index.duty_start_minutes, self.model_index.duty_end_minutes)
+
+    def generate_constraint_variables(self):
+        """
+        EASA: Maximum sectors and flight duty period per day, no overlapping duties, and the worked on date link,
+        added in a single pass over the crew-day cells
+        """
+
+        # Apply constraint for each crew type
+        for role_assignments in self.model_index.roles.values():
+            self.add_crew_day_constraints_for_crew_type(role_assignments)
+
+        print(f"Added {self.number_of_sector_constraints} max sectors, {self.number_of_flight_duty_period_constraints} "
+              f"max flight duty period, {self.number_of_at_most_one_constraints} at-most-one and "
+              f"{self.number_of_worked_on_day_constraints} worked on date constraints")
+
+        return (self.number_of_sector_constraints + self.number_of_flight_duty_period_constraints
+                + self.number_of_at_most_one_constraints + self.number_of_worked_on_day_constraints)
+
+    def add_crew_day_constraints_for_crew_type(self, role_assignments):
+        """
+        Visit the crew-day cells of every crew member once and constrain the duties of that day
+
+        Overlapping duties are excluded with an at-most-one over every maximal clique of the crew member's candidate
+        duties, added on the first day of the clique. When all candidate duties of a cell overlap each other, the crew
+        member works at most one of them, so "worked on date" equals their sum (which also replaces that clique's
+        at-most-one), and the sectors and flight duty period of the day are those of a single duty.
+
+        Args:
+            role_assignments: RoleAssignments with the candidate (crew, duty) pairs of one role
+        """
+
+        max_shift_hours_scaled = int(self.max_flight_duty_period_hours * 100)
+
+        model_proto = self.solver.model.Proto()
+        pair_day = role_assignments.pair_day
+        pair_sectors = self.model_index.sector_count[role_assignments.pair_duty]
+        pair_shift_hours_scaled = self.model_index.duty_time_hours_scaled[role_assignments.pair_duty]
+
+        for crew in range(role_assignments.number_of_crew):
+            crew_pairs = role_assignments.pairs_of_crew(crew)
+            crew_days = role_assignments.crew_days_of_crew(crew)
+            crew_day_days = role_assignments.crew_day_day[crew_days.start:crew_days.stop]
+
+            # Maximal cliques of overlapping candidate duties as pair positions, grouped by the crew-day cell of their first day
+            clique_indptr, clique_members = self.duty_conflict_graph.cliques_among(role_assignments.pair_duty[crew_pairs])
+            clique_pair_positions = crew_pairs.start + clique_members
+            clique_sizes = np.diff(clique_indptr)
+
+            if len(clique_sizes) > 0:
+                clique_first_days = np.minimum.reduceat(pair_day[clique_pair_positions], clique_indptr[:-1])
+                clique_last_days = np.maximum.reduceat(pair_day[clique_pair_positions], clique_indptr[:-1])
+            else:
+                clique_first_days = clique_last_days = clique_sizes
+
+            clique_crew_days = crew_days.start + np.searchsorted(crew_day_days, clique_first_days)
+            clique_order = np.argsort(clique_crew_days, kind='stable').tolist()
+            crew_day_clique_indptr = np.searchsorted(clique_crew_days[clique_order], np.arange(crew_days.start, crew_days.stop + 1)).tolist()
+
+            for crew_day in crew_days:
+                day = role_assignments.crew_day_day[crew_day]
+                pair_positions = role_assignments.pairs_of_crew_day(crew_day)
+
+                # Step 1: No overlapping duties
+                all_duties_overlap = len(pair_positions) == 1
+
+                for clique in clique_order[crew_day_clique_indptr[crew_day - crew_days.start]:crew_day_clique_indptr[crew_day - crew_days.start + 1]]:
+                    # A clique holding every candidate duty of the day is covered by worked on date = sum below
+                    if clique_sizes[clique] == len(pair_positions) and clique_last_days[clique] == day:
+                        all_duties_overlap = True
+                        continue
+
+                    self.number_of_at_most_one_constraints += 1
+                    self.solver.model.AddAtMostOne(
+                        role_assignments.variables_at(clique_pair_positions[clique_indptr[clique]:clique_indptr[clique + 1]])
+                    )
+
+                x_possible_duties_on_date = role_assignments.variables_at(pair_positions)
+
+                # Step 2: Worked on date, cells with a single candidate use the assignment variable itself
+                if len(pair_positions) > 1:
+                    self.number_of_worked_on_day_constraints += 1
+
+                    if all_duties_overlap:
+                        self.solver.model.Add(role_assignments.worked_on_day_variables[crew_day] == LinearExpr.Sum(x_possible_duties_on_date))
+                    else:
+                        self.solver.model.AddMaxEquality(role_assignments.worked_on_day_variables[crew_day], x_possible_duties_on_date)
+
+                # Step 3: Max sectors and flight duty period, only when the possible duties could exceed the maximum
+                sectors_of_possible_duties = pair_sectors[pair_positions]
+                shift_hours_scaled = pair_shift_hours_scaled[pair_positions]
+
+                if all_duties_overlap:
+                    maximum_sectors = sectors_of_possible_duties.max()
+                    maximum_shift_hours_scaled = shift_hours_scaled.max()
+                else:
+                    maximum_sectors = sectors_of_possible_duties.sum()
+                    maximum_shift_hours_scaled = shift_hours_scaled.sum()
+
+                if maximum_sectors > self.max_sectors_day:
+                    self.number_of_sector_constraints += 1
+
+                    if self.linear_builder == 'proto':
+                        add_weighted_sum_at_most(model_proto, role_assignments.assignment_variable_indices[pair_positions],
+                                                 sectors_of_possible_duties, self.max_sectors_day)
+                    else:
+                        self.solver.model.Add(
+                            LinearExpr.WeightedSum(x_possible_duties_on_date, sectors_of_possible_duties.tolist()) <= self.max_sectors_day
+                        )
+
+                if maximum_shift_hours_scaled > max_shift_hours_scaled:
+                    self.number_of_flight_duty_period_constraints += 1
+
+                    if self.linear_builder == 'proto':
+                        add_weighted_sum_at_most(model_proto, role_assignments.assignment_variable_indices[pair_positions],
+                                                 shift_hours_scaled, max_shift_hours_scaled)
+                    else:
+                        self.solver.model.Add(
+                            LinearExpr.WeightedSum(x_possible_duties_on_date, shift_hours_scaled.tolist()) <= max_shift_hours_scaled
+                        )
+
@@ -0,0 +1,127 @@
+import numpy as np
+
+from crewrostering.solvers.model_index import build_indptr, read_only
+
+
+class DutyConflictGraph:
+    def __init__(self, duty_start_minutes, duty_end_minutes):
+        """
+        Duties that overlap in time, as the maximal cliques of the duty x duty conflict graph
+
+        Duties are intervals [start, end), so the conflict graph is an interval graph: a sweep line over the
+        departure and arrival times visits every maximal clique as the set of active duties just before an
+        arrival that follows a departure. Duties that only touch (one arrives when the other departs) don't
+        conflict, like in a NoOverlap constraint. A crew member can work at most one duty of every clique.
+
+        The duties of clique c are clique_duties[clique_indptr[c]:clique_indptr[c + 1]], in increasing order.
+        Cliques with a single duty are left out. Cliques are numbered in sweep order, so every duty belongs to
+        the consecutive cliques duty_first_clique[d]..duty_last_clique[d] (-1 for duties without conflicts).
+
+        Args:
+            duty_start_minutes: Start of every duty ordinal in minutes
+            duty_end_minutes: End of every duty ordinal in minutes
+        """
+        duty_start_minutes = np.asarray(duty_start_minutes, dtype=np.int64)
+        duty_end_minutes = np.asarray(duty_end_minutes, dtype=np.int64)
+
+        # Duties without duration can't overlap anything
+        duties = np.flatnonzero(duty_end_minutes > duty_start_minutes)
+
+        # Sweep events ordered by time, arrivals (0) before departures (1) at the same minute
+        event_minutes = np.concatenate((duty_end_minutes[duties], duty_start_minutes[duties]))
+        event_is_departure = np.concatenate((np.zeros(len(duties), dtype=np.int64), np.ones(len(duties), dtype=np.int64)))
+        event_duties = np.concatenate((duties, duties))
+        order = np.lexsort((event_is_departure, event_minutes))
+
+        active_duties = set()
+        last_event_was_departure = False
+        cliques = []
+
+        for duty, is_departure in zip(event_duties[order].tolist(), event_is_departure[order].tolist()):
+            if is_departure:
+                active_duties.add(duty)
+                last_event_was_departure = True
+                continue
+
+            # The active duties before the first arrival after a departure form a maximal clique
+            if last_event_was_departure and len(active_duties) > 1:
+                cliques.append(sorted(active_duties))
+
+            active_duties.discard(duty)
+            last_event_was_departure = False
+
+        self.number_of_cliques = len(cliques)
+        self.clique_indptr = read_only(np.cumsum([0] + [len(clique) for clique in cliques], dtype=np.int64))
+        self.clique_duties = read_only(np.array([duty for clique in cliques for duty in clique], dtype=np.int64))
+
+        # First and last clique of every duty, the cliques in between hold the duty as well
+        clique_of_entry = np.repeat(np.arange(self.number_of_cliques), np.diff(self.clique_indptr))
+
+        duty_first_clique = np.full(len(duty_start_minutes), self.number_of_cliques, dtype=np.int64)
+        duty_last_clique = np.full(len(duty_start_minutes), -1, dtype=np.int64)
+        np.minimum.at(duty_first_clique, self.clique_duties, clique_of_entry)
+        np.maximum.at(duty_last_clique, self.clique_duties, clique_of_entry)
+        duty_first_clique[duty_last_clique < 0] = -1
+
+        self.duty_first_clique = read_only(duty_first_clique)
+        self.duty_last_clique = read_only(duty_last_clique)
+
+        # Number of conflicting duty pairs, each pair counted once even when it shares several cliques
+        self.number_of_conflicts = len({
+            (first_duty, second_duty)
+            for clique in cliques
+            for position, first_duty in enumerate(clique)
+            for second_duty in clique[position + 1:]
+        })
+
+    def cliques_among(self, duties):
+        """
+        Maximal cliques of the conflict graph restricted to a subset of the duties (e.g. one crew member's candidates)
+
+        The restriction of clique c is a subset of its neighbour's unless a duty of the subset enters at c, and the
+        cliques up to the next entering duty only lose duties. So the maximal restrictions are those at an entering
+        clique that lose a duty before the next one enters.
+
+        Args:
+            duties: Array of duty ordinals
+
+        Returns: (indptr, members) with the indices into duties of clique k in members[indptr[k]:indptr[k + 1]],
+                 for every maximal clique with at least two duties
+        """
+        duties = np.asarray(duties, dtype=np.int64)
+        first_cliques = self.duty_first_clique[duties]
+        last_cliques = self.duty_last_clique[duties]
+
+        entering_cliques = np.unique(first_cliques[first_cliques >= 0])
+        next_entering_cliques = np.append(entering_cliques[1:], self.number_of_cliques)
+
+        # Duty i belongs to the entering cliques with rows lowest_rows[i]:highest_rows[i] (consecutive cliques)
+        has_cliques = first_cliques >= 0
+        lowest_rows = np.where(has_cliques, np.searchsorted(entering_cliques, first_cliques), 0)
+        highest_rows = np.where(has_cliques, np.searchsorted(entering_cliques, last_cliques, side='right'), 0)
+        number_of_rows = highest_rows - lowest_rows
+
+        # One (row, member) entry per membership, ordered by row and then by member
+        members = np.repeat(np.arange(len(duties)), number_of_rows)
+        clique_rows = np.arange(number_of_rows.sum()) - np.repeat(np.cumsum(number_of_rows) - number_of_rows - lowest_rows, number_of_rows)
+        order = np.lexsort((members, clique_rows))
+        clique_rows = clique_rows[order]
+        members = members[order]
+
+        first_leaving_cliques = np.full(len(entering_cliques), self.number_of_cliques, dtype=np.int64)
+        np.minimum.at(first_leaving_cliques, clique_rows, last_cliques[members])
+
+        is_maximal = (np.bincount(clique_rows, minlength=len(entering_cliques)) > 1) & (first_leaving_cliques < next_entering_cliques)
+        is_maximal_entry = is_maximal[clique_rows]
+
+        # Renumber the maximal cliques consecutively
+        clique_rows = (np.cumsum(is_maximal) - 1)[clique_rows[is_maximal_entry]]
+        members = members[is_maximal_entry]
+
+        return build_indptr(clique_rows, int(is_maximal.sum())), members
+
+    def duties_of_clique(self, clique):
+        """
+        Returns: Array of the duty ordinals of a clique
+        """
+        return self.clique_duties[self.clique_indptr[clique]:self.clique_indptr[clique + 1]]
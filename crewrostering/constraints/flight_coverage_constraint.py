@@ -13,16 +13,14 @@ class FlightCoverageConstraint(Constraint):
         - Required Captains
         - Required First Officers
         - Required Cabin Crew
-        """
 
-        for duty_id in self.duties_for_aircraft_df['duty_id']:
-            duty_data = self.duties_for_aircraft_df[self.duties_for_aircraft_df['duty_id'] == duty_id].iloc[0]
+        Candidates come from the duty -> crew index, so the cost is linear in the number of variables.
+        """
 
-            self.require_crew_for_flight(duty_id, self.x_captains_to_duties, duty_data['captains_required'])
-            self.require_crew_for_flight(duty_id, self.x_first_officers_to_duties, duty_data['first_officers_required'])
-            self.require_crew_for_flight(duty_id, self.x_cabin_crew_to_duties, duty_data['cabin_crew_required'])
+        for role, role_assignments in self.model_index.roles.items():
+            self.require_crew_for_flights(role_assignments, self.model_index.crew_required[role])
 
-            self.require_purser_for_flight(duty_id, self.x_cabin_crew_to_duties)
+        self.require_purser_for_flights(self.model_index.roles['cabin_crew'])
 
         print(f"Added {len(self.constraints_variables_list)} constraints")
 
@@ -31,44 +29,32 @@ class FlightCoverageConstraint(Constraint):
 
         return len(self.constraints_variables_list)
 
-    def require_crew_for_flight(self, duty_id, x_crew_to_duties_assignments, required_count):
+    def require_crew_for_flights(self, role_assignments, required_counts):
         """
-        Add constraint that a flight must have exactly the required number of crew
+        Add constraints that every flight must have exactly the required number of crew
 
         Args:
-            duty_id: The flight that needs crew
-            x_crew_to_duties_assignments: Dictionary of (crew_id, duty_id) -> BoolVar assignments
-            required_count: Number of crew members required
+            role_assignments: RoleAssignments with the candidate (crew, duty) pairs of one role
+            required_counts: Number of crew members required per duty ordinal
         """
-        x_crew_assigned_to_this_duty = []
+        required_counts = required_counts.tolist()
 
-        for crew_id, pair_duty_id in x_crew_to_duties_assignments.keys():
-            if pair_duty_id == duty_id:
-                x_assignment_variable = x_crew_to_duties_assignments[crew_id, pair_duty_id]
-                x_crew_assigned_to_this_duty.append(x_assignment_variable)
+        for duty in range(self.model_index.number_of_duties):
+            x_crew_assigned_to_this_duty = role_assignments.variables_at(role_assignments.pairs_of_duty(duty))
 
-        if x_crew_assigned_to_this_duty:
-            self.constraints_variables_list.append(LinearExpr.Sum(x_crew_assigned_to_this_duty) == required_count)
+            if x_crew_assigned_to_this_duty:
+                self.constraints_variables_list.append(LinearExpr.Sum(x_crew_assigned_to_this_duty) == required_counts[duty])
 
-    def require_purser_for_flight(self, duty_id, x_crew_to_duties_assignments):
+    def require_purser_for_flights(self, role_assignments):
         """
-        Add constraint that a flight must have at least one purser assigned.
+        Add constraints that every flight must have at least one purser assigned.
 
         Args:
-            duty_id: The flight that needs crew
-            x_crew_to_duties_assignments: Dictionary of (crew_id, duty_id) -> BoolVar assignments
+            role_assignments: RoleAssignments of the cabin crew
         """
-        x_total_pursers_assigned_this_duty = []
-
-        for crew_id, pair_duty_id in x_crew_to_duties_assignments.keys():
-            if pair_duty_id == duty_id:
-                x_assignment_variable = x_crew_to_duties_assignments[crew_id, pair_duty_id]
-
-                # Look up crew info once
-                crew_info = self.qualified_cabin_crew_df[self.qualified_cabin_crew_df['crew_id'] == crew_id].iloc[0]
-
-                if crew_info['purser'] == 'YES':
-                    x_total_pursers_assigned_this_duty.append(x_assignment_variable)
+        for duty in range(self.model_index.number_of_duties):
+            pair_positions = role_assignments.pairs_of_duty(duty)
+            x_total_pursers_assigned_this_duty = role_assignments.variables_at(pair_positions[role_assignments.pair_is_purser[pair_positions]])
 
-        if x_total_pursers_assigned_this_duty:
-            self.constraints_variables_list.append(LinearExpr.Sum(x_total_pursers_assigned_this_duty) >= 1)
+            if x_total_pursers_assigned_this_duty:
+                self.constraints_variables_list.append(LinearExpr.Sum(x_total_pursers_assigned_this_duty) >= 1)
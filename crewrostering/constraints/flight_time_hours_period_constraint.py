@@ -1,72 +1,96 @@
+import numpy as np
+
 from crewrostering.constraints.constraint import Constraint
+from crewrostering.constraints.linear_constraints import add_weighted_sum_at_most
+from crewrostering.constraints.window_reduction import max_crew_day_hours_scaled, maximum_crew_day_loads
 
 
 class FlightTimeHoursPeriodConstraint(Constraint):
-    def __init__(self, constraints_data, solver, max_hours_per_period, period_type):
+    def __init__(self, constraints_data, solver, max_hours_per_period, period_type, linear_builder='proto',
+                 reduce_constraints=True, max_flight_duty_period_hours=None):
         super().__init__(constraints_data, solver)
 
         self.max_hours_per_period = max_hours_per_period
         self.period_type = period_type # year or months
 
+        # How the hour sums are built: 'proto' writes the linear constraints from the hour arrays, 'expression' adds term by term
+        self.linear_builder = linear_builder
+        self.number_of_constraints = 0
+
+        # Drop the constraints of crew members who can't exceed their remaining hours even when flying every candidate
+        # duty, with the daily flight duty period limit (if given) capping the hours of every day
+        self.reduce_constraints = reduce_constraints
+        self.max_crew_day_hours_scaled = max_crew_day_hours_scaled(self.model_index, 'flight', max_flight_duty_period_hours)
+        self.number_of_dropped_constraints = 0
+
     def generate_constraint_variables(self):
         """
         EASA: Max 900 flight hours per calendar year
         """
 
         # Apply constraint for each crew type
-        self.add_period_hours_constraint_for_crew_type(self.qualified_captains_df, self.x_captains_to_duties)
-        self.add_period_hours_constraint_for_crew_type(self.qualified_first_officers_df, self.x_first_officers_to_duties)
-        self.add_period_hours_constraint_for_crew_type(self.qualified_cabin_crew_df, self.x_cabin_crew_to_duties)
+        for role_assignments in self.model_index.roles.values():
+            self.add_period_hours_constraint_for_crew_type(role_assignments)
 
-        print(f"Added {len(self.constraints_variables_list)} constraints")
+        print(f"Added {self.number_of_constraints} constraints, dropped {self.number_of_dropped_constraints} that can never bind")
 
         for constraint in self.constraints_variables_list:
             self.solver.model.Add(constraint)
 
-        return len(self.constraints_variables_list)
+        return self.number_of_constraints
 
-    def add_period_hours_constraint_for_crew_type(self, qualified_crew_df, x_crew_to_duties_assignments):
+    def add_period_hours_constraint_for_crew_type(self, role_assignments):
         """
         Limit how many hours each crew member can fly in a calendar year
 
         Example: If max is 900 hours/year and they've flown 850, they can only do 50 more
 
         Args:
-            qualified_crew_df: List of crew members (captains, first officers, or cabin crew)
-            x_crew_to_duties_assignments: Possible assignments - crew_assignments[crew_id, duty_id] is a 0/1 variable
+            role_assignments: RoleAssignments with the candidate (crew, duty) pairs of one role
         """
 
-        # Pre-group assignments by crew_id
-        x_assignments_by_crew = {}
-        for (crew_id, duty_id), var in x_crew_to_duties_assignments.items():
-            if crew_id not in x_assignments_by_crew:
-                x_assignments_by_crew[crew_id] = []
-            x_assignments_by_crew[crew_id].append((duty_id, var))
+        model_proto = self.solver.model.Proto()
 
-        # Check each crew member's yearly hour limits
-        for index, crew_member in qualified_crew_df.iterrows():
-            crew_id = crew_member['crew_id']
+        if self.period_type == 'year':
+            hours_already_flown = role_assignments.crew_df['current_calendar_year_flight_time_hours'].to_numpy(dtype=float)
+        else:
+            hours_already_flown = role_assignments.crew_df['last_11_calendar_months_flight_time_hours'].to_numpy(dtype=float)
 
-            if self.period_type == 'year':
-                hours_already_flown = crew_member['current_calendar_year_flight_time_hours']
-            else:
-                hours_already_flown = crew_member['last_11_calendar_months_flight_time_hours']
+        # Most flight hours every crew member can be scheduled for - scaled by 100
+        crew_day_pair_hours_scaled = self.model_index.flight_time_hours_scaled[role_assignments.pair_duty[role_assignments.crew_day_pairs]]
+        crew_day_loads = maximum_crew_day_loads(role_assignments.crew_day_indptr, crew_day_pair_hours_scaled, self.max_crew_day_hours_scaled)
+        crew_maximum_loads = np.bincount(role_assignments.crew_day_crew, weights=crew_day_loads,
+                                         minlength=role_assignments.number_of_crew).astype(np.int64)
 
-            # Step 1: Find all duties this crew member could be assigned to
-            x_possible_duty_assignments = x_assignments_by_crew.get(crew_id, [])
+        # Check each crew member's yearly hour limits
+        for crew in range(role_assignments.number_of_crew):
+            crew_pairs = role_assignments.pairs_of_crew(crew)
 
             # Only add constraint if this crew member has possible duties
-            if x_possible_duty_assignments:
+            if crew_pairs.stop > crew_pairs.start:
 
-                # Step 2: Calculate total hours from all possible assignments - scaled by 100 to avoid decimals
-                total_scheduled_hours = 0
-                for duty_id, x_assignment_variable in x_possible_duty_assignments:
-                    flight_time_hours_scaled = int(self.flight_time_hours_lookup[duty_id] * 100)
-                    total_scheduled_hours += flight_time_hours_scaled * x_assignment_variable
+                # Step 1: Flight hours of all duties this crew member could be assigned to - scaled by 100 to avoid decimals
+                flight_time_hours_scaled = self.model_index.flight_time_hours_scaled[role_assignments.pair_duty[crew_pairs]]
 
-                # Step 3: Calculate how many hours this crew member has left this year
-                hours_remaining = self.max_hours_per_period - hours_already_flown
+                # Step 2: Calculate how many hours this crew member has left this year
+                hours_remaining = self.max_hours_per_period - hours_already_flown[crew]
                 max_hours_allowed_scaled = int(hours_remaining * 100)
 
-                # Step 4: Add constraint: scheduled hours must not exceed remaining yearly hours
-                self.constraints_variables_list.append(total_scheduled_hours <= max_hours_allowed_scaled)
\ No newline at end of file
+                # Skip the constraint if even all possible duties stay within the remaining hours
+                if self.reduce_constraints and crew_maximum_loads[crew] <= max_hours_allowed_scaled:
+                    self.number_of_dropped_constraints += 1
+                    continue
+
+                # Step 3: Add constraint: scheduled hours must not exceed remaining yearly hours
+                self.number_of_constraints += 1
+
+                if self.linear_builder == 'proto':
+                    add_weighted_sum_at_most(model_proto, role_assignments.assignment_variable_indices[crew_pairs],
+                                             flight_time_hours_scaled, max_hours_allowed_scaled)
+                    continue
+
+                total_scheduled_hours = 0
+                for flight_time_hours, x_assignment_variable in zip(flight_time_hours_scaled.tolist(), role_assignments.variables_at(crew_pairs)):
+                    total_scheduled_hours += flight_time_hours * x_assignment_variable
+
+                self.constraints_variables_list.append(total_scheduled_hours <= max_hours_allowed_scaled)
@@ -0,0 +1,33 @@
+import numpy as np
+
+# Lower bound of an upper-bounded linear constraint, as written by CpModel.Add(expression <= bound)
+INT64_MIN = np.iinfo(np.int64).min
+
+
+def add_weighted_sum_at_most(model_proto, variable_indices, coefficients, upper_bound):
+    """
+    Add sum(coefficients[i] * variable[variable_indices[i]]) <= upper_bound to a CP-SAT model proto
+
+    Writes the linear constraint proto directly from integer arrays, instead of building a LinearExpr term by
+    term, so the cost per term is a list conversion. Gives the same constraint as
+    model.Add(LinearExpr.WeightedSum(variables, coefficients) <= upper_bound), which drops zero coefficients.
+
+    Args:
+        model_proto: CpModelProto of the model, solver.model.Proto()
+        variable_indices: Array of the model indices of the variables
+        coefficients: Integer array of their coefficients
+        upper_bound: Integer right-hand side, with any constant of the sum moved to it
+    """
+    if not coefficients.all():
+        nonzero_terms = coefficients != 0
+        variable_indices = variable_indices[nonzero_terms]
+        coefficients = coefficients[nonzero_terms]
+
+    order = np.argsort(variable_indices)
+    variable_indices = variable_indices[order]
+    coefficients = coefficients[order]
+
+    constraint = model_proto.constraints.add()
+    constraint.linear.vars.extend(variable_indices.tolist())
+    constraint.linear.coeffs.extend(coefficients.tolist())
+    constraint.linear.domain.extend([int(INT64_MIN), int(upper_bound)])
@@ -1,12 +1,21 @@
 from crewrostering.constraints.constraint import Constraint
+from crewrostering.constraints.linear_constraints import add_weighted_sum_at_most
 
 
 class MaxFlightDutyPeriodHoursConstraint(Constraint):
-    def __init__(self, constraints_data, solver, max_flight_duty_period_hours):
+    def __init__(self, constraints_data, solver, max_flight_duty_period_hours, linear_builder='proto', reduce_constraints=True):
         super().__init__(constraints_data, solver)
 
         self.max_flight_duty_period_hours = max_flight_duty_period_hours
 
+        # How the hour sums are built: 'proto' writes the linear constraints from the hour arrays, 'expression' adds term by term
+        self.linear_builder = linear_builder
+        self.number_of_constraints = 0
+
+        # Drop the constraints of crew-day cells whose candidate duties together stay within the maximum
+        self.reduce_constraints = reduce_constraints
+        self.number_of_dropped_constraints = 0
+
     def generate_constraint_variables(self):
         """
         EASA: Maximum Flight Duty Period (FDP)
@@ -17,54 +26,50 @@ class MaxFlightDutyPeriodHoursConstraint(Constraint):
         """
 
         # Apply constraint for each crew type
-        self.add_max_shift_hours_for_crew_type(self.qualified_captains_df, self.x_captains_to_duties)
-        self.add_max_shift_hours_for_crew_type(self.qualified_first_officers_df, self.x_first_officers_to_duties)
-        self.add_max_shift_hours_for_crew_type(self.qualified_cabin_crew_df, self.x_cabin_crew_to_duties)
+        for role_assignments in self.model_index.roles.values():
+            self.add_max_shift_hours_for_crew_type(role_assignments)
 
-        print(f"Added {len(self.constraints_variables_list)} constraints")
+        print(f"Added {self.number_of_constraints} constraints, dropped {self.number_of_dropped_constraints} that can never bind")
 
         for constraint in self.constraints_variables_list:
             self.solver.model.Add(constraint)
 
-        return len(self.constraints_variables_list)
+        return self.number_of_constraints
 
-    def add_max_shift_hours_for_crew_type(self, qualified_crew_df, x_crew_to_duties_assignments):
+    def add_max_shift_hours_for_crew_type(self, role_assignments):
         """
         Limit total work hours per shift for each crew member
 
         Args:
-            qualified_crew_df: List of crew members
-            x_crew_to_duties_assignments: Possible assignments - crew_assignments[crew_id, duty_id] is 0/1 variable
+            role_assignments: RoleAssignments with the candidate (crew, duty) pairs of one role
         """
 
+        model_proto = self.solver.model.Proto()
+
         max_shift_hours_scaled = int(self.max_flight_duty_period_hours * 100)
 
-        # Pre-group assignments by (crew_id, date)
-        x_assignments_by_crew_date = {}
-        for (crew_id, duty_id), x_assignment_variable in x_crew_to_duties_assignments.items():
-            date = self.duty_dates_lookup[duty_id]
-            if (crew_id, date) not in x_assignments_by_crew_date:
-                x_assignments_by_crew_date[(crew_id, date)] = []
-            x_assignments_by_crew_date[(crew_id, date)].append((duty_id, x_assignment_variable))
+        # Check each crew member's shift limits on each date they could work
+        for crew_day in range(role_assignments.number_of_crew_days):
 
-        # Check each crew member's shift limits
-        for index, crew_member in qualified_crew_df.iterrows():
-            crew_id = crew_member['crew_id']
+            # Step 1: Find all duties this crew member could work on this date
+            pair_positions = role_assignments.pairs_of_crew_day(crew_day)
+            shift_hours_scaled = self.model_index.duty_time_hours_scaled[role_assignments.pair_duty[pair_positions]]
 
-            # Check each unique date
-            for date in self.duty_dates_lookup.values():
+            # Skip the constraint if even all possible duties fit in one shift
+            if self.reduce_constraints and shift_hours_scaled.sum() <= max_shift_hours_scaled:
+                self.number_of_dropped_constraints += 1
+                continue
 
-                # Step 1: Find all duties this crew member could work on this date
-                x_duties_on_this_date = x_assignments_by_crew_date.get((crew_id, date), [])
+            # Step 2: Add constraint: total duty hours of the shift cannot exceed maximum - scaled by 100 to avoid decimals
+            self.number_of_constraints += 1
 
-                # Only add constraint if there are duties on this date
-                if x_duties_on_this_date:
+            if self.linear_builder == 'proto':
+                add_weighted_sum_at_most(model_proto, role_assignments.assignment_variable_indices[pair_positions],
+                                         shift_hours_scaled, max_shift_hours_scaled)
+                continue
 
-                    # Step 2: Calculate total duty hours for this shift - scaled by 100 to avoid decimals
-                    total_shift_hours = 0
-                    for duty_id, x_assignment_variable in x_duties_on_this_date:
-                        shift_hours_scaled = int(self.duty_time_hours_lookup[duty_id] * 100)
-                        total_shift_hours += shift_hours_scaled * x_assignment_variable
+            total_shift_hours = 0
+            for duty_time_hours_scaled, x_assignment_variable in zip(shift_hours_scaled.tolist(), role_assignments.variables_at(pair_positions)):
+                total_shift_hours += duty_time_hours_scaled * x_assignment_variable
 
-                    # Step 3: Add constraint: shift hours cannot exceed maximum
-                    self.constraints_variables_list.append(total_shift_hours <= max_shift_hours_scaled)
\ No newline at end of file
+            self.constraints_variables_list.append(total_shift_hours <= max_shift_hours_scaled)
@@ -1,28 +1,39 @@
-from datetime import timedelta
+import numpy as np
 
 from crewrostering.constraints.constraint import Constraint
+from crewrostering.constraints.linear_constraints import add_weighted_sum_at_most
+from crewrostering.constraints.window_reduction import find_binding_windows, max_crew_day_hours_scaled, maximum_crew_day_loads
 
 
 class MaxHoursRollingPeriodConstraint(Constraint):
-    def __init__(self, constraints_data, solver, max_duty_or_flight_time_hours_per_window, rolling_days_window_size, duty_or_flight_mode):
+    def __init__(self, constraints_data, solver, max_duty_or_flight_time_hours_per_window, rolling_days_window_size, duty_or_flight_mode,
+                 reduce_windows=True, linear_builder='proto', max_flight_duty_period_hours=None):
         super().__init__(constraints_data, solver)
 
         self.max_hours_per_window = max_duty_or_flight_time_hours_per_window
         self.rolling_days_window_size = rolling_days_window_size
         self.duty_or_flight_mode = duty_or_flight_mode # flight or duty
 
-        # Pre-compute flight groupings by date
-        self.duties_by_date = {}
-        for duty_id, date in self.duty_dates_lookup.items():
-            if date not in self.duties_by_date:
-                self.duties_by_date[date] = []
-            self.duties_by_date[date].append(duty_id)
+        # Drop windows that can never bind or are implied by another window of the same crew member
+        self.reduce_windows = reduce_windows
+        self.number_of_dropped_windows = 0
 
-        # Pre-compute historical hours by crew
-        self.historical_flights_by_crew = {}
-        for crew_id in self.historical_flights_df['crew_id'].unique():
-            crew_history = self.historical_flights_df[self.historical_flights_df['crew_id'] == crew_id]
-            self.historical_flights_by_crew[crew_id] = crew_history
+        # The daily flight duty period limit (if given) caps the hours a window can collect on each day
+        self.max_crew_day_hours_scaled = max_crew_day_hours_scaled(self.model_index, duty_or_flight_mode, max_flight_duty_period_hours)
+
+        # How the hour sums are built: 'proto' writes the linear constraints from the hour arrays, 'expression' adds term by term
+        self.linear_builder = linear_builder
+        self.number_of_constraints = 0
+
+        # Duty or flight hours of every duty - scaled by 100 to avoid decimals
+        if self.duty_or_flight_mode == 'flight':
+            self.duty_or_flight_time_hours_scaled = self.model_index.flight_time_hours_scaled
+        else:
+            self.duty_or_flight_time_hours_scaled = self.model_index.duty_time_hours_scaled
+
+        # Historical range of every window: the x - 1 calendar days before the window starts
+        self.historical_start_day_numbers = self.model_index.day_numbers - (self.rolling_days_window_size - 1)
+        self.historical_end_day_numbers = self.model_index.day_numbers - 1
 
     def generate_constraint_variables(self):
         """
@@ -30,93 +41,110 @@ class MaxHoursRollingPeriodConstraint(Constraint):
         """
 
         # Apply constraint for each crew type
-        self.add_rolling_constraint_for_crew_type(self.qualified_captains_df, self.x_captains_to_duties)
-        self.add_rolling_constraint_for_crew_type(self.qualified_first_officers_df, self.x_first_officers_to_duties)
-        self.add_rolling_constraint_for_crew_type(self.qualified_cabin_crew_df, self.x_cabin_crew_to_duties)
+        for role_assignments in self.model_index.roles.values():
+            self.add_rolling_constraint_for_crew_type(role_assignments)
 
-        print(f"Added {len(self.constraints_variables_list)} constraints")
+        print(f"Added {self.number_of_constraints} constraints, dropped {self.number_of_dropped_windows} dominated or non-binding windows")
 
         for constraint in self.constraints_variables_list:
             self.solver.model.Add(constraint)
 
-        return len(self.constraints_variables_list)
+        return self.number_of_constraints
 
-    def add_rolling_constraint_for_crew_type(self, qualified_crew_df, x_crew_to_duties_assignments):
+    def add_rolling_constraint_for_crew_type(self, role_assignments):
         """
         Limit duty or flight hours in any x-day period for each crew member
 
         Args:
-            qualified_crew_df: List of crew members (captains, first officers, or cabin crew)
-            x_crew_to_duties_assignments: Possible assignments - crew_assignments[crew_id, duty_id] is a 0/1 variable
+            role_assignments: RoleAssignments with the candidate (crew, duty) pairs of one role
         """
 
-        # Pre-group assignments by crew_id
-        x_assignments_by_crew = {}
-        for (crew_id, duty_id), var in x_crew_to_duties_assignments.items():
-            if crew_id not in x_assignments_by_crew:
-                x_assignments_by_crew[crew_id] = {}
-            x_assignments_by_crew[crew_id][duty_id] = var
+        model_proto = self.solver.model.Proto()
+
+        max_duty_or_flight_time_hours_scaled = int(self.max_hours_per_window * 100)
+
+        # Duty or flight hours of the pairs in crew-day order, and the most every crew-day cell can add to a window as
+        # prefix sums to get the maximum load of any window
+        crew_day_pair_hours_scaled = self.duty_or_flight_time_hours_scaled[role_assignments.pair_duty[role_assignments.crew_day_pairs]]
+        crew_day_loads = maximum_crew_day_loads(role_assignments.crew_day_indptr, crew_day_pair_hours_scaled, self.max_crew_day_hours_scaled)
+        cumulative_crew_day_loads = np.concatenate(([0], np.cumsum(crew_day_loads)))
+        crew_day_pair_variable_indices = role_assignments.assignment_variable_indices[role_assignments.crew_day_pairs]
 
         # Check each crew member's rolling duty or flight hour limits
-        for index, crew_member in qualified_crew_df.iterrows():
-            crew_id = crew_member['crew_id']
+        for crew in range(role_assignments.number_of_crew):
+            crew_days = role_assignments.crew_days_of_crew(crew)
 
-            if crew_id not in x_assignments_by_crew:
+            if len(crew_days) == 0:
                 continue
 
-            crew_assignments = x_assignments_by_crew[crew_id]
-            crew_history = self.historical_flights_by_crew.get(crew_id)
-
-            # Check every possible x-day calendar window starting from this month's dates
-            for window_start_date in self.unique_duty_dates:
-                window_end_date = window_start_date + timedelta(
-                    days=self.rolling_days_window_size - 1)  # x calendar days total
-
-                # Step 1: Get historical duty or flight hours from previous month
-                historical_start_date = window_start_date - timedelta(days=self.rolling_days_window_size - 1)
-                historical_end_date = window_start_date - timedelta(days=1)  # Day before window starts
-
-                # Get historical duty or flight hours for this crew in the days before window starts
-                historical_duty_or_flight_time_hours = 0
-                if crew_history is not None and len(crew_history) > 0:
-                    flights_in_historical_range = crew_history[
-                        (crew_history['scheduled_departure_utc'].dt.date >= historical_start_date) &
-                        (crew_history['scheduled_departure_utc'].dt.date <= historical_end_date)
-                        ]
-
-                    # Sum up duty or flight hours and scale by 100
-                    if self.duty_or_flight_mode == 'flight':
-                        historical_duty_or_flight_time_hours = flights_in_historical_range['flight_time_hours'].sum()
-                    else:
-                        historical_duty_or_flight_time_hours = flights_in_historical_range['duty_time_hours'].sum()
-
-                historical_duty_or_flight_time_hours_scaled = int(historical_duty_or_flight_time_hours * 100)
-
-                # Step 2: Find all scheduled duties this crew could work in this window
-                x_duties_in_this_window = []
-                current_date = window_start_date
-                while current_date <= window_end_date:
-                    if current_date in self.duties_by_date:
-                        for duty_id in self.duties_by_date[current_date]:
-                            if duty_id in crew_assignments:
-                                x_assignment_variable = crew_assignments[duty_id]
-                                x_duties_in_this_window.append((duty_id, x_assignment_variable))
-                    current_date += timedelta(days=1)
-
+            # Calendar day numbers of the crew-day cells of this crew member, in increasing order
+            crew_day_numbers = self.model_index.day_numbers[role_assignments.crew_day_day[crew_days.start:crew_days.stop]].tolist()
+
+            # Step 1: Get historical duty or flight hours (scaled by 100) in the days before every window starts
+            crew_prefix_sums = self.historical_load_index.crew_prefix_sums(role_assignments.crew_ids[crew], self.duty_or_flight_mode)
+            historical_duty_or_flight_time_hours_scaled = self.historical_load_index.range_loads(crew_prefix_sums,
+                                                                                                 self.historical_start_day_numbers,
+                                                                                                 self.historical_end_day_numbers)
+
+            # Step 2: Find the crew-day cells of every x-day calendar window starting from this month's dates
+            # Window starts and ends only move forward, so the window's crew-day cells are found with two pointers
+            first_cells = []
+            last_cells = []
+            first_cell = 0
+            last_cell = 0
+
+            for window_start_day_number in self.model_index.day_numbers.tolist():
+                window_end_day_number = window_start_day_number + self.rolling_days_window_size - 1  # x calendar days total
+
+                while first_cell < len(crew_day_numbers) and crew_day_numbers[first_cell] < window_start_day_number:
+                    first_cell += 1
+
+                last_cell = max(last_cell, first_cell)
+                while last_cell < len(crew_day_numbers) and crew_day_numbers[last_cell] <= window_end_day_number:
+                    last_cell += 1
+
+                first_cells.append(first_cell)
+                last_cells.append(last_cell)
+
+            # Crew-day cells and pair positions (in crew-day order) spanned by every window
+            first_crew_days = crew_days.start + np.array(first_cells, dtype=np.int64)
+            last_crew_days = crew_days.start + np.array(last_cells, dtype=np.int64)
+            first_positions = role_assignments.crew_day_indptr[first_crew_days]
+            last_positions = role_assignments.crew_day_indptr[last_crew_days]
+
+            # Step 3: Keep the windows that can bind and aren't implied by another window
+            if self.reduce_windows:
+                maximum_loads = (historical_duty_or_flight_time_hours_scaled
+                                 + cumulative_crew_day_loads[last_crew_days]
+                                 - cumulative_crew_day_loads[first_crew_days])
+                windows = np.flatnonzero(find_binding_windows(first_positions, last_positions,
+                                                              historical_duty_or_flight_time_hours_scaled,
+                                                              maximum_loads, max_duty_or_flight_time_hours_scaled))
+            else:
                 # Only add constraint if there are duties OR historical hours
-                if x_duties_in_this_window or historical_duty_or_flight_time_hours_scaled > 0:
-
-                    # Step 3: Calculate total duty hours (historical + scheduled) - scaled by 100
-                    total_duty_or_flight_time_hours = historical_duty_or_flight_time_hours_scaled
-                    for duty_id, x_assignment_variable in x_duties_in_this_window:
-                        if self.duty_or_flight_mode == 'flight':
-                            duty_or_flight_time_hours_scaled = int(self.flight_time_hours_lookup[duty_id] * 100)
-                        else:
-                            duty_or_flight_time_hours_scaled = int(self.duty_time_hours_lookup[duty_id] * 100)
-
-                        total_duty_or_flight_time_hours += duty_or_flight_time_hours_scaled * x_assignment_variable
-
-                    # Step 4: Add constraint: duty or flight hours in window <= max hours
-                    max_duty_or_flight_time_hours_scaled = int(self.max_hours_per_window * 100)
-                    self.constraints_variables_list.append(
-                        total_duty_or_flight_time_hours <= max_duty_or_flight_time_hours_scaled)
\ No newline at end of file
+                windows = np.flatnonzero((last_positions > first_positions) | (historical_duty_or_flight_time_hours_scaled > 0))
+
+            self.number_of_dropped_windows += len(first_cells) - len(windows)
+
+            self.number_of_constraints += len(windows)
+
+            for window in windows.tolist():
+                window_pairs = slice(first_positions[window], last_positions[window])
+
+                # Step 4: Add constraint: duty or flight hours in window (historical + scheduled) <= max hours - scaled by 100
+                if self.linear_builder == 'proto':
+                    # The historical hours are a constant, they lower the hours left for the window
+                    add_weighted_sum_at_most(model_proto, crew_day_pair_variable_indices[window_pairs],
+                                             crew_day_pair_hours_scaled[window_pairs],
+                                             max_duty_or_flight_time_hours_scaled - historical_duty_or_flight_time_hours_scaled[window])
+                    continue
+
+                pair_positions_in_window = role_assignments.crew_day_pairs[window_pairs]
+
+                total_duty_or_flight_time_hours = int(historical_duty_or_flight_time_hours_scaled[window])
+                for hours_scaled, x_assignment_variable in zip(crew_day_pair_hours_scaled[window_pairs].tolist(),
+                                                               role_assignments.variables_at(pair_positions_in_window)):
+                    total_duty_or_flight_time_hours += hours_scaled * x_assignment_variable
+
+                self.constraints_variables_list.append(
+                    total_duty_or_flight_time_hours <= max_duty_or_flight_time_hours_scaled)
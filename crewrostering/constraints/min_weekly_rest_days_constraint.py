@@ -1,16 +1,38 @@
-from datetime import timedelta
+import numpy as np
 from ortools.sat.python.cp_model import LinearExpr
 
 from crewrostering.constraints.constraint import Constraint
+from crewrostering.constraints.window_reduction import find_binding_windows
 
 
 class MinWeeklyRestDaysConstraint(Constraint):
-    def __init__(self, constraints_data, solver, min_weekly_rest_days, period_days=14):
+    def __init__(self, constraints_data, solver, min_weekly_rest_days, period_days=14, reduce_windows=True):
         super().__init__(constraints_data, solver)
 
         self.min_weekly_rest_days = min_weekly_rest_days
         self.period_days = period_days
 
+        # Drop windows that can never bind or are implied by another window of the same crew member
+        self.reduce_windows = reduce_windows
+        self.number_of_dropped_windows = 0
+
+        # Make a dictionary that tells us which day ordinals are in each window
+        self.window_days_lookup = {}
+        day_numbers = self.model_index.day_numbers
+
+        for start_day, start_date in enumerate(self.model_index.day_dates):
+            # Collect all days that fall between the window start and its last day
+            end_day_number = day_numbers[start_day] + self.period_days - 1
+            self.window_days_lookup[start_date] = np.flatnonzero((day_numbers >= day_numbers[start_day]) & (day_numbers <= end_day_number))
+
+        # Historical range of every window: the part of the window before the schedule start (day number 0)
+        self.historical_start_day_numbers = day_numbers - (self.period_days - 1)
+        self.historical_end_day_numbers = np.full(len(day_numbers), -1, dtype=np.int64)
+
+        # Window days are consecutive day ordinals, so every window is the ordinal range [first, last)
+        self.window_first_days = np.array([days[0] for days in self.window_days_lookup.values()], dtype=np.int64)
+        self.window_last_days = np.array([days[-1] + 1 for days in self.window_days_lookup.values()], dtype=np.int64)
+
     def generate_constraint_variables(self):
         """
         EASA: Minimum rest days requirement
@@ -21,90 +43,60 @@ class MinWeeklyRestDaysConstraint(Constraint):
         """
 
         # Apply constraint for each crew type
-        self.add_rest_days_for_crew_type(self.qualified_captains_df, self.x_captains_worked_on_dates)
-        self.add_rest_days_for_crew_type(self.qualified_first_officers_df, self.x_first_officers_worked_on_dates)
-        self.add_rest_days_for_crew_type(self.qualified_cabin_crew_df, self.x_cabin_crew_worked_on_dates)
+        for role_assignments in self.model_index.roles.values():
+            self.add_rest_days_for_crew_type(role_assignments)
 
-        print(f"Added {len(self.constraints_variables_list)} constraints")
+        print(f"Added {len(self.constraints_variables_list)} constraints, dropped {self.number_of_dropped_windows} dominated or non-binding windows")
 
         for constraint in self.constraints_variables_list:
             self.solver.model.Add(constraint)
 
         return len(self.constraints_variables_list)
 
-    def add_rest_days_for_crew_type(self, qualified_crew_df, x_crew_worked_on_dates):
+    def add_rest_days_for_crew_type(self, role_assignments):
         """
         Ensure each crew member gets minimum rest days in any rolling window
 
         Args:
-            qualified_crew_df: List of crew members
-            x_crew_worked_on_dates: Dictionary of (crew_id, date) -> BoolVar (1 if worked that day, 0 if rested)
+            role_assignments: RoleAssignments with the "worked on date" BoolVars of the crew-day cells of one role
+                              (1 if worked that day, 0 if rested)
         """
 
         # Calculate the maximum number of days a crew member is allowed to work in each rolling window.
         max_work_days = int(self.period_days - self.min_weekly_rest_days)
 
-        # Find the very first date in the schedule (the earliest date we have)
-        schedule_start_date = min(self.unique_duty_dates)
-
-        # Make a dictionary that tells us which dates are in each window
-        window_dates_lookup = {}
-
-        for start_date in self.unique_duty_dates:
-            # Figure out the last date in this window
-            end_date = start_date + timedelta(days=self.period_days - 1)
-
-            # Collect all dates that fall between start_date and end_date
-            dates_in_window = []
-            for date in self.unique_duty_dates:
-                if start_date <= date <= end_date:
-                    dates_in_window.append(date)
-
-            # Save this list in the dictionary
-            window_dates_lookup[start_date] = dates_in_window
-
-        # Make a dictionary to remember which crew worked on which past dates
-        historical_work_lookup = {}
-
-        # Go through each row in the historical flights table
-        if self.historical_flights_df is not None:
-            for index, historical_flight in self.historical_flights_df.iterrows():
-                crew_id = historical_flight['crew_id']  # the crew member
-                work_date = historical_flight['scheduled_departure_utc'].date()  # the day they worked
-
-                # Mark that this crew worked on this date
-                historical_work_lookup[(crew_id, work_date)] = 1
-
         # Go through each crew member
-        for index, crew_member in qualified_crew_df.iterrows():
-            crew_id = crew_member['crew_id']
+        for crew, crew_id in enumerate(role_assignments.crew_ids):
+            # Day ordinals of the crew-day cells of this crew member, other days count as rest days
+            crew_days = role_assignments.crew_days_of_crew(crew)
+            crew_day_days = role_assignments.crew_day_day[crew_days.start:crew_days.stop]
+
+            # Count how many historical work days this crew had in each window
+            crew_prefix_sums = self.historical_load_index.crew_prefix_sums(crew_id, 'work_days')
+            historical_work_days = self.historical_load_index.range_loads(crew_prefix_sums,
+                                                                          self.historical_start_day_numbers,
+                                                                          self.historical_end_day_numbers)
+
+            # The crew-day cells [first_cell, last_cell) of every window
+            first_cells = crew_days.start + np.searchsorted(crew_day_days, self.window_first_days)
+            last_cells = crew_days.start + np.searchsorted(crew_day_days, self.window_last_days)
+
+            # Keep the windows that can bind and aren't implied by another window
+            if self.reduce_windows:
+                maximum_work_days = historical_work_days + last_cells - first_cells
+                windows = np.flatnonzero(find_binding_windows(first_cells, last_cells, historical_work_days,
+                                                              maximum_work_days, max_work_days))
+            else:
+                # Add the constraint if there is any work recorded
+                windows = np.flatnonzero((last_cells > first_cells) | (historical_work_days > 0))
 
-            # Go through each window of dates
-            for window_start_date, dates_in_window in window_dates_lookup.items():
-                # Count how many historical work days this crew had in this window
-                historical_work_days = 0
-
-                # Calculate the historical date range for this window
-                historical_start_date = window_start_date - timedelta(days=self.period_days - 1)
-                historical_end_date = schedule_start_date - timedelta(days=1)
-
-                # Only check historical dates if the window extends before the schedule start
-                if historical_start_date < schedule_start_date:
-                    # Count days between historical_start_date and historical_end_date
-                    current_date = historical_start_date
-                    while current_date <= historical_end_date:
-                        if (crew_id, current_date) in historical_work_lookup:
-                            historical_work_days += 1
-                        current_date += timedelta(days=1)
+            self.number_of_dropped_windows += len(self.window_first_days) - len(windows)
 
+            # Go through each window of dates
+            for window in windows.tolist():
                 # Collect all "worked on date" variables for this crew in this window
-                x_days_worked_variables = []
-                for date in dates_in_window:
-                    if (crew_id, date) in x_crew_worked_on_dates:
-                        x_days_worked_variables.append(x_crew_worked_on_dates[crew_id, date])
+                x_days_worked_variables = role_assignments.worked_on_day_variables[first_cells[window]:last_cells[window]]
 
-                # Add the constraint if there is any work recorded
-                if x_days_worked_variables or historical_work_days > 0:
-                    self.constraints_variables_list.append(
-                        historical_work_days + LinearExpr.Sum(x_days_worked_variables) <= max_work_days
-                    )
\ No newline at end of file
+                self.constraints_variables_list.append(
+                    int(historical_work_days[window]) + LinearExpr.Sum(x_days_worked_variables) <= max_work_days
+                )
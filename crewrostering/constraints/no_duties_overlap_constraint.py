@@ -1,64 +1,104 @@
-import pandas as pd
-from ortools.sat.python.cp_model import LinearExpr
+import numpy as np
 from crewrostering.constraints.constraint import Constraint
+from crewrostering.constraints.duty_conflict_graph import DutyConflictGraph
 
 class NoDutiesOverlapConstraint(Constraint):
-    def __init__(self, constraints_data, solver):
+    def __init__(self, constraints_data, solver, overlap_mode='cliques'):
         super().__init__(constraints_data, solver)
 
+        # How overlapping duties are excluded per crew member: 'cliques' (AtMostOne per conflict clique) or 'intervals'
+        self.overlap_mode = overlap_mode
+
         self.number_of_interval_vars = 0
         self.number_of_no_overlap_constraints = 0
+        self.number_of_at_most_one_constraints = 0
+
+        # Start and end of every duty in minutes since the first schedule day
+        self.duty_start_minutes = self.model_index.duty_start_minutes
+        self.duty_end_minutes = self.model_index.duty_end_minutes
+
+        # Overlapping duties don't depend on the crew, so the conflict graph is built once for all roles
+        self.duty_conflict_graph = DutyConflictGraph(self.duty_start_minutes, self.duty_end_minutes) if overlap_mode == 'cliques' else None
 
     def generate_constraint_variables(self):
         """
-        Use interval variables for more efficient no-overlap constraints.
+        A crew member can't work two duties that overlap in time.
+        """
+        if self.overlap_mode == 'intervals':
+            for role_assignments in self.model_index.roles.values():
+                self.add_interval_no_overlap(role_assignments)
+
+            print(f"Added {self.number_of_interval_vars} interval decision variables")
+            print(f"Added {self.number_of_no_overlap_constraints} no-overlap constraints")
+        else:
+            for role_assignments in self.model_index.roles.values():
+                self.add_clique_at_most_one(role_assignments)
+
+            print(f"Found {self.duty_conflict_graph.number_of_conflicts} overlapping duty pairs in "
+                  f"{self.duty_conflict_graph.number_of_cliques} conflict cliques")
+            print(f"Added {self.number_of_at_most_one_constraints} at-most-one constraints")
+
+    def add_clique_at_most_one(self, role_assignments):
+        """
+        Add an AtMostOne over the candidate duties of each crew member in each conflict clique.
         """
-        self.add_interval_no_overlap(self.x_captains_to_duties, "Captains")
-        self.add_interval_no_overlap(self.x_first_officers_to_duties, "First Officers")
-        self.add_interval_no_overlap(self.x_cabin_crew_to_duties, "Cabin Crew")
+        pair_crew = role_assignments.pair_crew
+
+        # Crew members can have the same candidates in several cliques, those constraints are only added once
+        added_pair_positions = set()
+
+        for clique in range(self.duty_conflict_graph.number_of_cliques):
+            clique_duties = self.duty_conflict_graph.duties_of_clique(clique).tolist()
+            pair_positions = np.concatenate([role_assignments.pairs_of_duty(duty) for duty in clique_duties])
 
-        print(f"Added {self.number_of_interval_vars} interval decision variables")
-        print(f"Added {self.number_of_no_overlap_constraints} no-overlap constraints")
+            # Group the candidate pairs of the clique by crew member, in duty order within each crew member
+            pair_positions = pair_positions[np.argsort(pair_crew[pair_positions], kind='stable')]
+            crew_starts = np.flatnonzero(np.diff(pair_crew[pair_positions], prepend=-1))
+            crew_ends = np.append(crew_starts[1:], len(pair_positions))
 
-    def add_interval_no_overlap(self, x_crew_to_duties, crew_type_name):
+            for crew_start, crew_end in zip(crew_starts.tolist(), crew_ends.tolist()):
+                if crew_end - crew_start < 2:
+                    continue
+
+                crew_pair_positions = tuple(pair_positions[crew_start:crew_end].tolist())
+
+                if crew_pair_positions in added_pair_positions:
+                    continue
+
+                added_pair_positions.add(crew_pair_positions)
+
+                self.number_of_at_most_one_constraints += 1
+                self.solver.model.AddAtMostOne(role_assignments.variables_at(crew_pair_positions))
+
+    def add_interval_no_overlap(self, role_assignments):
         """
         Create interval variables and add no-overlap constraints.
         """
-        crew_ids = set()
-        for crew_id, duty_id in x_crew_to_duties.keys():
-            crew_ids.add(crew_id)
+        crew_ids = role_assignments.crew_ids
+        duty_ids = self.model_index.duty_ids
 
-        for crew_id in crew_ids:
-            intervals = []
+        for crew in range(role_assignments.number_of_crew):
+            crew_pairs = role_assignments.pairs_of_crew(crew)
+            crew_duties = role_assignments.pair_duty[crew_pairs].tolist()
 
-            for (c_id, duty_id), x_assignment_var in x_crew_to_duties.items():
-                if c_id == crew_id:
-                    duty = self.duties_for_aircraft_df[self.duties_for_aircraft_df['duty_id'] == duty_id].iloc[0]
+            intervals = []
 
-                    # Convert times to integers (e.g., minutes since start)
-                    start = self.time_to_int(duty['scheduled_departure_utc'])
-                    duration = self.time_to_int(duty['scheduled_arrival_utc']) - start
+            for duty, x_assignment_var in zip(crew_duties, role_assignments.variables_at(crew_pairs)):
+                start = int(self.duty_start_minutes[duty])
+                duration = int(self.duty_end_minutes[duty]) - start
 
-                    # Create optional interval (only active if assigned)
-                    self.number_of_interval_vars += 1
+                # Create optional interval (only active if assigned)
+                self.number_of_interval_vars += 1
 
-                    interval = self.solver.model.NewOptionalIntervalVar(
-                        start,
-                        duration,
-                        start + duration,
-                        x_assignment_var,
-                        f'interval_{crew_id}_{duty_id}'
-                    )
-                    intervals.append(interval)
+                interval = self.solver.model.NewOptionalIntervalVar(
+                    start,
+                    duration,
+                    start + duration,
+                    x_assignment_var,
+                    f'interval_{crew_ids[crew]}_{duty_ids[duty]}'
+                )
+                intervals.append(interval)
 
             if intervals:
                 self.number_of_no_overlap_constraints += 1
                 self.solver.model.AddNoOverlap(intervals)
-
-    def time_to_int(self, time_value):
-        """
-        Convert pandas datetime to integer minutes since January 1, 2025.
-        """
-        time_diff = time_value - pd.Timestamp('2025-01-01 00:00:00')
-        minutes = int(time_diff.total_seconds() / 60)
-        return minutes
\ No newline at end of file
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+def find_binding_windows(first_positions, last_positions, constants, maximum_loads, limit):
+    """
+    Select the rolling-window constraints that can't be dropped without changing the feasible set
+
+    Window w stands for the constraint constants[w] + sum(a[p] * x[p] for p in range(first_w, last_w)) <= limit,
+    with non-negative coefficients a over one crew member's assignments sorted by day and binary x. A window is
+    dropped when:
+    - it can never bind: even with all its assignments taken its load, maximum_loads[w], stays within the limit
+    - it is dominated: another window covers the same or a superset of its assignments with no smaller constant,
+      so that window's constraint implies this one (of identical windows only the first is kept)
+
+    Args:
+        first_positions: First assignment position of every window
+        last_positions: Position after the last assignment of every window
+        constants: Constant (historical) load of every window
+        maximum_loads: Constant plus the coefficients of all assignments of every window
+        limit: Right-hand side shared by all windows
+
+    Returns: Boolean array, True for the windows to keep
+    """
+    first_positions = np.asarray(first_positions)
+    last_positions = np.asarray(last_positions)
+    constants = np.asarray(constants)
+
+    can_bind = np.asarray(maximum_loads) > limit
+
+    # covers[w, v]: window v holds every assignment of window w (an empty window is covered by any window)
+    is_empty = first_positions >= last_positions
+    covers = ((first_positions[None, :] <= first_positions[:, None]) & (last_positions[:, None] <= last_positions[None, :])) | is_empty[:, None]
+
+    # Window v implies window w when it covers it with no smaller constant, ties between identical windows go to the first
+    identical = (covers & covers.T) & (constants[None, :] == constants[:, None])
+    window_order = np.arange(len(constants))
+    implies = covers & (constants[None, :] >= constants[:, None]) & (~identical | (window_order[None, :] < window_order[:, None]))
+
+    # Only binding windows can stand in for others, windows that never bind are dropped anyway
+    np.fill_diagonal(implies, False)
+    is_dominated = (implies & can_bind[None, :]).any(axis=1)
+
+    return can_bind & ~is_dominated
+
+
+def max_crew_day_hours_scaled(model_index, duty_or_flight_mode, max_flight_duty_period_hours):
+    """
+    Most duty or flight hours (scaled by 100) a crew member can work on one day, None without a bound
+
+    The flight duty period limit caps the duty hours of every crew-day cell, and flight hours are part of the
+    duty hours whenever every duty flies no longer than it lasts.
+
+    Args:
+        model_index: ModelIndex with the duty hours
+        duty_or_flight_mode: 'duty' or 'flight' hours
+        max_flight_duty_period_hours: Flight duty period limit per crew member and day, None if not enforced
+    """
+    if max_flight_duty_period_hours is None:
+        return None
+
+    if duty_or_flight_mode == 'flight' and not (model_index.flight_time_hours_scaled <= model_index.duty_time_hours_scaled).all():
+        return None
+
+    return int(max_flight_duty_period_hours * 100)
+
+
+def maximum_crew_day_loads(crew_day_indptr, crew_day_pair_loads, max_crew_day_load=None):
+    """
+    Largest load every crew-day cell can contribute: all its candidate duties, capped by the daily limit
+
+    Args:
+        crew_day_indptr: CSR row pointer of the pairs of every crew-day cell
+        crew_day_pair_loads: Load of every pair, in crew-day order
+        max_crew_day_load: Limit enforced on the load of every cell, None for no limit
+
+    Returns: Integer array with the maximum load of every crew-day cell
+    """
+    cumulative_loads = np.concatenate(([0], np.cumsum(crew_day_pair_loads, dtype=np.int64)))
+    crew_day_loads = cumulative_loads[crew_day_indptr[1:]] - cumulative_loads[crew_day_indptr[:-1]]
+
+    if max_crew_day_load is not None:
+        crew_day_loads = np.minimum(crew_day_loads, max_crew_day_load)
+
+    return crew_day_loads
@@ -0,0 +1,41 @@
+from crewrostering.constraints.constraint import Constraint
+
+
+class WorkedOnDayConstraint(Constraint):
+    def __init__(self, constraints_data, solver):
+        super().__init__(constraints_data, solver)
+
+        self.number_of_channelling_constraints = 0
+
+    def generate_constraint_variables(self):
+        """
+        A crew member works on a date if and only if they are assigned to one of the duties of that date
+        """
+
+        # Apply constraint for each crew type
+        for role_assignments in self.model_index.roles.values():
+            self.add_worked_on_day_for_crew_type(role_assignments)
+
+        print(f"Added {self.number_of_channelling_constraints} constraints")
+
+        return self.number_of_channelling_constraints
+
+    def add_worked_on_day_for_crew_type(self, role_assignments):
+        """
+        Tie every "worked on date" variable to the assignments of its crew-day cell
+
+        Args:
+            role_assignments: RoleAssignments with the candidate (crew, duty) pairs of one role
+        """
+
+        for crew_day in range(role_assignments.number_of_crew_days):
+            pair_positions = role_assignments.pairs_of_crew_day(crew_day)
+
+            # Cells with a single candidate use the assignment variable itself
+            if len(pair_positions) == 1:
+                continue
+
+            # Worked on date = max of the assignments of that date
+            self.number_of_channelling_constraints += 1
+            self.solver.model.AddMaxEquality(role_assignments.worked_on_day_variables[crew_day],
+                                             role_assignments.variables_at(pair_positions))
@@ -1,7 +1,9 @@
+import argparse
 import time
 
 import pandas as pd
 
+from crewrostering.constraints.crew_day_constraint import CrewDayConstraint
 from crewrostering.constraints.flight_coverage_constraint import FlightCoverageConstraint
 from crewrostering.constraints.max_hours_rolling_period_constraint import MaxHoursRollingPeriodConstraint
 from crewrostering.constraints.max_flight_duty_period_hours_constraint import MaxFlightDutyPeriodHoursConstraint
@@ -9,8 +11,18 @@ from crewrostering.constraints.flight_time_hours_period_constraint import Flight
 from crewrostering.constraints.max_sectors_constraint import MaxSectorsConstraint
 from crewrostering.constraints.min_weekly_rest_days_constraint import MinWeeklyRestDaysConstraint
 from crewrostering.constraints.no_duties_overlap_constraint import NoDutiesOverlapConstraint
+from crewrostering.constraints.worked_on_day_constraint import WorkedOnDayConstraint
+from crewrostering.preprocessing.artifact_cache import ArtifactCache
+from crewrostering.preprocessing.eligibility_components import find_eligibility_components
 from crewrostering.preprocessing.flight_data_preprocessor import FlightDataPreprocessor
+from crewrostering.preprocessing.prior_roster import PriorRoster
 from crewrostering.solvers.aircraft_sat_solver import AircraftSatSolver
+from crewrostering.solvers.build_profiler import BuildProfiler
+from crewrostering.solvers.parallel_constraint_builder import ParallelConstraintBuilder
+from crewrostering.solvers.rolling_horizon import RollingHorizon
+from crewrostering.solvers.component_solver import ComponentSolver
+from crewrostering.solvers.greedy_rosterer import GreedyRosterer
+from crewrostering.solvers.solver_config import SolverConfig, available_cores
 from crewrostering.preprocessing.feasible_assignments_filter import FeasibleAssignmentsFilter
 from crewrostering.preprocessing.pairing_duties_generator import PairingDutiesGenerator
 
@@ -20,7 +32,57 @@ class CrewScheduler:
     Crew Scheduling with EASA Constraints using Google OR-Tools CP-SAT
     """
 
-    def __init__(self):
+    def __init__(self, pairing_mode='return_flights', use_artifact_cache=True, refresh_artifact_cache=False,
+                 overlap_mode='cliques', constraint_builder='fused', constraint_workers=1, linear_builder='proto',
+                 profile=False, solver_config=None, decompose=False, component_workers=None, horizon_days=None,
+                 horizon_overlap_days=0, prior_roster=None, deviation_weight=0, engine='cp-sat', greedy_hints=False):
+        # How flights are combined into duties: 'return_flights' or 'connection_graph'
+        self.pairing_mode = pairing_mode
+
+        # How overlapping duties are excluded per crew member: 'cliques' or 'intervals' (separate builder only)
+        self.overlap_mode = overlap_mode
+
+        # How the per crew-day constraints (sectors, flight duty period, overlap, worked on date) are built:
+        # 'fused' in a single pass over the crew-day cells, or 'separate' with one constraint class each
+        self.constraint_builder = constraint_builder
+
+        # Number of worker processes building the constraint families concurrently, 1 builds them one after another
+        self.constraint_workers = constraint_workers
+
+        # How the weighted sums of the hour, sector and flight duty period limits are built: 'proto' writes the linear
+        # constraints from coefficient arrays, 'expression' builds CP-SAT linear expressions
+        self.linear_builder = linear_builder
+
+        # Wall time of every stage, with profile also CPU time, peak memory and model growth for a report
+        self.profiler = BuildProfiler(enabled=profile)
+
+        # CP-SAT search settings (time limit, workers, gaps, seed, log, portfolio), defaults when None
+        self.solver_config = solver_config or SolverConfig()
+
+        # Solve the independent components of the crew-duty eligibility graph (per role and connected qualifications)
+        # as separate models, in component_workers processes (None for all available cores)
+        self.decompose = decompose
+        self.component_workers = component_workers if component_workers is not None else available_cores()
+
+        # Rolling horizon: solve windows committing horizon_days days of departures each and looking
+        # horizon_overlap_days further ahead, None solves the whole period at once
+        self.horizon_days = horizon_days
+        self.horizon_overlap_days = horizon_overlap_days
+
+        # PriorRoster of a previously published roster whose assignments are hinted to the solver, and the objective
+        # cost of every prior assignment given up (0 only hints)
+        self.prior_roster = prior_roster
+        self.deviation_weight = deviation_weight
+
+        # How the filtered assignments are rostered: 'cp-sat' solves the model, 'greedy' builds a roster duty by duty
+        # without search (sub-second, but it can leave duties uncovered) and ignores the prior roster. With greedy_hints
+        # the CP-SAT search starts from the greedy roster, a prior roster takes precedence.
+        self.engine = engine
+        self.greedy_hints = greedy_hints
+
+        # Pairing duties and feasible assignments are cached on disk, keyed by the hash of their inputs
+        self.artifact_cache = ArtifactCache(refresh=refresh_artifact_cache) if use_artifact_cache else None
+
         # Data for analysis
         self.pairing_duties_df = None
         self.historical_flights_df = None
@@ -28,6 +90,8 @@ class CrewScheduler:
         self.time_off_df = None
         self.crew_requirements_df = None
         self.regulations_df = None
+        self.crew_availability_index = None
+        self.qualification_encoder = None
 
         self.captains_required_dict = []
         self.first_officers_required_dict = []
@@ -41,7 +105,8 @@ class CrewScheduler:
     def preprocess_data(self):
         # Load scheduled flights, crew, regulations and offtime
         flight_data_preprocessor = FlightDataPreprocessor()
-        flight_data_preprocessor.load_data()
+        with self.profiler.stage("Load input data"):
+            flight_data_preprocessor.load_data()
 
         # Store processed results
         self.historical_flights_df = flight_data_preprocessor.historical_flights_df
@@ -49,6 +114,8 @@ class CrewScheduler:
         self.time_off_df = flight_data_preprocessor.time_off_df
         self.crew_requirements_df = flight_data_preprocessor.crew_requirements_df
         self.regulations_df = flight_data_preprocessor.regulations_df
+        self.crew_availability_index = flight_data_preprocessor.crew_availability_index
+        self.qualification_encoder = flight_data_preprocessor.qualification_encoder
 
         self.captains_required_dict = flight_data_preprocessor.captains_required_dict
         self.first_officers_required_dict = flight_data_preprocessor.first_officers_required_dict
@@ -56,114 +123,236 @@ class CrewScheduler:
         self.regulations_dict = flight_data_preprocessor.regulations_dict
 
         # Generate pairings
-        pairing_duties_generator = PairingDutiesGenerator(flight_data_preprocessor.flights_df, self.regulations_dict['max_flight_duty_period_hours'])
-        pairing_duties_generator.generate_pairings()
+        pairing_duties_generator = PairingDutiesGenerator(flight_data_preprocessor.flights_df,
+                                                          self.regulations_dict['max_flight_duty_period_hours'],
+                                                          self.regulations_dict['max_sectors_day'],
+                                                          self.pairing_mode)
+        with self.profiler.stage("Generate pairing duties"):
+            self.generate_pairing_duties(pairing_duties_generator)
         pairing_duties_generator.print_assignments_to_csv()
 
         self.pairing_duties_df = pairing_duties_generator.pairing_duties_df
 
+    def generate_pairing_duties(self, pairing_duties_generator):
+        """
+        Generate pairing duties, or reuse the ones cached for the same flights and generator parameters
+        """
+        if self.artifact_cache is None:
+            pairing_duties_generator.generate_pairings()
+            return
+
+        generator_parameters = {
+            'max_flight_duty_period_hours': pairing_duties_generator.max_flight_duty_period_hours,
+            'max_sectors_day': pairing_duties_generator.max_sectors_day,
+            'duty_buffer_hours': pairing_duties_generator.duty_buffer_hours,
+            'home_base_icao': pairing_duties_generator.home_base_icao,
+            'min_turnaround_hours': pairing_duties_generator.min_turnaround_hours,
+            'max_turnaround_hours': pairing_duties_generator.max_turnaround_hours,
+            'pairing_mode': pairing_duties_generator.pairing_mode
+        }
+
+        key = self.artifact_cache.make_key('pairing_duties',
+                                           pairing_duties_generator.flights_for_aircraft_df,
+                                           generator_parameters)
+
+        pairing_duties_df = self.artifact_cache.get(key)
+
+        if pairing_duties_df is not None:
+            print("Loaded pairing duties from cache")
+            pairing_duties_generator.pairing_duties_df = pairing_duties_df
+            return
+
+        pairing_duties_generator.generate_pairings()
+        self.artifact_cache.put(key, pairing_duties_generator.pairing_duties_df)
+
+    def filter_feasible_assignments(self, feasible_assignments_filter):
+        """
+        Filter qualified crew and feasible assignments, or reuse the ones cached for the same duties,
+        crew state, time-off and hour limits
+        """
+        if self.artifact_cache is None:
+            feasible_assignments_filter.filter_qualified_crew_members()
+            feasible_assignments_filter.filter_feasible_assignments()
+            return
+
+        key = self.artifact_cache.make_key('feasible_assignments',
+                                           feasible_assignments_filter.aircraft_type,
+                                           feasible_assignments_filter.duties_for_aircraft_df,
+                                           feasible_assignments_filter.crew_df,
+                                           feasible_assignments_filter.time_off_df,
+                                           feasible_assignments_filter.regulation_limits())
+
+        results = self.artifact_cache.get(key, required_keys=feasible_assignments_filter.result_attributes)
+
+        if results is not None:
+            print("Loaded feasible assignments from cache")
+            feasible_assignments_filter.set_results(results)
+            return
+
+        feasible_assignments_filter.filter_qualified_crew_members()
+        feasible_assignments_filter.filter_feasible_assignments()
+        self.artifact_cache.put(key, feasible_assignments_filter.get_results())
+
     def apply_flight_coverage_constraint(self, solver, constraints_data):
-        t = time.time()
-        flight_coverage_constraint = FlightCoverageConstraint(constraints_data, solver)
-        flight_coverage_constraint.generate_constraint_variables()
-        print(f"Apply flight coverage constraints: {time.time() - t:.2f}s")
+        with self.profiler.stage("Apply flight coverage constraints", solver.model):
+            flight_coverage_constraint = FlightCoverageConstraint(constraints_data, solver)
+            flight_coverage_constraint.generate_constraint_variables()
 
     def apply_max_sectors_constraint(self, solver, constraints_data):
-        t = time.time()
-        max_sectors_constraint = MaxSectorsConstraint(constraints_data, solver,
-                                                      max_sectors_day=self.regulations_dict['max_sectors_day'])
-        max_sectors_constraint.generate_constraint_variables()
-        print(f"Apply max sectors constraints: {time.time() - t:.2f}s")
+        with self.profiler.stage("Apply max sectors constraints", solver.model):
+            max_sectors_constraint = MaxSectorsConstraint(constraints_data, solver,
+                                                          max_sectors_day=self.regulations_dict['max_sectors_day'])
+            max_sectors_constraint.generate_constraint_variables()
 
     def apply_max_flight_time_hours_period_constraints(self, solver, constraints_data):
-        t = time.time()
-        max_flight_time_hours_year_constraint = FlightTimeHoursPeriodConstraint(constraints_data, solver,
-                                                                                max_hours_per_period=self.regulations_dict[
-                                                                            'max_flight_time_hours_year'],
-                                                                                period_type='year')
-        max_flight_time_hours_year_constraint.generate_constraint_variables()
-        print(f"Apply max flight hours year constraints: {time.time() - t:.2f}s")
-
-        t = time.time()
-        max_flight_time_hours_12_months_constraint = FlightTimeHoursPeriodConstraint(constraints_data, solver,
-                                                                                     max_hours_per_period=self.regulations_dict[
-                                                                           'max_flight_time_hours_12_months'],
-                                                                                     period_type='months')
-        max_flight_time_hours_12_months_constraint.generate_constraint_variables()
-        print(f"Apply max flight hours 12 months constraints: {time.time() - t:.2f}s")
+        self.apply_max_flight_time_hours_year_constraint(solver, constraints_data)
+        self.apply_max_flight_time_hours_12_months_constraint(solver, constraints_data)
+
+    def apply_max_flight_time_hours_year_constraint(self, solver, constraints_data):
+        max_flight_duty_period_hours = self.regulations_dict['max_flight_duty_period_hours']
+
+        with self.profiler.stage("Apply max flight hours year constraints", solver.model):
+            max_flight_time_hours_year_constraint = FlightTimeHoursPeriodConstraint(
+                constraints_data,
+                solver,
+                max_hours_per_period=self.regulations_dict['max_flight_time_hours_year'],
+                period_type='year',
+                linear_builder=self.linear_builder,
+                max_flight_duty_period_hours=max_flight_duty_period_hours
+            )
+            max_flight_time_hours_year_constraint.generate_constraint_variables()
+
+    def apply_max_flight_time_hours_12_months_constraint(self, solver, constraints_data):
+        max_flight_duty_period_hours = self.regulations_dict['max_flight_duty_period_hours']
+
+        with self.profiler.stage("Apply max flight hours 12 months constraints", solver.model):
+            max_flight_time_hours_12_months_constraint = FlightTimeHoursPeriodConstraint(
+                constraints_data,
+                solver,
+                max_hours_per_period=self.regulations_dict['max_flight_time_hours_12_months'],
+                period_type='months',
+                linear_builder=self.linear_builder,
+                max_flight_duty_period_hours=max_flight_duty_period_hours
+            )
+            max_flight_time_hours_12_months_constraint.generate_constraint_variables()
 
     def apply_max_duty_and_flight_time_hours_constraints(self, solver, constraints_data):
-        t = time.time()
-        max_duty_time_hours_7_days_constraint = MaxHoursRollingPeriodConstraint(constraints_data, solver,
-                                                                           max_duty_or_flight_time_hours_per_window=
-                                                                                     self.regulations_dict[
-                                                                                         'max_duty_time_hours_7_days'],
-                                                                           rolling_days_window_size=7,
-                                                                           duty_or_flight_mode='duty')
-        max_duty_time_hours_7_days_constraint.generate_constraint_variables()
-        print(f"Apply max duty hours 7 days constraints: {time.time() - t:.2f}s")
-
-        t = time.time()
-        max_duty_time_hours_28_days_constraint = MaxHoursRollingPeriodConstraint(constraints_data, solver,
-                                                                            max_duty_or_flight_time_hours_per_window=
-                                                                                     self.regulations_dict[
-                                                                                         'max_duty_time_hours_28_days'],
-                                                                            rolling_days_window_size=28,
-                                                                            duty_or_flight_mode='duty')
-        max_duty_time_hours_28_days_constraint.generate_constraint_variables()
-        print(f"Apply max duty hours 28 days constraints: {time.time() - t:.2f}s")
-
-        t = time.time()
-        max_flight_time_hours_28_days_constraint = MaxHoursRollingPeriodConstraint(constraints_data, solver,
-                                                                              max_duty_or_flight_time_hours_per_window=
-                                                                                      self.regulations_dict[
-                                                                                          'max_flight_time_hours_28_days'],
-                                                                              rolling_days_window_size=28,
-                                                                              duty_or_flight_mode='flight')
-        max_flight_time_hours_28_days_constraint.generate_constraint_variables()
-        print(f"Apply max flight hours 28 days constraints: {time.time() - t:.2f}s")
+        self.apply_max_duty_time_hours_7_days_constraint(solver, constraints_data)
+        self.apply_max_duty_time_hours_28_days_constraint(solver, constraints_data)
+        self.apply_max_flight_time_hours_28_days_constraint(solver, constraints_data)
+
+    def apply_max_duty_time_hours_7_days_constraint(self, solver, constraints_data):
+        max_flight_duty_period_hours = self.regulations_dict['max_flight_duty_period_hours']
+
+        with self.profiler.stage("Apply max duty hours 7 days constraints", solver.model):
+            max_duty_time_hours_7_days_constraint = MaxHoursRollingPeriodConstraint(
+                constraints_data,
+                solver,
+                max_duty_or_flight_time_hours_per_window=self.regulations_dict['max_duty_time_hours_7_days'],
+                rolling_days_window_size=7,
+                duty_or_flight_mode='duty',
+                linear_builder=self.linear_builder,
+                max_flight_duty_period_hours=max_flight_duty_period_hours
+            )
+            max_duty_time_hours_7_days_constraint.generate_constraint_variables()
+
+    def apply_max_duty_time_hours_28_days_constraint(self, solver, constraints_data):
+        max_flight_duty_period_hours = self.regulations_dict['max_flight_duty_period_hours']
+
+        with self.profiler.stage("Apply max duty hours 28 days constraints", solver.model):
+            max_duty_time_hours_28_days_constraint = MaxHoursRollingPeriodConstraint(
+                constraints_data,
+                solver,
+                max_duty_or_flight_time_hours_per_window=self.regulations_dict['max_duty_time_hours_28_days'],
+                rolling_days_window_size=28,
+                duty_or_flight_mode='duty',
+                linear_builder=self.linear_builder,
+                max_flight_duty_period_hours=max_flight_duty_period_hours
+            )
+            max_duty_time_hours_28_days_constraint.generate_constraint_variables()
+
+    def apply_max_flight_time_hours_28_days_constraint(self, solver, constraints_data):
+        max_flight_duty_period_hours = self.regulations_dict['max_flight_duty_period_hours']
+
+        with self.profiler.stage("Apply max flight hours 28 days constraints", solver.model):
+            max_flight_time_hours_28_days_constraint = MaxHoursRollingPeriodConstraint(
+                constraints_data,
+                solver,
+                max_duty_or_flight_time_hours_per_window=self.regulations_dict['max_flight_time_hours_28_days'],
+                rolling_days_window_size=28,
+                duty_or_flight_mode='flight',
+                linear_builder=self.linear_builder,
+                max_flight_duty_period_hours=max_flight_duty_period_hours
+            )
+            max_flight_time_hours_28_days_constraint.generate_constraint_variables()
 
     def apply_flight_duty_period_hours_constraint(self, solver, constraints_data):
-        t = time.time()
-        flight_duty_period_hours_constraint = MaxFlightDutyPeriodHoursConstraint(constraints_data, solver,
-                                                                                 max_flight_duty_period_hours=
-                                                                                 self.regulations_dict[
-                                                                                     'max_flight_duty_period_hours'])
-        flight_duty_period_hours_constraint.generate_constraint_variables()
-        print(f"Apply max flight duty period hours constraints: {time.time() - t:.2f}s")
+        with self.profiler.stage("Apply max flight duty period hours constraints", solver.model):
+            flight_duty_period_hours_constraint = MaxFlightDutyPeriodHoursConstraint(constraints_data, solver,
+                                                                                     max_flight_duty_period_hours=
+                                                                                     self.regulations_dict[
+                                                                                         'max_flight_duty_period_hours'],
+                                                                                     linear_builder=self.linear_builder)
+            flight_duty_period_hours_constraint.generate_constraint_variables()
 
     def apply_min_weekly_rest_days_constraint(self, solver, constraints_data):
-        t = time.time()
-        min_weekly_rest_days_constraint = MinWeeklyRestDaysConstraint(constraints_data, solver,
-                                                                      min_weekly_rest_days=
-                                                                      self.regulations_dict[
-                                                                          'min_weekly_rest_days'])
-        min_weekly_rest_days_constraint.generate_constraint_variables()
-        print(f"Apply min weekly rest days constraints: {time.time() - t:.2f}s")
+        with self.profiler.stage("Apply min weekly rest days constraints", solver.model):
+            min_weekly_rest_days_constraint = MinWeeklyRestDaysConstraint(constraints_data, solver,
+                                                                          min_weekly_rest_days=
+                                                                          self.regulations_dict[
+                                                                              'min_weekly_rest_days'])
+            min_weekly_rest_days_constraint.generate_constraint_variables()
 
     def no_duties_overlap_constraint(self, solver, constraints_data):
-        t = time.time()
-        no_duties_overlap_constraint = NoDutiesOverlapConstraint(constraints_data, solver)
-        no_duties_overlap_constraint.generate_constraint_variables()
-        print(f"Apply min weekly rest days constraints: {time.time() - t:.2f}s")
+        with self.profiler.stage("Apply no duties overlap constraints", solver.model):
+            no_duties_overlap_constraint = NoDutiesOverlapConstraint(constraints_data, solver, self.overlap_mode)
+            no_duties_overlap_constraint.generate_constraint_variables()
+
+    def apply_worked_on_day_constraint(self, solver, constraints_data):
+        with self.profiler.stage("Apply worked on date constraints", solver.model):
+            worked_on_day_constraint = WorkedOnDayConstraint(constraints_data, solver)
+            worked_on_day_constraint.generate_constraint_variables()
+
+    def apply_crew_day_constraint(self, solver, constraints_data):
+        with self.profiler.stage("Apply crew day constraints", solver.model):
+            crew_day_constraint = CrewDayConstraint(constraints_data, solver,
+                                                    max_sectors_day=self.regulations_dict['max_sectors_day'],
+                                                    max_flight_duty_period_hours=self.regulations_dict['max_flight_duty_period_hours'],
+                                                    linear_builder=self.linear_builder)
+            crew_day_constraint.generate_constraint_variables()
+
+    def constraint_task_names(self):
+        """
+        Returns: Names of the methods adding each independent constraint family, in the order they are added
+        """
+        if self.constraint_builder == 'fused':
+            crew_day_task_names = ['apply_crew_day_constraint']
+        else:
+            crew_day_task_names = ['no_duties_overlap_constraint',
+                                   'apply_max_sectors_constraint',
+                                   'apply_flight_duty_period_hours_constraint',
+                                   'apply_worked_on_day_constraint']
+
+        return crew_day_task_names + ['apply_flight_coverage_constraint',
+                                      'apply_max_duty_time_hours_7_days_constraint',
+                                      'apply_max_duty_time_hours_28_days_constraint',
+                                      'apply_max_flight_time_hours_28_days_constraint',
+                                      'apply_max_flight_time_hours_year_constraint',
+                                      'apply_max_flight_time_hours_12_months_constraint',
+                                      'apply_min_weekly_rest_days_constraint']
+
+    def add_constraints(self, solver, constraints_data):
+        # The families only share the read-only model index, so they can be built concurrently
+        with self.profiler.stage("Add constraints", solver.model):
+            parallel_constraint_builder = ParallelConstraintBuilder(self.constraint_workers)
+            parallel_constraint_builder.build(self, solver, constraints_data, self.constraint_task_names())
 
     def package_solver_data_for_constraints(self, solver):
         data = {
             'duties_for_aircraft_df': solver.duties_for_aircraft_df,
             'historical_flights_df': solver.historical_flights_df,
-            'duty_dates_lookup': solver.duty_dates_lookup,
-            'unique_duty_dates': solver.unique_duty_dates,
-            'duty_time_hours_lookup': solver.duty_time_hours_lookup,
-            'flight_time_hours_lookup': solver.flight_time_hours_lookup,
-            'x_captains_to_duties': solver.x_captains_to_duties,
-            'x_first_officers_to_duties': solver.x_first_officers_to_duties,
-            'x_cabin_crew_to_duties': solver.x_cabin_crew_to_duties,
-            'x_captains_worked_on_dates': solver.x_captains_worked_on_dates,
-            'x_first_officers_worked_on_dates': solver.x_first_officers_worked_on_dates,
-            'x_cabin_crew_worked_on_dates': solver.x_cabin_crew_worked_on_dates,
-            'qualified_captains_df': solver.qualified_captains_df,
-            'qualified_first_officers_df': solver.qualified_first_officers_df,
-            'qualified_cabin_crew_df': solver.qualified_cabin_crew_df
+            'model_index': solver.model_index,
+            'historical_load_index': solver.historical_load_index
         }
 
         return data
@@ -173,73 +362,258 @@ class CrewScheduler:
         aircraft_type = None
         duties_for_aircraft_df = self.pairing_duties_df.copy()
 
-        # Process the data
-        self.process_aircraft(aircraft_type, duties_for_aircraft_df)
+        # Process the data, in consecutive windows for a rolling horizon
+        if self.horizon_days is not None:
+            self.solve_rolling_horizon(aircraft_type, duties_for_aircraft_df)
+        else:
+            self.process_aircraft(aircraft_type, duties_for_aircraft_df)
 
         # Store results
         self.final_assignments = pd.concat(self.assignments, ignore_index=True)
         self.print_assignments_to_csv()
 
     def process_aircraft(self, aircraft_type, duties_for_aircraft_df):
+        status, assignments = self.solve_duties(aircraft_type, duties_for_aircraft_df)
+
+        if status in ['Optimal', 'Feasible']:
+            self.commit_assignments(assignments)
+        else:
+            print(f"WARNING: Could not find solution for {aircraft_type}")
+
+    def solve_rolling_horizon(self, aircraft_type, duties_for_aircraft_df):
+        """
+        Solve the duties window by window, each window committing its first horizon_days days of departures
+
+        Committed assignments become history for the following windows and their crew can't be given an overlapping
+        duty, so every model only holds the duties of one window.
+        """
+        rolling_horizon = RollingHorizon(self.horizon_days, self.horizon_overlap_days)
+        busy_duties_df = None
+
+        for window in rolling_horizon.windows(duties_for_aircraft_df):
+            with self.profiler.stage(f"Solve horizon window {window}"):
+                status, assignments = self.solve_duties(aircraft_type, rolling_horizon.window_duties(duties_for_aircraft_df, window),
+                                                        busy_duties_df)
+
+            # The following windows build on this one, without solution the rest of the period can't be rostered
+            if status not in ['Optimal', 'Feasible']:
+                print(f"WARNING: Could not find solution for {aircraft_type} in the horizon window {window}")
+                return
+
+            committed_assignments = rolling_horizon.committed_assignments(assignments, window)
+            self.commit_assignments(committed_assignments)
+
+            self.historical_flights_df = pd.concat([self.historical_flights_df, rolling_horizon.as_history(committed_assignments)],
+                                                   ignore_index=True)
+            busy_duties_df = rolling_horizon.as_busy_duties(committed_assignments)
+
+    def solve_duties(self, aircraft_type, duties_for_aircraft_df, busy_duties_df=None):
+        """
+        Filter the feasible assignments of the duties and solve them
+
+        Args:
+            aircraft_type: Aircraft type to roster, None for all
+            duties_for_aircraft_df: Duties to roster
+            busy_duties_df: Duties the crew already works that the new duties must not overlap, see
+                            FeasibleAssignmentsFilter.exclude_busy_crew
+
+        Returns: (status, assignments DataFrame) as returned by AircraftSatSolver.solve
+        """
         # Filter qualified staff to create feasible assignments of crew members to duties
-        t = time.time()
-        feasible_assignments_filter = FeasibleAssignmentsFilter(aircraft_type,
-                                                                duties_for_aircraft_df,
-                                                                self.crew_df,
-                                                                self.time_off_df,
-                                                                self.regulations_dict)
-        feasible_assignments_filter.filter_qualified_crew_members()
-        feasible_assignments_filter.filter_feasible_assignments()
-        print(f"Identify feasible crew to aircraft assignments: {time.time() - t:.2f}s")
+        with self.profiler.stage("Identify feasible crew to aircraft assignments"):
+            feasible_assignments_filter = FeasibleAssignmentsFilter(aircraft_type,
+                                                                    duties_for_aircraft_df,
+                                                                    self.crew_df,
+                                                                    self.time_off_df,
+                                                                    self.regulations_dict,
+                                                                    self.crew_availability_index,
+                                                                    self.qualification_encoder)
+            self.filter_feasible_assignments(feasible_assignments_filter)
+
+            number_of_dropped_pairs = feasible_assignments_filter.exclude_busy_crew(busy_duties_df)
+            if number_of_dropped_pairs:
+                print(f"Dropped {number_of_dropped_pairs} assignments overlapping committed duties")
+
+        if self.decompose:
+            with self.profiler.stage("Find independent components"):
+                components = find_eligibility_components(feasible_assignments_filter)
+            print(f"Solving {len(components)} independent components: {', '.join(map(str, components))}")
+
+            with self.profiler.stage("Solve independent components"):
+                component_solver = ComponentSolver(self.component_workers)
+                status, assignments = component_solver.solve(self, aircraft_type, feasible_assignments_filter, components,
+                                                             self.solver_config)
+
+            return status, assignments
+
+        return self.build_and_solve(aircraft_type, feasible_assignments_filter, self.solver_config)
+
+    def commit_assignments(self, assignments):
+        """
+        Keep solved assignments for the output and add their hours to the crew
+        """
+        self.assignments.append(assignments)
+
+        # Update crew hours for next iteration
+        for index, assignment in assignments.iterrows():
+            crew_idx = self.crew_df[self.crew_df['crew_id'] == assignment['crew_id']].index[0]
+
+            self.crew_df.loc[crew_idx, 'current_month_flight_time_hours'] += assignment['duty_flight_time_hours']
+            self.crew_df.loc[crew_idx, 'last_11_calendar_months_flight_time_hours'] += assignment['duty_flight_time_hours']
+            self.crew_df.loc[crew_idx, 'current_calendar_year_flight_time_hours'] += assignment['duty_flight_time_hours']
+
+            self.crew_df.loc[crew_idx, 'current_month_duty_time_hours'] += assignment['duty_time_hours']
+
+    def solve_component(self, aircraft_type, feasible_assignments_filter, component, solver_config):
+        """
+        Build and solve the model of one EligibilityComponent
+
+        Returns: (status, assignments DataFrame) of the component
+        """
+        with self.profiler.stage(f"Solve {component}"):
+            return self.build_and_solve(aircraft_type, feasible_assignments_filter.restricted_to(component), solver_config)
+
+    def build_and_solve(self, aircraft_type, feasible_assignments_filter, solver_config):
+        """
+        Build the model of the filtered assignments and solve it
+
+        Returns: (status, assignments DataFrame) as returned by AircraftSatSolver.solve
+        """
+        if self.engine == 'greedy':
+            return self.greedy_solve(aircraft_type, feasible_assignments_filter)
+
+        solver = self.build_model(aircraft_type, feasible_assignments_filter)
 
-        ## Create scheduler and solve
+        # Solve
+        with self.profiler.stage("Total solver time spent"):
+            return solver.solve(solver_config)
+
+    def greedy_solve(self, aircraft_type, feasible_assignments_filter):
+        """
+        Roster the filtered assignments with the GreedyRosterer instead of solving a model
+
+        Returns: (status, assignments DataFrame) as returned by GreedyRosterer.solve
+        """
         solver = AircraftSatSolver(aircraft_type, self.historical_flights_df)
-        solver.initialize_data(feasible_assignments_filter)
+        with self.profiler.stage("Build model index"):
+            solver.initialize_data(feasible_assignments_filter)
 
-        # Add variables
-        solver.create_variables()
+        with self.profiler.stage("Greedy roster"):
+            return GreedyRosterer(solver, self.regulations_dict).solve()
 
-        # Add objective
-        solver.add_objective_balance_workload()
+    def build_model(self, aircraft_type, feasible_assignments_filter):
+        """
+        Build the model of the filtered assignments: variables, prior or greedy roster hints, objective and constraints
 
-        # Add all constraints
-        constraints_data = self.package_solver_data_for_constraints(solver)
+        Returns: The AircraftSatSolver holding the model
+        """
+        ## Create scheduler and solve
+        solver = AircraftSatSolver(aircraft_type, self.historical_flights_df)
+        with self.profiler.stage("Build model index"):
+            solver.initialize_data(feasible_assignments_filter)
 
-        self.no_duties_overlap_constraint(solver, constraints_data)
-        self.apply_flight_coverage_constraint(solver, constraints_data)
-        self.apply_max_sectors_constraint(solver, constraints_data)
-        self.apply_max_duty_and_flight_time_hours_constraints(solver, constraints_data)
-        self.apply_max_flight_time_hours_period_constraints(solver, constraints_data)
-        self.apply_flight_duty_period_hours_constraint(solver, constraints_data)
-        self.apply_min_weekly_rest_days_constraint(solver, constraints_data)
+        # Add variables
+        with self.profiler.stage("Create variables", solver.model):
+            solver.create_variables()
 
-        # Solve
-        t = time.time()
-        status, assignments = solver.solve()
-        print(f"Total solver time spent: {time.time() - t:.2f}s")
+        # Warm start from the prior roster
+        if self.prior_roster is not None:
+            with self.profiler.stage("Add prior roster hints", solver.model):
+                solver.add_prior_roster_hints(self.prior_roster)
 
-        if status in ['Optimal', 'Feasible']:
-            self.assignments.append(assignments)
+        # Warm start from a greedy roster, even an incomplete one leaves the search less to repair
+        elif self.greedy_hints:
+            with self.profiler.stage("Add greedy roster hints", solver.model):
+                greedy_rosterer = GreedyRosterer(solver, self.regulations_dict)
+                number_of_hinted_assignments = solver.add_assignment_hints(greedy_rosterer.roster())
 
-            # Update crew hours for next iteration
-            for index, assignment in assignments.iterrows():
-                crew_idx = self.crew_df[self.crew_df['crew_id'] == assignment['crew_id']].index[0]
+            print(f"Hinted {number_of_hinted_assignments} assignments of a greedy roster leaving "
+                  f"{greedy_rosterer.number_of_uncovered_duties()} duty roles uncovered")
 
-                self.crew_df.loc[crew_idx, 'current_month_flight_time_hours'] += assignment['duty_flight_time_hours']
-                self.crew_df.loc[crew_idx, 'last_11_calendar_months_flight_time_hours'] += assignment['duty_flight_time_hours']
-                self.crew_df.loc[crew_idx, 'current_calendar_year_flight_time_hours'] += assignment['duty_flight_time_hours']
+        # Add objective
+        with self.profiler.stage("Add objective", solver.model):
+            solver.add_objective_balance_workload(self.deviation_weight)
 
-                self.crew_df.loc[crew_idx, 'current_month_duty_time_hours'] += assignment['duty_time_hours']
-        else:
-            print(f"WARNING: Could not find solution for {aircraft_type}")
+        # Add all constraints
+        constraints_data = self.package_solver_data_for_constraints(solver)
+        self.add_constraints(solver, constraints_data)
+
+        return solver
 
     def print_assignments_to_csv(self):
         self.final_assignments.to_csv('../assets/output/crew_schedule_output.csv', index=False)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crew rostering with EASA constraints")
+    parser.add_argument('--pairing-mode', choices=['return_flights', 'connection_graph'], default='return_flights')
+    parser.add_argument('--no-cache', action='store_true', help="Don't read or write cached pairing and feasibility artifacts")
+    parser.add_argument('--refresh-cache', action='store_true', help="Rebuild cached pairing and feasibility artifacts")
+    parser.add_argument('--overlap-mode', choices=['cliques', 'intervals'], default='cliques',
+                        help="Exclude overlapping duties with AtMostOne per conflict clique or with optional intervals (separate builder)")
+    parser.add_argument('--constraint-builder', choices=['fused', 'separate'], default='fused',
+                        help="Build the per crew-day constraints in a single pass or with one constraint class each")
+    parser.add_argument('--constraint-workers', type=int, default=1,
+                        help="Worker processes building the constraint families concurrently")
+    parser.add_argument('--linear-builder', choices=['proto', 'expression'], default='proto',
+                        help="Write the hour, sector and flight duty period sums as linear constraint protos or build them as expressions")
+    parser.add_argument('--profile', action='store_true',
+                        help="Record wall time, CPU time, peak memory and model growth per stage and constraint family")
+    parser.add_argument('--profile-output', default='../assets/output/build_profile.json',
+                        help="JSON file the --profile report is written to")
+    parser.add_argument('--decompose', action='store_true',
+                        help="Solve the independent components of the crew-duty eligibility graph as separate models")
+    parser.add_argument('--component-workers', type=int,
+                        help="Worker processes solving the components concurrently, defaults to all available cores")
+    parser.add_argument('--horizon-days', type=int,
+                        help="Solve rolling horizon windows committing this many days each, instead of the whole period at once")
+    parser.add_argument('--horizon-overlap-days', type=int, default=0,
+                        help="Days each rolling horizon window looks ahead of its committed days")
+    parser.add_argument('--prior-roster',
+                        help="Previously published roster (crew_schedule_output.csv) to warm start the solver from")
+    parser.add_argument('--deviation-weight', type=int, default=0,
+                        help="Objective cost of every prior roster assignment that is given up, 0 only hints the prior roster")
+    parser.add_argument('--engine', choices=['cp-sat', 'greedy'], default='cp-sat',
+                        help="Solve the CP-SAT model or build a greedy roster duty by duty without search")
+    parser.add_argument('--greedy-hints', action='store_true',
+                        help="Start the CP-SAT search from a greedy roster (not with --prior-roster)")
+    SolverConfig.add_arguments(parser)
+    args = parser.parse_args()
+
+    # Options that would otherwise be ignored silently
+    if args.prior_roster and args.greedy_hints:
+        parser.error("--greedy-hints can't be combined with --prior-roster, which hints the solver already")
+    if args.engine == 'greedy':
+        for option, value in [('--prior-roster', args.prior_roster), ('--deviation-weight', args.deviation_weight),
+                              ('--greedy-hints', args.greedy_hints)]:
+            if value:
+                parser.error(f"{option} only applies to the CP-SAT engine, not to --engine greedy")
+
     t = time.time()
-    scheduler = CrewScheduler()
-    scheduler.preprocess_data()
-    scheduler.solve_full()
-    print(f"Total time spent: {time.time() - t:.2f}s")
+    scheduler = CrewScheduler(pairing_mode=args.pairing_mode,
+                              use_artifact_cache=not args.no_cache,
+                              refresh_artifact_cache=args.refresh_cache,
+                              overlap_mode=args.overlap_mode,
+                              constraint_builder=args.constraint_builder,
+                              constraint_workers=args.constraint_workers,
+                              linear_builder=args.linear_builder,
+                              profile=args.profile,
+                              solver_config=SolverConfig.from_args(args),
+                              decompose=args.decompose,
+                              component_workers=args.component_workers,
+                              horizon_days=args.horizon_days,
+                              horizon_overlap_days=args.horizon_overlap_days,
+                              prior_roster=PriorRoster.from_csv(args.prior_roster) if args.prior_roster else None,
+                              deviation_weight=args.deviation_weight,
+                              engine=args.engine,
+                              greedy_hints=args.greedy_hints)
+
+    # The profile of a failed run shows the stages up to the failure
+    try:
+        scheduler.preprocess_data()
+        scheduler.solve_full()
+        print(f"Total time spent: {time.time() - t:.2f}s")
+    finally:
+        if args.profile:
+            scheduler.profiler.print_table()
+            scheduler.profiler.write_json(args.profile_output)
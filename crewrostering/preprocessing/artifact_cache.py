@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import pickle
+
+import pandas as pd
+
+# Bump when PairingDutiesGenerator, FeasibleAssignmentsFilter or the layout of their artifacts change, so artifacts
+# built by the previous code are rebuilt
+ARTIFACT_VERSION = 1
+
+
+class ArtifactCache:
+    def __init__(self, cache_directory='../assets/cache/artifacts', max_size_mb=512, refresh=False):
+        """
+        Content-addressed on-disk cache for intermediate artifacts (pairing duties, feasible assignments)
+
+        Every artifact is stored as one pickle file named after the hash of everything it was built from.
+        The file modification time records the last access, so the least recently used artifacts are
+        evicted first once the directory grows beyond max_size_mb.
+
+        Args:
+            cache_directory: Directory holding the cached artifacts
+            max_size_mb: Size cap of the cache directory in megabytes
+            refresh: Ignore existing artifacts and rebuild (and overwrite) them
+        """
+        self.cache_directory = cache_directory
+        self.max_size_bytes = int(max_size_mb * 1024 ** 2)
+        self.refresh = refresh
+
+    def make_key(self, artifact_name, *inputs):
+        """
+        Hash the artifact version, the artifact name and all inputs it is built from
+
+        Args:
+            artifact_name: Kind of artifact, e.g. 'pairing_duties'
+            inputs: DataFrames, dictionaries of parameters or other values with a stable repr
+
+        Returns: Hex digest used as cache key
+        """
+        key_hash = hashlib.sha256(f"artifact-{ARTIFACT_VERSION}-{artifact_name}".encode())
+
+        for value in inputs:
+            key_hash.update(self.hash_value(value))
+
+        return key_hash.hexdigest()
+
+    def hash_value(self, value):
+        if isinstance(value, pd.DataFrame):
+            # Columns and dtypes are part of the content, the row hashes cover values and index
+            value_hash = hashlib.sha256(repr(list(zip(value.columns, value.dtypes.astype(str)))).encode())
+            value_hash.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+            return value_hash.digest()
+
+        if isinstance(value, dict):
+            return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).digest()
+
+        return hashlib.sha256(repr(value).encode()).digest()
+
+    def artifact_path(self, key):
+        return os.path.join(self.cache_directory, f"{key}.pkl")
+
+    def get(self, key, required_keys=()):
+        """
+        Args:
+            key: Cache key from make_key
+            required_keys: Keys a cached dictionary must hold, an artifact missing any of them is treated as a miss
+
+        Returns: The cached artifact, or None when it is missing, unreadable or incomplete or a refresh was requested
+        """
+        path = self.artifact_path(key)
+
+        if self.refresh or not os.path.exists(path):
+            return None
+
+        # A truncated file or one pickled by other code is rebuilt (and overwritten) like a missing one
+        try:
+            with open(path, 'rb') as artifact_file:
+                artifact = pickle.load(artifact_file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError):
+            return None
+
+        if required_keys and not (isinstance(artifact, dict) and all(required_key in artifact for required_key in required_keys)):
+            return None
+
+        # Mark as most recently used
+        os.utime(path)
+
+        return artifact
+
+    def put(self, key, artifact):
+        os.makedirs(self.cache_directory, exist_ok=True)
+
+        # Write to a temporary file first so a reader never sees a partially written artifact
+        path = self.artifact_path(key)
+        temporary_path = f"{path}.tmp"
+
+        with open(temporary_path, 'wb') as artifact_file:
+            pickle.dump(artifact, artifact_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(temporary_path, path)
+
+        self.evict(keep_path=path)
+
+    def evict(self, keep_path=None):
+        """
+        Remove least recently used artifacts until the cache fits within its size cap
+        """
+        artifacts = []
+
+        for file_name in os.listdir(self.cache_directory):
+            if not file_name.endswith('.pkl'):
+                continue
+
+            path = os.path.join(self.cache_directory, file_name)
+            stat = os.stat(path)
+            artifacts.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in artifacts)
+
+        for _, size, path in sorted(artifacts):
+            if total_size <= self.max_size_bytes:
+                break
+
+            # Never evict the artifact that was just written
+            if path == keep_path:
+                continue
+
+            os.remove(path)
+            total_size -= size
+
+    def clear(self):
+        if not os.path.isdir(self.cache_directory):
+            return
+
+        for file_name in os.listdir(self.cache_directory):
+            if file_name.endswith('.pkl'):
+                os.remove(os.path.join(self.cache_directory, file_name))
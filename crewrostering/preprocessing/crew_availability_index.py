@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+
+class CrewAvailabilityIndex:
+    def __init__(self, time_off_df):
+        """
+        Index of time-off requests as sorted, non-overlapping intervals per crew member
+
+        Args:
+            time_off_df: DataFrame with 'crew_id', 'start_date' and 'end_date' (datetime) columns
+        """
+
+        # Dictionary of crew_id -> (interval starts, interval ends) in nanoseconds since epoch
+        self.time_off_intervals = {}
+
+        for crew_id, crew_time_offs in time_off_df.groupby('crew_id', sort=False):
+            start_dates = crew_time_offs['start_date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+            end_dates = crew_time_offs['end_date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+            self.time_off_intervals[crew_id] = self.merge_intervals(start_dates, end_dates)
+
+    def merge_intervals(self, start_dates, end_dates):
+        """
+        Sort the intervals and merge the ones that overlap, so both arrays end up increasing
+
+        Returns: Tuple of (merged starts, merged ends)
+        """
+        order = np.argsort(start_dates, kind='stable')
+
+        merged_starts = []
+        merged_ends = []
+
+        for start_date, end_date in zip(start_dates[order], end_dates[order]):
+            if merged_ends and start_date <= merged_ends[-1]:
+                merged_ends[-1] = max(merged_ends[-1], end_date)
+            else:
+                merged_starts.append(start_date)
+                merged_ends.append(end_date)
+
+        return np.array(merged_starts, dtype=np.int64), np.array(merged_ends, dtype=np.int64)
+
+    def has_time_off_conflict(self, crew_id, timestamp):
+        """
+        Check if a time-off request of this crew member covers the given moment
+        """
+        return bool(self.conflict_matrix([crew_id], [timestamp])[0, 0])
+
+    def is_available(self, crew_id, date):
+        """
+        Check if a crew member has no time-off request touching the given calendar date
+        """
+        return bool(self.availability_matrix([crew_id], [date])[0, 0])
+
+    def conflict_matrix(self, crew_ids, timestamps):
+        """
+        Boolean (crew x timestamp) matrix, True where a time-off interval [start_date, end_date]
+        contains the timestamp
+
+        Args:
+            crew_ids: Sequence of crew ids (matrix rows)
+            timestamps: Sequence or Series of datetimes (matrix columns)
+        """
+        timestamps_ns = pd.to_datetime(pd.Series(timestamps)).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+        return self.overlap_matrix(crew_ids, timestamps_ns, timestamps_ns)
+
+    def availability_matrix(self, crew_ids, dates):
+        """
+        Boolean (crew x date) matrix, True where the crew member is available the whole calendar day
+
+        Args:
+            crew_ids: Sequence of crew ids (matrix rows)
+            dates: Sequence of dates (matrix columns)
+        """
+        day_starts_ns = pd.to_datetime(pd.Series(dates)).dt.normalize().to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        day_ends_ns = day_starts_ns + pd.Timedelta(days=1).value - 1
+
+        return ~self.overlap_matrix(crew_ids, day_starts_ns, day_ends_ns)
+
+    def overlap_matrix(self, crew_ids, period_starts_ns, period_ends_ns):
+        """
+        Boolean (crew x period) matrix, True where a time-off interval overlaps the closed period
+        [period_start, period_end]
+        """
+        overlaps = np.zeros((len(crew_ids), len(period_starts_ns)), dtype=bool)
+
+        for crew_position, crew_id in enumerate(crew_ids):
+            if crew_id not in self.time_off_intervals:
+                continue
+
+            interval_starts, interval_ends = self.time_off_intervals[crew_id]
+
+            # Last interval starting at or before the end of each period
+            interval_positions = np.searchsorted(interval_starts, period_ends_ns, side='right') - 1
+
+            # Merged intervals are disjoint and sorted, so only that interval can reach the period
+            has_interval = interval_positions >= 0
+            overlaps[crew_position] = has_interval & (interval_ends[np.maximum(interval_positions, 0)] >= period_starts_ns)
+
+        return overlaps
@@ -0,0 +1,103 @@
+import numpy as np
+
+# Feasible pairs attribute of the assignments filter per role, in the order the solver processes the roles
+FEASIBLE_PAIRS_ATTRIBUTES = {
+    'captains': 'feasible_captains',
+    'first_officers': 'feasible_first_officers',
+    'cabin_crew': 'feasible_cabin_crew'
+}
+
+
+def label_components(pair_crew, pair_duty, number_of_crew, number_of_duties):
+    """
+    Connected components of the bipartite crew-duty graph given by its edges (the feasible pairs)
+
+    Every node starts with its own label, then each round takes the smallest label of the neighbours and
+    shortcuts the labels through themselves (pointer jumping) until nothing changes.
+
+    Args:
+        pair_crew: Crew ordinal of every pair
+        pair_duty: Duty ordinal of every pair
+        number_of_crew: Number of crew ordinals
+        number_of_duties: Number of duty ordinals
+
+    Returns: Component label of every crew ordinal, the smallest crew ordinal of the component (or the crew ordinal
+             itself for crew without pairs)
+    """
+    # Crew are nodes 0..number_of_crew - 1, duties follow them
+    duty_nodes = pair_duty + number_of_crew
+    labels = np.arange(number_of_crew + number_of_duties, dtype=np.int64)
+
+    while True:
+        new_labels = labels.copy()
+        np.minimum.at(new_labels, pair_crew, labels[duty_nodes])
+        np.minimum.at(new_labels, duty_nodes, labels[pair_crew])
+        new_labels = new_labels[new_labels]
+
+        if np.array_equal(new_labels, labels):
+            return labels[:number_of_crew]
+
+        labels = new_labels
+
+
+class EligibilityComponent:
+    def __init__(self, role, crew_ids, duty_ids, feasible_pairs):
+        """
+        Crew of one role and the duties they can be assigned to, sharing no candidate assignment with other components
+
+        Every constraint acts either on the assignments of one crew member or on those of one duty and role, and the
+        objective is a plain sum, so the components can be solved as separate models.
+
+        Args:
+            role: Role key, one of FEASIBLE_PAIRS_ATTRIBUTES
+            crew_ids: Set of the crew ids of the component
+            duty_ids: Set of the duty ids of the component
+            feasible_pairs: List of feasible (crew_id, duty_id) pairs of the component, in the filter order
+        """
+        self.role = role
+        self.crew_ids = crew_ids
+        self.duty_ids = duty_ids
+        self.feasible_pairs = feasible_pairs
+
+    @property
+    def number_of_pairs(self):
+        return len(self.feasible_pairs)
+
+    def __repr__(self):
+        return f"{self.role} component ({len(self.crew_ids)} crew, {len(self.duty_ids)} duties, {self.number_of_pairs} pairs)"
+
+
+def find_eligibility_components(feasible_assignments_filter):
+    """
+    Split the feasible assignments into independent components, per role and connected crew-duty eligibility
+
+    Pilots qualified for disjoint aircraft types end up in separate components. Crew without feasible pair don't
+    get variables and are left out.
+
+    Returns: List of EligibilityComponent, by role and then by first crew member
+    """
+    components = []
+
+    for role, attribute in FEASIBLE_PAIRS_ATTRIBUTES.items():
+        feasible_pairs = getattr(feasible_assignments_filter, attribute)
+        if not feasible_pairs:
+            continue
+
+        crew_ids, pair_crew = np.unique(np.array([crew_id for crew_id, duty_id in feasible_pairs]), return_inverse=True)
+        duty_ids, pair_duty = np.unique(np.array([duty_id for crew_id, duty_id in feasible_pairs]), return_inverse=True)
+
+        crew_labels = label_components(pair_crew, pair_duty, len(crew_ids), len(duty_ids))
+        pair_labels = crew_labels[pair_crew]
+
+        # Components in the order their first pair appears, the filter lists the pairs by crew
+        _, first_pairs = np.unique(pair_labels, return_index=True)
+
+        for label in pair_labels[np.sort(first_pairs)].tolist():
+            pair_positions = np.flatnonzero(pair_labels == label)
+
+            components.append(EligibilityComponent(role,
+                                                   set(crew_ids[np.unique(pair_crew[pair_positions])].tolist()),
+                                                   set(duty_ids[np.unique(pair_duty[pair_positions])].tolist()),
+                                                   [feasible_pairs[position] for position in pair_positions.tolist()]))
+
+    return components
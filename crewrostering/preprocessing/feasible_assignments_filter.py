@@ -1,5 +1,11 @@
+import copy
+
+import numpy as np
 import pandas as pd
 
+from crewrostering.preprocessing.crew_availability_index import CrewAvailabilityIndex
+from crewrostering.preprocessing.qualification_encoder import QualificationEncoder
+
 
 class FeasibleAssignmentsFilter():
     def __init__(self,
@@ -7,7 +13,9 @@ class FeasibleAssignmentsFilter():
                  duties_for_aircraft_df,
                  crew_df,
                  time_off_df,
-                 regulations_dict):
+                 regulations_dict,
+                 crew_availability_index=None,
+                 qualification_encoder=None):
 
         # Data for analysis
         self.aircraft_type = aircraft_type
@@ -16,6 +24,22 @@ class FeasibleAssignmentsFilter():
         self.duties_for_aircraft_df = duties_for_aircraft_df
         self.regulations_dict = regulations_dict
 
+        # Time-off requests indexed per crew member, built here when not shared by the caller
+        self.crew_availability_index = crew_availability_index
+
+        # Aircraft type qualifications as bitmasks, built here when not shared by the caller
+        if qualification_encoder is None:
+            qualification_encoder = QualificationEncoder.from_qualifications(crew_df['qualifications'],
+                                                                             duties_for_aircraft_df['aircraft_type'].unique())
+
+        self.qualification_encoder = qualification_encoder
+
+        if 'qualifications_mask' not in self.crew_df.columns:
+            self.crew_df = self.crew_df.assign(qualifications_mask=qualification_encoder.encode_series(crew_df['qualifications']))
+
+        # Bit of each duty's aircraft type, aligned with duties_for_aircraft_df
+        self.duty_type_bits = qualification_encoder.type_bits_array(duties_for_aircraft_df['aircraft_type'])
+
         # Qualified staff
         self.qualified_captains_df = None
         self.qualified_first_officers_df = None
@@ -28,39 +52,151 @@ class FeasibleAssignmentsFilter():
         self.feasible_first_officers = []
         self.feasible_cabin_crew = []
 
+        # Boolean (crew x duty) eligibility matrices per role, rows follow the qualified crew frames
+        self.captains_eligibility_matrix = None
+        self.first_officers_eligibility_matrix = None
+        self.cabin_crew_eligibility_matrix = None
+
         # Regulations
         self.max_flight_time_hours_year = regulations_dict['max_flight_time_hours_year'] * 0.95
         self.max_flight_time_hours_12_months = regulations_dict['max_flight_time_hours_12_months'] * 0.95
         self.max_flight_time_hours_28_days = regulations_dict['max_flight_time_hours_28_days'] * 0.95
         self.max_duty_time_hours_28_days = regulations_dict['max_duty_time_hours_28_days'] * 0.95
 
+        # Attributes produced by filtering, stored together when the results are cached
+        self.result_attributes = [
+            'qualified_captains_df',
+            'qualified_first_officers_df',
+            'qualified_cabin_crew_df',
+            'qualified_crew_ids_df',
+            'time_off_for_aircraft_df',
+            'feasible_captains',
+            'feasible_first_officers',
+            'feasible_cabin_crew',
+            'captains_eligibility_matrix',
+            'first_officers_eligibility_matrix',
+            'cabin_crew_eligibility_matrix'
+        ]
+
+    def regulation_limits(self):
+        """
+        Hour limits (including safety margin) the feasibility checks are based on
+        """
+        return {
+            'max_flight_time_hours_year': self.max_flight_time_hours_year,
+            'max_flight_time_hours_12_months': self.max_flight_time_hours_12_months,
+            'max_flight_time_hours_28_days': self.max_flight_time_hours_28_days,
+            'max_duty_time_hours_28_days': self.max_duty_time_hours_28_days
+        }
+
+    def get_results(self):
+        """
+        Returns: Dictionary with the qualified crew and feasible assignments, e.g. to cache them
+        """
+        return {attribute: getattr(self, attribute) for attribute in self.result_attributes}
+
+    def set_results(self, results):
+        """
+        Restore qualified crew and feasible assignments computed earlier, instead of filtering again
+        """
+        for attribute in self.result_attributes:
+            setattr(self, attribute, results[attribute])
+
+    def restricted_to(self, component):
+        """
+        Copy of the filter results for one EligibilityComponent, to build and solve it as its own model
+
+        The role of the component keeps only its crew and feasible pairs, the other roles get no crew.
+
+        Returns: FeasibleAssignmentsFilter
+        """
+        restricted_filter = copy.copy(self)
+
+        for role, (qualified_attribute, feasible_attribute) in {
+            'captains': ('qualified_captains_df', 'feasible_captains'),
+            'first_officers': ('qualified_first_officers_df', 'feasible_first_officers'),
+            'cabin_crew': ('qualified_cabin_crew_df', 'feasible_cabin_crew')
+        }.items():
+            qualified_df = getattr(self, qualified_attribute)
+
+            if role == component.role:
+                setattr(restricted_filter, qualified_attribute, qualified_df[qualified_df['crew_id'].isin(component.crew_ids)].copy())
+                setattr(restricted_filter, feasible_attribute, component.feasible_pairs)
+            else:
+                setattr(restricted_filter, qualified_attribute, qualified_df.iloc[0:0].copy())
+                setattr(restricted_filter, feasible_attribute, [])
+
+        restricted_filter.qualified_crew_ids_df = self.qualified_crew_ids_df[self.qualified_crew_ids_df.isin(component.crew_ids)]
+
+        # Their rows follow the unrestricted qualified crew frames
+        restricted_filter.captains_eligibility_matrix = None
+        restricted_filter.first_officers_eligibility_matrix = None
+        restricted_filter.cabin_crew_eligibility_matrix = None
+
+        return restricted_filter
+
+    def exclude_busy_crew(self, busy_duties_df):
+        """
+        Drop the feasible pairs whose duty overlaps a duty the crew member already works, e.g. one committed by the
+        previous rolling horizon window. Duties are intervals [departure, arrival) like in the no overlap constraints.
+
+        Args:
+            busy_duties_df: DataFrame with 'crew_id', 'scheduled_departure_utc' and 'scheduled_arrival_utc' of the
+                            duties already worked
+
+        Returns: Number of dropped pairs
+        """
+        if busy_duties_df is None or len(busy_duties_df) == 0:
+            return 0
+
+        duty_times_df = self.duties_for_aircraft_df[['duty_id', 'scheduled_departure_utc', 'scheduled_arrival_utc']]
+        number_of_dropped_pairs = 0
+
+        for attribute, qualified_attribute, matrix_attribute in [
+            ('feasible_captains', 'qualified_captains_df', 'captains_eligibility_matrix'),
+            ('feasible_first_officers', 'qualified_first_officers_df', 'first_officers_eligibility_matrix'),
+            ('feasible_cabin_crew', 'qualified_cabin_crew_df', 'cabin_crew_eligibility_matrix')
+        ]:
+            feasible_pairs = getattr(self, attribute)
+            if not feasible_pairs:
+                continue
+
+            pairs_df = pd.DataFrame(feasible_pairs, columns=['crew_id', 'duty_id']).reset_index()
+            pairs_df = pairs_df.merge(duty_times_df, on='duty_id').merge(busy_duties_df, on='crew_id', suffixes=('', '_busy'))
+
+            overlaps = ((pairs_df['scheduled_departure_utc'] < pairs_df['scheduled_arrival_utc_busy'])
+                        & (pairs_df['scheduled_departure_utc_busy'] < pairs_df['scheduled_arrival_utc']))
+            overlapping_positions = set(pairs_df.loc[overlaps, 'index'].tolist())
+
+            setattr(self, attribute, [pair for position, pair in enumerate(feasible_pairs) if position not in overlapping_positions])
+
+            # Keep the eligibility matrix in line with the pairs, on a copy as restored results may share it
+            eligibility_matrix = getattr(self, matrix_attribute)
+            if eligibility_matrix is not None and overlapping_positions:
+                crew_positions = pd.Index(getattr(self, qualified_attribute)['crew_id']).get_indexer(pairs_df.loc[overlaps, 'crew_id'])
+                duty_positions = pd.Index(self.duties_for_aircraft_df['duty_id']).get_indexer(pairs_df.loc[overlaps, 'duty_id'])
+
+                eligibility_matrix = eligibility_matrix.copy()
+                eligibility_matrix[crew_positions, duty_positions] = False
+                setattr(self, matrix_attribute, eligibility_matrix)
+            number_of_dropped_pairs += len(overlapping_positions)
+
+        return number_of_dropped_pairs
+
     def filter_qualified_crew_members(self):
         """
         Filter crew qualified for this aircraft type
         """
 
+        is_qualified = True
+
         if self.aircraft_type is not None:
-            self.qualified_captains_df = self.crew_df[
-                (self.crew_df['role'] == 'Captain') & (
-                        self.crew_df['qualifications'].str.contains(self.aircraft_type) |
-                        (self.crew_df['qualifications'] == 'ALL')
-                )].copy()
-
-            self.qualified_first_officers_df = self.crew_df[
-                (self.crew_df['role'] == 'First Officer') & (
-                        self.crew_df['qualifications'].str.contains(self.aircraft_type) |
-                        (self.crew_df['qualifications'] == 'ALL')
-                )].copy()
-
-            self.qualified_cabin_crew_df = self.crew_df[
-                (self.crew_df['role'] == 'Flight Attendant') & (
-                        self.crew_df['qualifications'].str.contains(self.aircraft_type) |
-                        (self.crew_df['qualifications'] == 'ALL')
-                )].copy()
-        else:
-            self.qualified_captains_df = self.crew_df[(self.crew_df['role'] == 'Captain')].copy()
-            self.qualified_first_officers_df = self.crew_df[(self.crew_df['role'] == 'First Officer')].copy()
-            self.qualified_cabin_crew_df = self.crew_df[(self.crew_df['role'] == 'Flight Attendant')].copy()
+            type_bit = self.qualification_encoder.type_bit(self.aircraft_type)
+            is_qualified = (self.crew_df['qualifications_mask'].to_numpy() & type_bit) != 0
+
+        self.qualified_captains_df = self.crew_df[(self.crew_df['role'] == 'Captain') & is_qualified].copy()
+        self.qualified_first_officers_df = self.crew_df[(self.crew_df['role'] == 'First Officer') & is_qualified].copy()
+        self.qualified_cabin_crew_df = self.crew_df[(self.crew_df['role'] == 'Flight Attendant') & is_qualified].copy()
 
         # Filter time-off requests for qualified crew only
         self.qualified_crew_ids_df = pd.concat([
@@ -73,72 +209,93 @@ class FeasibleAssignmentsFilter():
             self.time_off_df['crew_id'].isin(self.qualified_crew_ids_df)
         ].copy()
 
+        if self.crew_availability_index is None:
+            self.crew_availability_index = CrewAvailabilityIndex(self.time_off_for_aircraft_df)
+
     def filter_feasible_assignments(self):
         """
         Create variables for feasible crew-flight pairs for each role
         """
 
-        self.feasible_captains = self.filter_feasible_for_role(self.qualified_captains_df)
-        self.feasible_first_officers = self.filter_feasible_for_role(self.qualified_first_officers_df)
-        self.feasible_cabin_crew = self.filter_feasible_for_role(self.qualified_cabin_crew_df)
+        self.captains_eligibility_matrix = self.build_eligibility_matrix(self.qualified_captains_df)
+        self.first_officers_eligibility_matrix = self.build_eligibility_matrix(self.qualified_first_officers_df)
+        self.cabin_crew_eligibility_matrix = self.build_eligibility_matrix(self.qualified_cabin_crew_df)
+
+        self.feasible_captains = self.filter_feasible_for_role(self.qualified_captains_df, self.captains_eligibility_matrix)
+        self.feasible_first_officers = self.filter_feasible_for_role(self.qualified_first_officers_df, self.first_officers_eligibility_matrix)
+        self.feasible_cabin_crew = self.filter_feasible_for_role(self.qualified_cabin_crew_df, self.cabin_crew_eligibility_matrix)
 
-    def filter_feasible_for_role(self, crew_df):
+    def filter_feasible_for_role(self, crew_df, eligibility_matrix=None):
         """
         Filter feasible crew-duty pairs for a specific role
-        """
-
-        feasible = []
-
-        for index, crew in crew_df.iterrows():
-            crew_id = crew['crew_id']
 
-            # Skip crew very close to yearly limit
-            if crew['current_calendar_year_flight_time_hours'] >= self.max_flight_time_hours_year:
-                continue
-
-            if crew['last_11_calendar_months_flight_time_hours'] >= self.max_flight_time_hours_12_months:
-                continue
-
-            # Skip crew close to 28-day limit
-            if crew['current_month_flight_time_hours'] >= self.max_flight_time_hours_28_days:
-                continue
-
-            if crew['current_month_duty_time_hours'] >= self.max_duty_time_hours_28_days:
-                continue
+        Returns: List of (crew_id, duty_id) pairs, ordered by crew and then by duty
+        """
 
-            for index2, duty in self.duties_for_aircraft_df.iterrows():
-                duty_id = duty['duty_id']
+        if eligibility_matrix is None:
+            eligibility_matrix = self.build_eligibility_matrix(crew_df)
 
-                # Check if crew has enough hours left for this duty
-                if crew['current_calendar_year_flight_time_hours'] + duty['flight_time_hours'] > self.max_flight_time_hours_year:
-                    continue
+        crew_positions, duty_positions = np.nonzero(eligibility_matrix)
 
-                if crew['last_11_calendar_months_flight_time_hours'] + duty['flight_time_hours'] > self.max_flight_time_hours_12_months:
-                    continue
+        crew_ids = crew_df['crew_id'].to_numpy()[crew_positions].tolist()
+        duty_ids = self.duties_for_aircraft_df['duty_id'].to_numpy()[duty_positions].tolist()
 
-                if crew['current_month_flight_time_hours'] + duty['flight_time_hours'] > self.max_flight_time_hours_28_days:
-                    continue
+        return list(zip(crew_ids, duty_ids))
 
-                if crew['current_month_duty_time_hours'] + duty['duty_time_hours'] > self.max_duty_time_hours_28_days:
-                    continue
+    def build_eligibility_matrix(self, crew_df):
+        """
+        Boolean (crew x duty) matrix of feasible assignments for a specific role
 
-                # Check time-off conflicts
-                if self.has_time_off_conflict(crew_id, duty):
-                    continue
+        The hour budgets are checked by broadcasting the crew hours (column vector)
+        against the duty hours (row vector), qualifications by broadcasting the crew
+        qualification masks against the duty aircraft type bits.
+        """
 
-                feasible.append((crew_id, duty_id))
+        # Crew hours already flown or on duty as column vectors
+        current_calendar_year_flight_time_hours = crew_df['current_calendar_year_flight_time_hours'].to_numpy(dtype=float)[:, None]
+        last_11_calendar_months_flight_time_hours = crew_df['last_11_calendar_months_flight_time_hours'].to_numpy(dtype=float)[:, None]
+        current_month_flight_time_hours = crew_df['current_month_flight_time_hours'].to_numpy(dtype=float)[:, None]
+        current_month_duty_time_hours = crew_df['current_month_duty_time_hours'].to_numpy(dtype=float)[:, None]
+
+        # Duty hours as row vectors
+        duty_flight_time_hours = self.duties_for_aircraft_df['flight_time_hours'].to_numpy(dtype=float)[None, :]
+        duty_time_hours = self.duties_for_aircraft_df['duty_time_hours'].to_numpy(dtype=float)[None, :]
+
+        # Skip crew very close to yearly limit or close to 28-day limit
+        exhausted_crew = (
+            (current_calendar_year_flight_time_hours >= self.max_flight_time_hours_year) |
+            (last_11_calendar_months_flight_time_hours >= self.max_flight_time_hours_12_months) |
+            (current_month_flight_time_hours >= self.max_flight_time_hours_28_days) |
+            (current_month_duty_time_hours >= self.max_duty_time_hours_28_days)
+        )
+
+        # Check if crew has enough hours left for each duty
+        exceeds_hours = (
+            (current_calendar_year_flight_time_hours + duty_flight_time_hours > self.max_flight_time_hours_year) |
+            (last_11_calendar_months_flight_time_hours + duty_flight_time_hours > self.max_flight_time_hours_12_months) |
+            (current_month_flight_time_hours + duty_flight_time_hours > self.max_flight_time_hours_28_days) |
+            (current_month_duty_time_hours + duty_time_hours > self.max_duty_time_hours_28_days)
+        )
+
+        # Check time-off conflicts
+        time_off_conflicts = self.build_time_off_conflict_matrix(crew_df)
+
+        # Check type qualifications with a bitwise AND of crew masks and duty type bits
+        is_qualified = self.qualification_encoder.qualification_matrix(crew_df['qualifications_mask'].to_numpy(), self.duty_type_bits)
+
+        return is_qualified & ~(exhausted_crew | exceeds_hours | time_off_conflicts)
+
+    def build_time_off_conflict_matrix(self, crew_df):
+        """
+        Boolean (crew x duty) matrix, True where a time-off request covers the duty departure
+        """
 
-        return feasible
+        return self.crew_availability_index.conflict_matrix(crew_df['crew_id'].to_numpy(),
+                                                            self.duties_for_aircraft_df['scheduled_departure_utc'])
 
     def has_time_off_conflict(self, crew_id, flight):
         """
         Check if crew member has time-off request that conflicts with flight
         """
 
-        crew_time_offs = self.time_off_for_aircraft_df[self.time_off_for_aircraft_df['crew_id'] == crew_id]
-
-        for index, time_off in crew_time_offs.iterrows():
-            if time_off['start_date'] <= flight['scheduled_departure_utc'] <= time_off['end_date']:
-                return True
-
-        return False
+        return self.crew_availability_index.has_time_off_conflict(crew_id, flight['scheduled_departure_utc'])
@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+
+
+class FlightConnectionGraph:
+    def __init__(self, flights_df, min_turnaround_hours, max_turnaround_hours):
+        """
+        Time-ordered graph of feasible leg-to-leg connections
+
+        A flight connects to a later flight of the same aircraft type departing from its arrival
+        airport within [min_turnaround_hours, max_turnaround_hours] after it lands.
+
+        Args:
+            flights_df: Flights with ids, airports, aircraft and scheduled departure/arrival times
+            min_turnaround_hours: Minimum ground time between two legs of the same duty
+            max_turnaround_hours: Maximum ground time between two legs of the same duty
+        """
+        self.min_turnaround_ns = pd.Timedelta(hours=min_turnaround_hours).value
+        self.max_turnaround_ns = pd.Timedelta(hours=max_turnaround_hours).value
+
+        # Flights sorted chronologically, all arrays below are indexed by this order
+        self.flights_df = flights_df.sort_values('scheduled_departure_utc', kind='stable').reset_index(drop=True)
+
+        self.flight_ids = self.flights_df['flight_id'].to_numpy()
+        self.departure_icaos = self.flights_df['departure_icao'].to_numpy()
+        self.arrival_icaos = self.flights_df['arrival_icao'].to_numpy()
+        self.aircraft_types = self.flights_df['aircraft_type'].to_numpy()
+        self.aircraft_registrations = self.flights_df['aircraft_registration'].to_numpy()
+        self.departure_ns = self.flights_df['scheduled_departure_utc'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        self.arrival_ns = self.flights_df['scheduled_arrival_utc'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+        # Successors in CSR layout: successors of flight i are successor_positions[successor_ptr[i]:successor_ptr[i + 1]]
+        self.successor_ptr = np.zeros(len(self.flights_df) + 1, dtype=np.int64)
+        self.successor_positions = np.zeros(0, dtype=np.int64)
+
+    def number_of_connections(self):
+        return len(self.successor_positions)
+
+    def build_connections(self):
+        """
+        Index every feasible connection with one binary search per flight
+
+        Departures are grouped by (airport, aircraft type), so finding the successors of a flight
+        costs a lookup plus the number of successors it actually has.
+        """
+        # Group departure positions by (departure airport, aircraft type), already in departure order
+        departures_by_key = {}
+        for position, departure_key in enumerate(zip(self.departure_icaos, self.aircraft_types)):
+            departures_by_key.setdefault(departure_key, []).append(position)
+
+        departures_by_key = {
+            departure_key: np.asarray(positions, dtype=np.int64)
+            for departure_key, positions in departures_by_key.items()
+        }
+
+        successor_counts = np.zeros(len(self.flights_df), dtype=np.int64)
+        successor_chunks = []
+
+        for position in range(len(self.flights_df)):
+            candidate_positions = departures_by_key.get((self.arrival_icaos[position], self.aircraft_types[position]))
+
+            if candidate_positions is None:
+                continue
+
+            # Departures within the turnaround window after this flight lands
+            candidate_departures_ns = self.departure_ns[candidate_positions]
+            first = np.searchsorted(candidate_departures_ns, self.arrival_ns[position] + self.min_turnaround_ns, side='left')
+            last = np.searchsorted(candidate_departures_ns, self.arrival_ns[position] + self.max_turnaround_ns, side='right')
+
+            successor_counts[position] = last - first
+            successor_chunks.append(candidate_positions[first:last])
+
+        self.successor_ptr[1:] = np.cumsum(successor_counts)
+        self.successor_positions = np.concatenate(successor_chunks) if successor_chunks else np.zeros(0, dtype=np.int64)
+
+    def successors(self, position):
+        return self.successor_positions[self.successor_ptr[position]:self.successor_ptr[position + 1]]
+
+    def compute_return_bounds(self, home_base_icao):
+        """
+        Optimistic bounds used to prune the duty search
+
+        Returns: Tuple of arrays (earliest arrival back at home base, fewest sectors to get back)
+        for a duty continuing with each flight, ignoring which flights are already used
+        """
+        no_return_ns = np.iinfo(np.int64).max
+        no_return_sectors = np.iinfo(np.int32).max
+
+        earliest_return_ns = np.full(len(self.flights_df), no_return_ns, dtype=np.int64)
+        min_sectors_to_return = np.full(len(self.flights_df), no_return_sectors, dtype=np.int64)
+
+        # Successors always depart later, so a reverse chronological sweep sees them first
+        for position in range(len(self.flights_df) - 1, -1, -1):
+            if self.arrival_icaos[position] == home_base_icao:
+                earliest_return_ns[position] = self.arrival_ns[position]
+                min_sectors_to_return[position] = 1
+                continue
+
+            successor_positions = self.successors(position)
+            if len(successor_positions) > 0:
+                earliest_return_ns[position] = earliest_return_ns[successor_positions].min()
+
+                successor_min_sectors = min_sectors_to_return[successor_positions].min()
+                if successor_min_sectors != no_return_sectors:
+                    min_sectors_to_return[position] = successor_min_sectors + 1
+
+        return earliest_return_ns, min_sectors_to_return
+
+    def find_duties(self, home_base_icao, max_duty_period_hours, max_sectors, max_expansions_per_duty=500):
+        """
+        Build disjoint multi-sector duties that start and end at the home base
+
+        Home base departures are processed chronologically. For each of them a pruned depth-first
+        search over the connections of still unused flights looks for the closed duty with the most
+        sectors (ties: fewest aircraft changes, then earliest return), bounded by the duty period and
+        the number of sectors. Flights of the chosen duty are then marked as used.
+
+        Args:
+            home_base_icao: ICAO code where every duty starts and ends
+            max_duty_period_hours: Maximum time between first departure and last arrival
+            max_sectors: Maximum number of sectors per duty
+            max_expansions_per_duty: Search budget (extended paths) per home base departure
+
+        Returns: List of tuples of flight ids, in flying order
+        """
+        max_duty_period_ns = pd.Timedelta(hours=max_duty_period_hours).value
+        earliest_return_ns, min_sectors_to_return = self.compute_return_bounds(home_base_icao)
+
+        is_used = np.zeros(len(self.flights_df), dtype=bool)
+        duties = []
+
+        for start_position in np.flatnonzero(self.departure_icaos == home_base_icao):
+            if is_used[start_position]:
+                continue
+
+            # Skip flights that can't get back to base within one duty
+            if earliest_return_ns[start_position] - self.departure_ns[start_position] > max_duty_period_ns:
+                continue
+
+            duty_positions = self.find_best_duty(start_position, home_base_icao, max_duty_period_ns, max_sectors,
+                                                 max_expansions_per_duty, is_used, earliest_return_ns, min_sectors_to_return)
+
+            if duty_positions is not None:
+                is_used[list(duty_positions)] = True
+                duties.append(tuple(self.flight_ids[position] for position in duty_positions))
+
+        return duties
+
+    def find_best_duty(self, start_position, home_base_icao, max_duty_period_ns, max_sectors,
+                       max_expansions, is_used, earliest_return_ns, min_sectors_to_return):
+        """
+        Depth-first search for the best closed duty starting with the given flight
+
+        Returns: Tuple of flight positions, or None if no closed duty with at least two sectors exists
+        """
+        latest_return_ns = self.departure_ns[start_position] + max_duty_period_ns
+
+        best_duty = None
+        best_score = None
+        expansions = 0
+
+        # Stack of (path, number of aircraft changes on the path)
+        stack = [((start_position,), 0)]
+
+        while stack and expansions < max_expansions:
+            path, aircraft_changes = stack.pop()
+            last_position = path[-1]
+
+            # A path back at home base is a closed duty
+            if len(path) >= 2 and self.arrival_icaos[last_position] == home_base_icao:
+                score = (len(path), -aircraft_changes, -self.arrival_ns[last_position])
+                if best_score is None or score > best_score:
+                    best_duty = path
+                    best_score = score
+
+            if len(path) >= max_sectors:
+                continue
+
+            # Push the preferred successors last so they are explored first
+            extensions = []
+            for successor_position in self.successors(last_position):
+                if is_used[successor_position]:
+                    continue
+
+                # Prune successors that can't close the duty within the sector and duty period limits
+                if len(path) + min_sectors_to_return[successor_position] > max_sectors:
+                    continue
+
+                if earliest_return_ns[successor_position] > latest_return_ns:
+                    continue
+
+                same_aircraft = self.aircraft_registrations[successor_position] == self.aircraft_registrations[last_position]
+                extensions.append((same_aircraft, -self.departure_ns[successor_position], successor_position))
+
+            extensions.sort()
+            for same_aircraft, _, successor_position in extensions:
+                expansions += 1
+                stack.append((path + (successor_position,), aircraft_changes + (0 if same_aircraft else 1)))
+
+        return best_duty
@@ -1,8 +1,134 @@
+import hashlib
+import json
+import os
+import time
+
 import pandas as pd
 
+from crewrostering.preprocessing.crew_availability_index import CrewAvailabilityIndex
+from crewrostering.preprocessing.qualification_encoder import QualificationEncoder
+
+try:
+    import pyarrow  # noqa: F401 - only needed to store the cache as Parquet
+    CACHE_FORMAT = 'parquet'
+except ImportError:
+    CACHE_FORMAT = 'pickle'
+
+
+# Bump when the schemas or the preprocessing change, so existing caches are rebuilt
+SCHEMA_VERSION = 1
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+DATE_FORMAT = '%Y-%m-%d'
+
+# Per input file: location, column dtypes and datetime columns with their fixed format
+INPUT_SCHEMAS = {
+    'flights_df': {
+        'path': '../assets/simulated/flightera_flights.csv',
+        'dtypes': {
+            'flight_id': 'int64',
+            'flnr': 'category',
+            'journey_id': 'object',
+            'actual_departure_is_estimated': 'boolean',
+            'departure_ident': 'category',
+            'departure_icao': 'category',
+            'departure_iata': 'category',
+            'departure_name': 'category',
+            'departure_city': 'category',
+            'departure_terminal': 'category',
+            'departure_gate': 'category',
+            'arrival_ident': 'category',
+            'arrival_icao': 'category',
+            'arrival_iata': 'category',
+            'arrival_name': 'category',
+            'arrival_city': 'category',
+            'arrival_terminal': 'category',
+            'actual_arrival_is_estimated': 'boolean',
+            'status': 'category',
+            'aircraft_registration': 'category',
+            'aircraft_type': 'category',
+            'family': 'category',
+            'airline_iata': 'category',
+            'airline_icao': 'category',
+            'airline_name': 'category'
+        },
+        'datetimes': {
+            'date': DATETIME_FORMAT,
+            'scheduled_departure_utc': DATETIME_FORMAT,
+            'actual_departure_utc': DATETIME_FORMAT,
+            'scheduled_departure_local': DATETIME_FORMAT,
+            'actual_departure_local': DATETIME_FORMAT,
+            'scheduled_arrival_utc': DATETIME_FORMAT,
+            'actual_arrival_utc': DATETIME_FORMAT,
+            'scheduled_arrival_local': DATETIME_FORMAT,
+            'actual_arrival_local': DATETIME_FORMAT
+        }
+    },
+    'historical_flights_df': {
+        'path': '../assets/simulated/historical_flights.csv',
+        'dtypes': {
+            'crew_id': 'object',
+            'flight_time_hours': 'float64',
+            'duty_time_hours': 'float64'
+        },
+        'datetimes': {
+            'scheduled_departure_utc': DATETIME_FORMAT
+        }
+    },
+    'crew_df': {
+        'path': '../assets/simulated/crew_members.csv',
+        'dtypes': {
+            'crew_id': 'object',
+            'role': 'category',
+            'qualifications': 'category',
+            'purser': 'category',
+            'seniority': 'int64',
+            'monthly_hours_limit': 'int64',
+            'yearly_hours_limit': 'int64',
+            'current_month_flight_time_hours': 'float64',
+            'current_month_duty_time_hours': 'float64',
+            'last_11_calendar_months_flight_time_hours': 'float64',
+            'current_calendar_year_flight_time_hours': 'float64'
+        },
+        'datetimes': {}
+    },
+    'time_off_df': {
+        'path': '../assets/simulated/time_off_requests.csv',
+        'dtypes': {
+            'crew_id': 'object',
+            'request_type': 'category'
+        },
+        'datetimes': {
+            'start_date': DATE_FORMAT,
+            'end_date': DATE_FORMAT
+        }
+    },
+    'crew_requirements_df': {
+        'path': '../assets/resources/crew_requirements.csv',
+        'dtypes': {
+            'model': 'object',
+            'captains': 'int64',
+            'first_officers': 'int64',
+            'cabin_crew': 'int64',
+            'total_crew': 'int64'
+        },
+        'datetimes': {}
+    },
+    'regulations_df': {
+        'path': '../assets/resources/regulations.csv',
+        'dtypes': {
+            'constraint_name': 'object',
+            'value': 'float64',
+            'unit': 'category',
+            'notes': 'object'
+        },
+        'datetimes': {}
+    }
+}
+
 
 class FlightDataPreprocessor():
-    def __init__(self):
+    def __init__(self, use_cache=True, cache_directory='../assets/cache/input'):
         self.flights_df = None
         self.historical_flights_df = None
 
@@ -11,78 +137,199 @@ class FlightDataPreprocessor():
         self.crew_requirements_df = None
         self.regulations_df = None
 
+        # Time-off requests indexed per crew member
+        self.crew_availability_index = None
+
+        # Aircraft type qualifications as bitmasks
+        self.qualification_encoder = None
+
         self.captains_required_dict = []
         self.first_officers_required_dict = []
         self.cabin_crew_required_dict = []
         self.regulations_dict = []
 
-        self.flights_datetime_cols = [
-            'scheduled_departure_utc',
-            'scheduled_arrival_utc',
-            'actual_departure_utc',
-            'actual_arrival_utc'
-        ]
+        # Preprocessed frames are cached in a binary columnar format, keyed by the source files' content
+        self.use_cache = use_cache
+        self.cache_directory = cache_directory
 
     def load_data(self):
         print("Loading data...")
+        t = time.time()
+
+        source_hash = self.hash_input_files()
+        loaded_from_cache = self.use_cache and self.read_cache(source_hash)
+
+        if not loaded_from_cache:
+            # Load scheduled flights, historical flights, crew, regulations and offtime
+            for frame_name, schema in INPUT_SCHEMAS.items():
+                setattr(self, frame_name, self.read_input_file(schema))
+
+            # Create mapping dictionaries where relevant
+            self.create_mapping_dictionaries()
+
+            # Process the data
+            self.clean_data()
+            self.preprocess_flights_data()
+        else:
+            self.create_mapping_dictionaries()
+
+        # Index time-off once so availability can be answered without filtering the frame
+        self.crew_availability_index = CrewAvailabilityIndex(self.time_off_df)
+
+        # Parse qualifications once into one bitmask per crew member
+        self.encode_qualifications()
+
+        load_time = time.time() - t
+
+        if self.use_cache and not loaded_from_cache:
+            self.write_cache(source_hash, load_time)
+
+        self.print_load_report(loaded_from_cache, load_time)
+
+        print("Successfully loaded and preprocessed all data")
+
+    def read_input_file(self, schema):
+        """
+        Read one input CSV with its explicit dtypes and fixed datetime formats
+        """
+        # "NULL" and empty fields become missing values while reading
+        df = pd.read_csv(schema['path'], dtype=schema['dtypes'], na_values=['NULL'])
+
+        for column, datetime_format in schema['datetimes'].items():
+            df[column] = pd.to_datetime(df[column], format=datetime_format)
+
+        return df
+
+    def apply_schema(self, df, frame_name):
+        """
+        Cast a frame created in memory (e.g. a generated schedule) to the schema of an input file
+        """
+        schema = INPUT_SCHEMAS[frame_name]
 
-        # Load scheduled flights and historical flights
-        self.flights_df = pd.read_csv('../assets/simulated/flightera_flights.csv')
-        self.historical_flights_df = pd.read_csv('../assets/simulated/historical_flights.csv')
+        dtypes = {column: dtype for column, dtype in schema['dtypes'].items() if column in df.columns}
+        df = df.astype(dtypes)
 
-        # Load crew, regulations and offtime
-        self.crew_df = pd.read_csv('../assets/simulated/crew_members.csv')
-        self.time_off_df = pd.read_csv('../assets/simulated/time_off_requests.csv')
-        self.crew_requirements_df = pd.read_csv('../assets/resources/crew_requirements.csv')
-        self.regulations_df = pd.read_csv('../assets/resources/regulations.csv')
+        for column, datetime_format in schema['datetimes'].items():
+            if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
+                df[column] = pd.to_datetime(df[column], format=datetime_format)
 
-        # Create mapping dictionaries where relevant
+        return df
+
+    def create_mapping_dictionaries(self):
         self.captains_required_dict = self.crew_requirements_df.set_index('model')['captains'].to_dict()
         self.first_officers_required_dict = self.crew_requirements_df.set_index('model')['first_officers'].to_dict()
         self.cabin_crew_required_dict = self.crew_requirements_df.set_index('model')['cabin_crew'].to_dict()
 
         self.regulations_dict = self.regulations_df.set_index('constraint_name')['value'].astype(int).to_dict()
 
-        # Process the data
-        self.clean_data()
-        self.preprocess_flights_data()
-        self.preprocess_crew_data()
-
-        print("Successfully loaded and preprocessed all data")
-
     def clean_data(self):
-        # Remove rows where flight_time, scheduled_departure_utc or scheduled_arrival_utc is literally "NULL" or empty
+        # Remove rows where scheduled_departure_utc, scheduled_arrival_utc or aircraft_registration is missing
+        # ("NULL" and empty fields are read as missing values)
         self.flights_df = self.flights_df[
             (self.flights_df['scheduled_departure_utc'].notnull()) &
             (self.flights_df['scheduled_arrival_utc'].notnull()) &
-            (self.flights_df['aircraft_registration'].notnull()) &
-            (self.flights_df['scheduled_departure_utc'] != "NULL") &
-            (self.flights_df['scheduled_arrival_utc'] != "NULL") &
-            (self.flights_df['aircraft_registration'] != "NULL") &
-            (self.flights_df['scheduled_departure_utc'] != "") &
-            (self.flights_df['scheduled_arrival_utc'] != "") &
-            (self.flights_df['aircraft_registration'] != "")
-            ]
+            (self.flights_df['aircraft_registration'].notnull())
+            ].copy()
 
     def preprocess_flights_data(self):
-        # Convert datetime columns to datetime objects
-        for col in self.flights_datetime_cols:
-            self.flights_df[col] = pd.to_datetime(self.flights_df[col])
-
         # Calculate scheduled flight time (time between scheduled departure and arrival)
         self.flights_df['flight_time_seconds'] = self.flights_df['scheduled_arrival_utc'] - self.flights_df['scheduled_departure_utc']
         self.flights_df['flight_time_hours'] = (self.flights_df['flight_time_seconds'].dt.total_seconds() / 3600).round(2)
 
         # Add crew requirement columns to flights_df
-        self.flights_df['captains_required'] = self.flights_df['aircraft_type'].map(self.captains_required_dict)
-        self.flights_df['first_officers_required'] = self.flights_df['aircraft_type'].map(self.first_officers_required_dict)
-        self.flights_df['cabin_crew_required'] = self.flights_df['aircraft_type'].map(self.cabin_crew_required_dict)
+        aircraft_types = self.flights_df['aircraft_type'].astype(object)
+        self.flights_df['captains_required'] = aircraft_types.map(self.captains_required_dict)
+        self.flights_df['first_officers_required'] = aircraft_types.map(self.first_officers_required_dict)
+        self.flights_df['cabin_crew_required'] = aircraft_types.map(self.cabin_crew_required_dict)
+
+    def encode_qualifications(self):
+        """
+        Map aircraft types to bit positions and store each crew member's qualifications as a bitmask
+        """
+        self.qualification_encoder = QualificationEncoder.from_qualifications(
+            self.crew_df['qualifications'],
+            self.crew_requirements_df['model'].tolist() + self.flights_df['aircraft_type'].dropna().astype(str).unique().tolist()
+        )
+
+        self.crew_df['qualifications_mask'] = self.qualification_encoder.encode_series(self.crew_df['qualifications'])
+
+    def hash_input_files(self):
+        """
+        Content hash of all input files and the schema version
+        """
+        source_hash = hashlib.sha256(f"schema-{SCHEMA_VERSION}".encode())
+
+        for frame_name, schema in INPUT_SCHEMAS.items():
+            with open(schema['path'], 'rb') as input_file:
+                source_hash.update(frame_name.encode())
+                source_hash.update(hashlib.sha256(input_file.read()).digest())
+
+        return source_hash.hexdigest()
+
+    def cache_file_path(self, frame_name):
+        extension = 'parquet' if CACHE_FORMAT == 'parquet' else 'pkl'
+        return os.path.join(self.cache_directory, f"{frame_name}.{extension}")
+
+    def read_cache(self, source_hash):
+        """
+        Load all preprocessed frames from the cache if it was built from the same input files
+
+        Returns: True if the frames were loaded from the cache
+        """
+        manifest_path = os.path.join(self.cache_directory, 'manifest.json')
+
+        if not os.path.exists(manifest_path):
+            return False
+
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+
+        if manifest.get('source_hash') != source_hash or manifest.get('format') != CACHE_FORMAT:
+            return False
+
+        self.cold_load_time = manifest.get('cold_load_time')
+
+        for frame_name in INPUT_SCHEMAS:
+            if CACHE_FORMAT == 'parquet':
+                setattr(self, frame_name, pd.read_parquet(self.cache_file_path(frame_name)))
+            else:
+                setattr(self, frame_name, pd.read_pickle(self.cache_file_path(frame_name)))
+
+        return True
+
+    def write_cache(self, source_hash, cold_load_time):
+        os.makedirs(self.cache_directory, exist_ok=True)
+
+        for frame_name in INPUT_SCHEMAS:
+            df = getattr(self, frame_name)
+
+            if CACHE_FORMAT == 'parquet':
+                df.to_parquet(self.cache_file_path(frame_name))
+            else:
+                df.to_pickle(self.cache_file_path(frame_name))
+
+        # The manifest is written last, so an interrupted write leaves no valid cache behind
+        manifest = {
+            'source_hash': source_hash,
+            'format': CACHE_FORMAT,
+            'cold_load_time': cold_load_time
+        }
 
-        # Preprocess historical flights data
-        self.historical_flights_df['scheduled_departure_utc'] = pd.to_datetime(self.historical_flights_df['scheduled_departure_utc'])
+        with open(os.path.join(self.cache_directory, 'manifest.json'), 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
 
-    def preprocess_crew_data(self):
-        self.time_off_df['start_date'] = pd.to_datetime(self.time_off_df['start_date'])
-        self.time_off_df['end_date'] = pd.to_datetime(self.time_off_df['end_date'])
+    def print_load_report(self, loaded_from_cache, load_time):
+        if loaded_from_cache:
+            cold_load_time = getattr(self, 'cold_load_time', None)
+            cold_label = f"{cold_load_time:.2f}s" if cold_load_time is not None else "unknown"
+            print(f"Loaded input data from {CACHE_FORMAT} cache: {load_time:.2f}s (cold load from CSV: {cold_label})")
+        else:
+            print(f"Loaded input data from CSV: {load_time:.2f}s")
 
+        memory_by_frame = {
+            frame_name: getattr(self, frame_name).memory_usage(deep=True).sum() / 1024 ** 2
+            for frame_name in INPUT_SCHEMAS
+        }
 
+        frame_labels = ', '.join(f"{frame_name} {memory:.2f} MB" for frame_name, memory in memory_by_frame.items())
+        print(f"Memory of loaded frames: {sum(memory_by_frame.values()):.2f} MB ({frame_labels})")
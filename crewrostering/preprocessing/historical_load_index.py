@@ -0,0 +1,97 @@
+import numpy as np
+
+
+class HistoricalLoadIndex:
+    def __init__(self, historical_flights_df, reference_date):
+        """
+        Historical duty hours, flight hours and work days per crew member and calendar day as prefix sums
+
+        Days are numbered relative to reference_date (usually the first schedule date, so history has negative
+        day numbers). The load of any closed day range is the difference of two prefix sums. Hours are kept in
+        hundredths, rounded per flight, so sums over a range are exact.
+
+        Args:
+            historical_flights_df: DataFrame with 'crew_id', 'scheduled_departure_utc' (datetime),
+                                   'flight_time_hours' and 'duty_time_hours' columns
+            reference_date: Date numbered as day 0, None without schedule days (no history is needed then)
+        """
+        self.crew_rows = {}
+        self.first_day_number = 0
+        self.number_of_days = 0
+
+        # Row per crew member, column c holds the load of the days before first_day_number + c
+        self.cumulative_duty_time_hours_scaled = np.zeros((0, 1), dtype=np.int64)
+        self.cumulative_flight_time_hours_scaled = np.zeros((0, 1), dtype=np.int64)
+        self.cumulative_work_days = np.zeros((0, 1), dtype=np.int64)
+
+        if historical_flights_df is None or len(historical_flights_df) == 0 or reference_date is None:
+            return
+
+        departure_dates = historical_flights_df['scheduled_departure_utc'].dt.normalize().to_numpy(dtype='datetime64[D]')
+        day_numbers = (departure_dates - np.datetime64(reference_date, 'D')).astype(np.int64)
+
+        crew_ids, crew_rows = np.unique(historical_flights_df['crew_id'].to_numpy(), return_inverse=True)
+        self.crew_rows = {crew_id: row for row, crew_id in enumerate(crew_ids)}
+
+        self.first_day_number = int(day_numbers.min())
+        self.number_of_days = int(day_numbers.max()) - self.first_day_number + 1
+
+        # Flat (crew row, day) cell of every historical flight
+        cells = crew_rows * self.number_of_days + (day_numbers - self.first_day_number)
+        number_of_cells = len(crew_ids) * self.number_of_days
+
+        duty_time_hours_scaled = np.round(historical_flights_df['duty_time_hours'].to_numpy(dtype=float) * 100).astype(np.int64)
+        flight_time_hours_scaled = np.round(historical_flights_df['flight_time_hours'].to_numpy(dtype=float) * 100).astype(np.int64)
+
+        daily_duty_time_hours_scaled = np.bincount(cells, weights=duty_time_hours_scaled, minlength=number_of_cells)
+        daily_flight_time_hours_scaled = np.bincount(cells, weights=flight_time_hours_scaled, minlength=number_of_cells)
+        daily_work_days = np.bincount(cells, minlength=number_of_cells) > 0
+
+        self.cumulative_duty_time_hours_scaled = self.prefix_sums(daily_duty_time_hours_scaled, len(crew_ids))
+        self.cumulative_flight_time_hours_scaled = self.prefix_sums(daily_flight_time_hours_scaled, len(crew_ids))
+        self.cumulative_work_days = self.prefix_sums(daily_work_days, len(crew_ids))
+
+    def prefix_sums(self, daily_values, number_of_crew):
+        """
+        Returns: (crew x days + 1) int64 array of cumulative daily values, starting with a zero column
+        """
+        daily_values = np.rint(daily_values).astype(np.int64).reshape(number_of_crew, self.number_of_days)
+
+        cumulative_values = np.zeros((number_of_crew, self.number_of_days + 1), dtype=np.int64)
+        np.cumsum(daily_values, axis=1, out=cumulative_values[:, 1:])
+
+        return cumulative_values
+
+    def crew_prefix_sums(self, crew_id, load_type):
+        """
+        Returns: Prefix sums of one crew member for 'duty' hours, 'flight' hours or 'work_days', None without history
+        """
+        if crew_id not in self.crew_rows:
+            return None
+
+        if load_type == 'duty':
+            cumulative_values = self.cumulative_duty_time_hours_scaled
+        elif load_type == 'flight':
+            cumulative_values = self.cumulative_flight_time_hours_scaled
+        else:
+            cumulative_values = self.cumulative_work_days
+
+        return cumulative_values[self.crew_rows[crew_id]]
+
+    def range_loads(self, crew_prefix_sums, first_day_numbers, last_day_numbers):
+        """
+        Load of every closed day range [first_day_number, last_day_number], using prefix sums of one crew member
+
+        Returns: int64 array with one load per range
+        """
+        first_day_numbers = np.asarray(first_day_numbers, dtype=np.int64)
+        last_day_numbers = np.asarray(last_day_numbers, dtype=np.int64)
+
+        if crew_prefix_sums is None:
+            return np.zeros(len(first_day_numbers), dtype=np.int64)
+
+        # Columns of the prefix sums before the first and after the last day, clipped to the history span
+        end_columns = np.clip(last_day_numbers - self.first_day_number + 1, 0, self.number_of_days)
+        start_columns = np.clip(first_day_numbers - self.first_day_number, 0, end_columns)
+
+        return crew_prefix_sums[end_columns] - crew_prefix_sums[start_columns]
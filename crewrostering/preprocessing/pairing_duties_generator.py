@@ -1,24 +1,38 @@
+import numpy as np
 import pandas as pd
 
+from crewrostering.preprocessing.flight_connection_graph import FlightConnectionGraph
+
 
 class PairingDutiesGenerator:
-    def __init__(self, flights_for_aircraft_df, max_flight_duty_period_hours):
+    def __init__(self, flights_for_aircraft_df, max_flight_duty_period_hours, max_sectors_day=6, pairing_mode='return_flights'):
         # Duty hours buffer constant
         self.duty_buffer_hours = 1.5
 
-        # Daily duty hours constraint
+        # Daily duty hours and sectors constraints
         self.max_flight_duty_period_hours = max_flight_duty_period_hours
+        self.max_sectors_day = max_sectors_day
+
+        # Every duty starts and ends at the home base (LUX)
+        self.home_base_icao = 'ELLX'
+
+        # Ground time between two consecutive legs of a duty
+        self.min_turnaround_hours = 0.5
+        self.max_turnaround_hours = 4
+
+        # 'return_flights' pairs out-and-back legs, 'connection_graph' builds multi-sector duties
+        self.pairing_mode = pairing_mode
 
         # Flight input data for generating pairings
         self.flights_for_aircraft_df = flights_for_aircraft_df
 
         # Supporting data structures containing pairings, paired and unpaired flight ids
         self.pairings = []
-        self.paired_flight_ids = []
+        self.paired_flight_ids = set()
         self.unpaired_flight_ids = []
 
         # Output: generated pairing duties
-        columns = [
+        self.columns = [
             "duty_id",
             "outbound_flight_id",
             "inbound_flight_id",
@@ -31,16 +45,35 @@ class PairingDutiesGenerator:
             "flight_time_hours",
             "duty_time_hours",
             "scheduled_departure_utc",
+            "scheduled_outbound_arrival_utc",
+            "scheduled_inbound_departure_utc",
             "scheduled_arrival_utc",
+            "flight_ids",
             'sector_count',
             'captains_required',
             'first_officers_required',
             'cabin_crew_required'
         ]
 
-        self.pairing_duties_df = pd.DataFrame([], columns=columns)
+        self.pairing_duties_df = pd.DataFrame([], columns=self.columns)
 
     def generate_pairings(self):
+        if self.pairing_mode == 'connection_graph':
+            self.generate_multi_sector_pairings()
+        else:
+            self.generate_return_flight_pairings()
+
+        # Generate duties for all pairings, then for the remaining single flights
+        flights_by_id_df = self.flights_for_aircraft_df.set_index('flight_id')
+
+        paired_duties_df = self.generate_duties_for_pairings(flights_by_id_df)
+        unpaired_duties_df = self.generate_duties_for_unpaired_flights(flights_by_id_df)
+
+        self.pairing_duties_df = pd.concat([paired_duties_df, unpaired_duties_df], ignore_index=True)
+        self.pairing_duties_df['duty_id'] = np.arange(len(self.pairing_duties_df))
+        self.pairing_duties_df = self.pairing_duties_df[self.columns]
+
+    def generate_return_flight_pairings(self):
         # Step 1: make all pairings where possible
         self.find_return_flights(self.flights_for_aircraft_df)
 
@@ -56,136 +89,222 @@ class PairingDutiesGenerator:
         # Update the list of unpaired flights
         self.find_unpaired_flights()
 
-        # Step 3: generate duties for all pairings
-        self.generate_duties_for_pairings()
-        self.generate_duties_for_unpaired_flights()
+    def generate_multi_sector_pairings(self):
+        """
+        Chain legs into duties that start and end at the home base through the connection graph,
+        flights that can't be chained become single-sector duties
+        """
+        flight_connection_graph = FlightConnectionGraph(self.flights_for_aircraft_df,
+                                                        self.min_turnaround_hours,
+                                                        self.max_turnaround_hours)
+        flight_connection_graph.build_connections()
+
+        # The duty buffer counts towards the flight duty period
+        duties = flight_connection_graph.find_duties(self.home_base_icao,
+                                                     self.max_flight_duty_period_hours - self.duty_buffer_hours,
+                                                     self.max_sectors_day)
+
+        for duty_flight_ids in duties:
+            self.pairings.append(duty_flight_ids)
+            self.paired_flight_ids.update(duty_flight_ids)
+
+        self.find_unpaired_flights()
 
     def print_assignments_to_csv(self):
         self.pairing_duties_df.to_csv('../assets/output/pairings_output.csv', index=False)
 
-    def generate_duties_for_pairings(self):
-        for outbound_flight_id, inbound_flight_id in self.pairings:
-            outbound_flight = self.flights_for_aircraft_df[self.flights_for_aircraft_df['flight_id'] == outbound_flight_id].iloc[0]
-            inbound_flight = self.flights_for_aircraft_df[self.flights_for_aircraft_df['flight_id'] == inbound_flight_id].iloc[0]
-
-            # Compute the delta in hours between departure and arrival
-            flight_time_hours = outbound_flight["flight_time_hours"] + inbound_flight["flight_time_hours"]
-            duty_time_hours = round(self.duty_buffer_hours + (inbound_flight["scheduled_arrival_utc"] - outbound_flight["scheduled_departure_utc"]).total_seconds() / 3600, 2)
-
-            new_row = pd.DataFrame([{
-                "duty_id": len(self.pairing_duties_df),
-                "outbound_flight_id": outbound_flight_id,
-                "inbound_flight_id": inbound_flight_id,
-                "outbound_departure_icao": outbound_flight['departure_icao'],
-                "outbound_arrival_icao": outbound_flight['arrival_icao'],
-                "inbound_departure_icao": inbound_flight['departure_icao'],
-                "inbound_arrival_icao": inbound_flight['arrival_icao'],
-                "aircraft_type": outbound_flight['aircraft_type'],
-                "aircraft_registration": outbound_flight['aircraft_registration'],
-                "flight_time_hours": flight_time_hours,
-                "duty_time_hours": duty_time_hours,
-                "scheduled_departure_utc": outbound_flight["scheduled_departure_utc"],
-                "scheduled_outbound_arrival_utc": outbound_flight["scheduled_arrival_utc"],
-                "scheduled_inbound_departure_utc": outbound_flight["scheduled_departure_utc"],
-                "scheduled_arrival_utc": inbound_flight["scheduled_arrival_utc"],
-                'sector_count': 2,
-                'captains_required': inbound_flight["captains_required"],
-                'first_officers_required': inbound_flight["first_officers_required"],
-                'cabin_crew_required': inbound_flight["cabin_crew_required"]
-            }])
-
-            self.pairing_duties_df = pd.concat([self.pairing_duties_df, new_row], ignore_index=True)
-
-    def generate_duties_for_unpaired_flights(self):
-        for flight_id in self.unpaired_flight_ids:
-            flight = self.flights_for_aircraft_df[self.flights_for_aircraft_df['flight_id'] == flight_id].iloc[0]
-
-            # Compute the delta in hours between departure and arrival
-            flight_time_hours = flight["flight_time_hours"]
-            duty_time_hours = self.duty_buffer_hours + flight["flight_time_hours"]
-
-            new_row = pd.DataFrame([{
-                "duty_id": len(self.pairing_duties_df),
-                "outbound_flight_id": flight_id,
-                "inbound_flight_id": None,
-                "outbound_departure_icao": flight['departure_icao'],
-                "outbound_arrival_icao": flight['arrival_icao'],
-                "inbound_departure_icao": flight['departure_icao'],
-                "inbound_arrival_icao": flight['arrival_icao'],
-                "aircraft_type": flight['aircraft_type'],
-                "aircraft_registration": flight['aircraft_registration'],
-                "flight_time_hours": flight_time_hours,
-                "duty_time_hours": duty_time_hours,
-                "scheduled_departure_utc": flight['scheduled_departure_utc'],
-                "scheduled_arrival_utc": flight['scheduled_arrival_utc'],
-                'sector_count': 1,
-                'captains_required': flight["captains_required"],
-                'first_officers_required': flight["first_officers_required"],
-                'cabin_crew_required': flight["cabin_crew_required"]
-            }])
-
-            self.pairing_duties_df = pd.concat([self.pairing_duties_df, new_row], ignore_index=True)
+    def generate_duties_for_pairings(self, flights_by_id_df):
+        """
+        Build one duty per pairing, flying all its legs in order
+
+        Args:
+            flights_by_id_df: Flights indexed by flight_id
+
+        Returns: DataFrame of paired duties, without duty ids
+        """
+        sector_counts = np.array([len(pairing) for pairing in self.pairings], dtype=np.int64)
+
+        # All legs of all pairings in one lookup, with the position of the first and last leg of each pairing
+        leg_flight_ids = pd.Series([flight_id for pairing in self.pairings for flight_id in pairing],
+                                   dtype=flights_by_id_df.index.dtype)
+        legs = flights_by_id_df.loc[leg_flight_ids].reset_index()
+
+        first_leg_positions = np.cumsum(sector_counts) - sector_counts
+        last_leg_positions = first_leg_positions + sector_counts - 1
+
+        outbound_flights = legs.iloc[first_leg_positions].reset_index(drop=True)
+        inbound_flights = legs.iloc[last_leg_positions].reset_index(drop=True)
+
+        # Compute the delta in hours between departure and arrival
+        if len(self.pairings) > 0:
+            flight_time_hours = pd.Series(np.add.reduceat(legs["flight_time_hours"].to_numpy(), first_leg_positions))
+        else:
+            flight_time_hours = pd.Series([], dtype=float)
+
+        duty_period = inbound_flights["scheduled_arrival_utc"] - outbound_flights["scheduled_departure_utc"]
+        duty_time_hours = (self.duty_buffer_hours + duty_period.dt.total_seconds() / 3600).round(2)
+
+        return pd.DataFrame({
+            "outbound_flight_id": outbound_flights['flight_id'],
+            "inbound_flight_id": inbound_flights['flight_id'].astype('Int64'),
+            "outbound_departure_icao": outbound_flights['departure_icao'],
+            "outbound_arrival_icao": outbound_flights['arrival_icao'],
+            "inbound_departure_icao": inbound_flights['departure_icao'],
+            "inbound_arrival_icao": inbound_flights['arrival_icao'],
+            "aircraft_type": outbound_flights['aircraft_type'],
+            "aircraft_registration": outbound_flights['aircraft_registration'],
+            "flight_time_hours": flight_time_hours,
+            "duty_time_hours": duty_time_hours,
+            "scheduled_departure_utc": outbound_flights["scheduled_departure_utc"],
+            "scheduled_outbound_arrival_utc": outbound_flights["scheduled_arrival_utc"],
+            "scheduled_inbound_departure_utc": inbound_flights["scheduled_departure_utc"],
+            "scheduled_arrival_utc": inbound_flights["scheduled_arrival_utc"],
+            "flight_ids": [','.join(str(flight_id) for flight_id in pairing) for pairing in self.pairings],
+            'sector_count': sector_counts,
+            'captains_required': inbound_flights["captains_required"],
+            'first_officers_required': inbound_flights["first_officers_required"],
+            'cabin_crew_required': inbound_flights["cabin_crew_required"]
+        })
+
+    def generate_duties_for_unpaired_flights(self, flights_by_id_df):
+        """
+        Build one single-sector duty per unpaired flight
+
+        Args:
+            flights_by_id_df: Flights indexed by flight_id
+
+        Returns: DataFrame of single-sector duties, without duty ids
+        """
+        flight_ids = pd.Series(self.unpaired_flight_ids, dtype=flights_by_id_df.index.dtype)
+        flights = flights_by_id_df.loc[flight_ids].reset_index(drop=True)
+
+        # Compute the delta in hours between departure and arrival
+        flight_time_hours = flights["flight_time_hours"]
+        duty_time_hours = self.duty_buffer_hours + flights["flight_time_hours"]
+
+        return pd.DataFrame({
+            "outbound_flight_id": flight_ids,
+            "inbound_flight_id": pd.Series(pd.NA, index=flights.index, dtype='Int64'),
+            "outbound_departure_icao": flights['departure_icao'],
+            "outbound_arrival_icao": flights['arrival_icao'],
+            "inbound_departure_icao": flights['departure_icao'],
+            "inbound_arrival_icao": flights['arrival_icao'],
+            "aircraft_type": flights['aircraft_type'],
+            "aircraft_registration": flights['aircraft_registration'],
+            "flight_time_hours": flight_time_hours,
+            "duty_time_hours": duty_time_hours,
+            "scheduled_departure_utc": flights['scheduled_departure_utc'],
+            "scheduled_outbound_arrival_utc": pd.Series(pd.NaT, index=flights.index, dtype=flights['scheduled_arrival_utc'].dtype),
+            "scheduled_inbound_departure_utc": pd.Series(pd.NaT, index=flights.index, dtype=flights['scheduled_departure_utc'].dtype),
+            "scheduled_arrival_utc": flights['scheduled_arrival_utc'],
+            "flight_ids": flight_ids.astype(str),
+            'sector_count': 1,
+            'captains_required': flights["captains_required"],
+            'first_officers_required': flights["first_officers_required"],
+            'cabin_crew_required': flights["cabin_crew_required"]
+        })
 
     def find_return_flights(self, flights_df, require_same_aircraft=True):
         """
         Find flights that are return legs.
         Returns: List of (outbound_flight_id, inbound_flight_id)
+
+        Candidate return legs are indexed by route (and aircraft when required) with their
+        departure times sorted, so each outbound flight only binary searches its own route
+        for the turnaround window instead of scanning the whole flights table.
         """
-        max_turnaround_hours = 4  # Maximum time between landing and return departure
+        max_turnaround_ns = pd.Timedelta(hours=self.max_turnaround_hours).value
+
+        if len(flights_df) == 0:
+            return
 
-        for index, outbound_flight in flights_df.iterrows():
+        # Column arrays for positional access
+        flight_ids = flights_df['flight_id'].to_numpy()
+        departure_icaos = flights_df['departure_icao'].to_numpy()
+        arrival_icaos = flights_df['arrival_icao'].to_numpy()
+        aircraft_types = flights_df['aircraft_type'].to_numpy()
+        aircraft_registrations = flights_df['aircraft_registration'].to_numpy()
+        flight_time_hours = flights_df['flight_time_hours'].to_numpy()
+        departure_ns = flights_df['scheduled_departure_utc'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        arrival_ns = flights_df['scheduled_arrival_utc'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+        # Flights already paired (in this or a previous pass) can't be used as return legs
+        is_paired = pd.Series(flight_ids).isin(self.paired_flight_ids).to_numpy()
+
+        # Index candidate return legs by route key with chronologically sorted departures
+        route_index = self.build_route_index(departure_ns, departure_icaos, arrival_icaos,
+                                             aircraft_types, aircraft_registrations, require_same_aircraft)
+
+        for position in range(len(flights_df)):
             # Only consider flights that start from home base (LUX)
-            if outbound_flight['departure_icao'] != 'ELLX':
+            if departure_icaos[position] != self.home_base_icao:
                 continue
 
-            # Calculate the latest possible departure time for return flight
-            max_scheduled_departure_utc = outbound_flight['scheduled_arrival_utc'] + pd.Timedelta(hours=max_turnaround_hours)
+            # Return flights start where the outbound flight ended and go back to where it started
+            if require_same_aircraft:
+                route_key = (arrival_icaos[position], departure_icaos[position],
+                             aircraft_types[position], aircraft_registrations[position])
+            else:
+                route_key = (arrival_icaos[position], departure_icaos[position])
 
-            # Find return flights that:
-            return_flights = flights_df[
-                # Start from where the outbound_flight flight ended
-                (flights_df['departure_icao'] == outbound_flight['arrival_icao']) &
+            if route_key not in route_index:
+                continue
 
-                # Go back to where the outbound_flight flight started
-                (flights_df['arrival_icao'] == outbound_flight['departure_icao']) &
+            route_departures_ns, route_positions = route_index[route_key]
 
-                # Depart after the outbound_flight flight arrives
-                (flights_df['scheduled_departure_utc'] > outbound_flight['scheduled_arrival_utc']) &
+            # Return flights depart after the outbound flight arrives and within the turnaround window
+            first = np.searchsorted(route_departures_ns, arrival_ns[position], side='right')
+            last = np.searchsorted(route_departures_ns, arrival_ns[position] + max_turnaround_ns, side='right')
 
-                # Depart within the turnaround time window
-                (flights_df['scheduled_departure_utc'] <= max_scheduled_departure_utc) &
+            # Take the first chronological return flight that isn't paired yet
+            inbound_position = None
+            for candidate_position in route_positions[first:last]:
+                if not is_paired[candidate_position]:
+                    inbound_position = candidate_position
+                    break
 
-                # Dont pair an already paired flight
-                (flights_df['flight_id'].isin(self.paired_flight_ids) == False)
-            ]
+            if inbound_position is None:
+                continue
 
-            # Only add aircraft condition if needed
-            if require_same_aircraft:
-                return_flights = return_flights[
-                    # Use the same aircraft type
-                    (return_flights['aircraft_type'] == outbound_flight['aircraft_type']) &
+            # Check total duty period is not exceeded for the combination nof both flights
+            combined_flight_time_hours = flight_time_hours[position] + flight_time_hours[inbound_position]
+            combined_duty_time_hours = self.duty_buffer_hours + combined_flight_time_hours
 
-                    # Use the aircraft with the same registration number
-                    (return_flights['aircraft_registration'] == outbound_flight['aircraft_registration'])
-                ]
+            # Save paired flight ids
+            if combined_duty_time_hours < self.max_flight_duty_period_hours:
+                self.pairings.append((flight_ids[position], flight_ids[inbound_position]))
+                self.paired_flight_ids.add(flight_ids[position])
+                self.paired_flight_ids.add(flight_ids[inbound_position])
 
-            if len(return_flights) > 0:
-                # Take the first chronological return flight
-                inbound_flight = return_flights.sort_values('scheduled_departure_utc').iloc[0]
+                is_paired[position] = True
+                is_paired[inbound_position] = True
 
-                # Check total duty period is not exceeded for the combination nof both flights
-                combined_flight_time_hours = outbound_flight["flight_time_hours"] + inbound_flight["flight_time_hours"]
-                combined_duty_time_hours = self.duty_buffer_hours + combined_flight_time_hours
+    def build_route_index(self, departure_ns, departure_icaos, arrival_icaos,
+                          aircraft_types, aircraft_registrations, require_same_aircraft):
+        """
+        Group flight positions by (departure_icao, arrival_icao[, aircraft_type, registration])
 
-                # Save paired flight ids to array
-                if combined_duty_time_hours < self.max_flight_duty_period_hours:
-                    self.pairings.append((outbound_flight['flight_id'], inbound_flight['flight_id']))
-                    self.paired_flight_ids.append(outbound_flight['flight_id'])
-                    self.paired_flight_ids.append(inbound_flight['flight_id'])
+        Returns: Dictionary of route key -> (sorted departure times, flight positions in that order)
+        """
+        if require_same_aircraft:
+            route_keys = list(zip(departure_icaos, arrival_icaos, aircraft_types, aircraft_registrations))
+        else:
+            route_keys = list(zip(departure_icaos, arrival_icaos))
 
-    def find_unpaired_flights(self):
-        self.unpaired_flight_ids.clear()
+        # Stable sort keeps the original row order between flights departing at the same time
+        order = np.argsort(departure_ns, kind='stable')
 
-        for index, flight in self.flights_for_aircraft_df.iterrows():
-            if flight['flight_id'] not in self.paired_flight_ids:
-                self.unpaired_flight_ids.append(flight['flight_id'])
+        positions_by_route = {}
+        for position in order:
+            positions_by_route.setdefault(route_keys[position], []).append(position)
+
+        route_index = {}
+        for route_key, positions in positions_by_route.items():
+            positions = np.asarray(positions)
+            route_index[route_key] = (departure_ns[positions], positions)
+
+        return route_index
+
+    def find_unpaired_flights(self):
+        is_paired = self.flights_for_aircraft_df['flight_id'].isin(self.paired_flight_ids)
+        self.unpaired_flight_ids = self.flights_for_aircraft_df.loc[~is_paired, 'flight_id'].tolist()
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+
+class PriorRoster:
+    def __init__(self, prior_assignments_df):
+        """
+        Assignments of a previously published roster, to warm start the solver on a changed schedule
+
+        Duty ids are numbered when the duties are generated, so they shift with any schedule change. Prior
+        assignments are therefore matched on the crew member and the flights of the duty. Assignments whose duty was
+        cancelled or paired differently, or whose crew member can't fly the duty anymore, simply find no match.
+
+        Args:
+            prior_assignments_df: Roster in the layout of crew_schedule_output.csv, with at least the 'crew_id' and
+                                  'duty_flight_ids' columns
+        """
+        self.prior_keys = set(zip(prior_assignments_df['crew_id'].astype(str), prior_assignments_df['duty_flight_ids'].astype(str)))
+        self.number_of_assignments = len(self.prior_keys)
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls(pd.read_csv(path, dtype={'crew_id': str, 'duty_flight_ids': str}))
+
+    def prior_pairs(self, model_index, role_assignments):
+        """
+        Returns: Boolean array telling for every (crew, duty) pair of a role whether the prior roster assigned it
+        """
+        crew_ids = role_assignments.crew_ids.astype(str)
+        duty_flight_ids = model_index.duties_df['flight_ids'].astype(str).to_numpy()
+
+        return np.fromiter(((crew_ids[crew], duty_flight_ids[duty]) in self.prior_keys
+                            for crew, duty in zip(role_assignments.pair_crew.tolist(), role_assignments.pair_duty.tolist())),
+                           dtype=bool, count=role_assignments.number_of_pairs)
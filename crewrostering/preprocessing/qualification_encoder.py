@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+
+class QualificationEncoder:
+    def __init__(self, aircraft_types):
+        """
+        Encode comma-separated type qualifications as integer bitmasks
+
+        Every known aircraft type gets its own bit. 'ALL' sets every bit, including the sign bit that
+        aircraft types without a bit of their own map to, so those only match 'ALL' qualifications.
+
+        Args:
+            aircraft_types: Aircraft types that get a bit position (at most 63)
+        """
+        self.aircraft_types = sorted({aircraft_type for aircraft_type in aircraft_types if aircraft_type != 'ALL'})
+
+        if len(self.aircraft_types) > 63:
+            raise ValueError(f"Can't encode more than 63 aircraft types, got {len(self.aircraft_types)}")
+
+        self.type_bits = {aircraft_type: 1 << position for position, aircraft_type in enumerate(self.aircraft_types)}
+
+        # Sign bit for unknown aircraft types, all bits for 'ALL'
+        self.unknown_type_bit = np.iinfo(np.int64).min
+        self.all_types_mask = -1
+
+    @classmethod
+    def from_qualifications(cls, qualifications, aircraft_types=()):
+        """
+        Build an encoder knowing the given aircraft types plus every type named in the qualifications
+        """
+        qualified_types = {
+            aircraft_type.strip()
+            for qualification in pd.Series(qualifications).dropna().astype(str).unique()
+            for aircraft_type in qualification.split(',')
+        }
+
+        return cls(qualified_types.union(aircraft_types))
+
+    def encode(self, qualification):
+        """
+        Returns: Bitmask of the aircraft types in a comma-separated qualification string
+        """
+        if pd.isna(qualification):
+            return 0
+
+        mask = 0
+        for aircraft_type in str(qualification).split(','):
+            aircraft_type = aircraft_type.strip()
+
+            if aircraft_type == 'ALL':
+                return self.all_types_mask
+
+            mask |= self.type_bits.get(aircraft_type, 0)
+
+        return mask
+
+    def encode_series(self, qualifications):
+        """
+        Returns: int64 array of bitmasks, parsing every distinct qualification string once
+        """
+        qualifications = pd.Series(qualifications).astype(object)
+        masks = {qualification: self.encode(qualification) for qualification in qualifications.dropna().unique()}
+
+        # Plain lookup instead of Series.map, which would turn the masks into floats when values are missing
+        return np.array([masks.get(qualification, 0) for qualification in qualifications], dtype=np.int64)
+
+    def type_bit(self, aircraft_type):
+        return self.type_bits.get(aircraft_type, self.unknown_type_bit)
+
+    def type_bits_array(self, aircraft_types):
+        """
+        Returns: int64 array with the bit of each aircraft type
+        """
+        aircraft_types = pd.Series(aircraft_types).astype(object)
+        bits = {aircraft_type: self.type_bit(aircraft_type) for aircraft_type in aircraft_types.unique()}
+
+        return np.array([bits[aircraft_type] for aircraft_type in aircraft_types], dtype=np.int64)
+
+    def qualification_matrix(self, qualification_masks, aircraft_type_bits):
+        """
+        Boolean (crew x duty) matrix, True where the crew member is qualified for the duty's aircraft type
+        """
+        return (np.asarray(qualification_masks, dtype=np.int64)[:, None] & np.asarray(aircraft_type_bits, dtype=np.int64)[None, :]) != 0
@@ -1,8 +1,27 @@
-import time
-
 from ortools.sat.python import cp_model
+from ortools.sat.python.cp_model import LinearExpr
+import numpy as np
 import pandas as pd
 
+from crewrostering.preprocessing.historical_load_index import HistoricalLoadIndex
+from crewrostering.solvers.model_index import ModelIndex
+from crewrostering.solvers.solver_config import SolverConfig
+from crewrostering.solvers.solver_portfolio import SolverPortfolio, solve_model
+
+# Name prefix of the assignment variables per role
+VARIABLE_PREFIXES = {
+    'captains': 'capt',
+    'first_officers': 'fo',
+    'cabin_crew': 'cc'
+}
+
+# Role name reported with the extracted assignments
+CREW_ROLE_NAMES = {
+    'captains': 'Captain',
+    'first_officers': 'First Officer',
+    'cabin_crew': 'Cabin Crew'
+}
+
 class AircraftSatSolver():
     def __init__(self, aircraft_type, historical_flights_df):
         self.aircraft_type = aircraft_type
@@ -12,18 +31,6 @@ class AircraftSatSolver():
         self.historical_flights_df = historical_flights_df
         self.time_off_for_aircraft_df = None
 
-        # Dictionary to look up when each flight departs
-        self.duty_dates_lookup = {}
-
-        # Unique flight dates sorted chronologically
-        self.unique_duty_dates = []
-
-        # Dictionary to look up how many duty hours each flight takes
-        self.duty_time_hours_lookup = {}
-
-        # Dictionary to look up how many hours each flight takes
-        self.flight_time_hours_lookup = {}
-
         # Qualified staff for aircraft type
         self.qualified_captains_df = None
         self.qualified_first_officers_df = None
@@ -34,17 +41,17 @@ class AircraftSatSolver():
         self.feasible_first_officers = []
         self.feasible_cabin_crew = []
 
+        # Dense crew, duty and day ordinals with the decision variables stored per role
+        self.model_index = None
+
+        # Historical duty hours, flight hours and work days per crew member as prefix sums over days
+        self.historical_load_index = None
+
         # Create the CP-SAT model
         self.model = cp_model.CpModel()
 
-        # Decision variables will be stored here
-        self.x_captains_to_duties = {}
-        self.x_first_officers_to_duties = {}
-        self.x_cabin_crew_to_duties = {}
-
-        self.x_captains_worked_on_dates = {}
-        self.x_first_officers_worked_on_dates = {}
-        self.x_cabin_crew_worked_on_dates = {}
+        # Assignment variables the prior roster (if any) had set, their deviations can be penalized in the objective
+        self.prior_assignment_variables = []
 
         # Store assignments results (populated after solving)
         self.assignments = []
@@ -71,95 +78,154 @@ class AircraftSatSolver():
         self.feasible_first_officers = feasible_assignments_filter.feasible_first_officers
         self.feasible_cabin_crew = feasible_assignments_filter.feasible_cabin_crew
 
-        # Create a dictionary to quickly look up when each flight departs
-        self.duty_dates_lookup = self.duties_for_aircraft_df.set_index('duty_id')['scheduled_departure_utc'].dt.date.to_dict()
+        # Map crew, duties and dates to dense integers once for the whole model
+        self.model_index = ModelIndex(self.duties_for_aircraft_df,
+                                      {
+                                          'captains': self.qualified_captains_df,
+                                          'first_officers': self.qualified_first_officers_df,
+                                          'cabin_crew': self.qualified_cabin_crew_df
+                                      },
+                                      {
+                                          'captains': self.feasible_captains,
+                                          'first_officers': self.feasible_first_officers,
+                                          'cabin_crew': self.feasible_cabin_crew
+                                      })
+
+        # Aggregate the history once, with days numbered from the first schedule date like the day ordinals
+        self.historical_load_index = HistoricalLoadIndex(self.historical_flights_df,
+                                                         self.model_index.day_dates[0] if self.model_index.number_of_days else None)
+
+    def create_variables(self):
+        """
+        Create binary decision variables for feasible assignments
+        x[crew, duty] = 1 if crew assigned to flight, 0 otherwise, stored per role in pair order
+        """
+
+        number_of_variables = 0
 
-        # Get unique dates sorted chronologically
-        self.unique_duty_dates = sorted(self.duties_for_aircraft_df['scheduled_departure_utc'].dt.date.unique())
+        # Feasible pairs are already restricted to type-qualified crew by the bitmask check in the filter
+        for role, role_assignments in self.model_index.roles.items():
+            prefix = VARIABLE_PREFIXES[role]
+            crew_ids = role_assignments.crew_ids
+            duty_ids = self.model_index.duty_ids
+            day_dates = self.model_index.day_dates
 
-        # Create a dictionary to quickly look up how many duty hours each flight takes
-        self.duty_time_hours_lookup = self.duties_for_aircraft_df.set_index('duty_id')['duty_time_hours'].to_dict()
+            # Create variables for crew assignments
+            x_assignment_variables = [
+                self.model.NewBoolVar(f'{prefix}_{crew_ids[crew]}_f_{duty_ids[duty]}')
+                for crew, duty in zip(role_assignments.pair_crew.tolist(), role_assignments.pair_duty.tolist())
+            ]
 
-        # Create a dictionary to quickly look up how many hours each flight takes
-        self.flight_time_hours_lookup = self.duties_for_aircraft_df.set_index('duty_id')['flight_time_hours'].to_dict()
+            # Create "worked on date" variables only for crew-day cells with a candidate duty
+            # They are tied to the day's assignments by WorkedOnDayConstraint or CrewDayConstraint
+            x_worked_on_day_variables = []
 
-    def create_variables(self):
+            for crew, day, first_position, last_position in zip(role_assignments.crew_day_crew.tolist(),
+                                                                role_assignments.crew_day_day.tolist(),
+                                                                role_assignments.crew_day_indptr[:-1].tolist(),
+                                                                role_assignments.crew_day_indptr[1:].tolist()):
+                # A single candidate duty: working that day is the same as being assigned to it
+                if last_position - first_position == 1:
+                    x_worked_on_day_variables.append(x_assignment_variables[role_assignments.crew_day_pairs[first_position]])
+                    continue
+
+                x_worked_on_day_variables.append(self.model.NewBoolVar(f'worked_{crew_ids[crew]}_{day_dates[day]}'))
+                number_of_variables += 1
+
+            role_assignments.set_variables(x_assignment_variables, x_worked_on_day_variables)
+
+            number_of_variables += role_assignments.number_of_pairs
+
+        print(f"Added {number_of_variables} decision variables")
+
+    def add_prior_roster_hints(self, prior_roster):
         """
-        Create binary decision variables for feasible assignments
-        x[crew_id, duty_id] = 1 if crew assigned to flight, 0 otherwise
+        Hint every decision variable with its value in a prior roster, so the search starts from that roster
+
+        Prior assignments without a matching pair (cancelled or changed duties) are left out.
+
+        Args:
+            prior_roster: PriorRoster of a previously published roster
         """
+        pair_is_prior_by_role = {role: prior_roster.prior_pairs(self.model_index, role_assignments)
+                                 for role, role_assignments in self.model_index.roles.items()}
 
-        t = time.time()
+        number_of_hinted_assignments = self.add_assignment_hints(pair_is_prior_by_role)
 
-        # Pre-convert DataFrames to dictionaries for O(1) lookup
-        captains_dict = self.qualified_captains_df.set_index('crew_id').to_dict('index')
-        first_officers_dict = self.qualified_first_officers_df.set_index('crew_id').to_dict('index')
-        cabin_crew_dict = self.qualified_cabin_crew_df.set_index('crew_id').to_dict('index')
-        duties_dict = self.duties_for_aircraft_df.set_index('duty_id').to_dict('index')
+        for role, role_assignments in self.model_index.roles.items():
+            self.prior_assignment_variables.extend(role_assignments.variables_at(np.flatnonzero(pair_is_prior_by_role[role])))
 
-        # Create variables for captain assignments
-        for captain_id, duty_id in self.feasible_captains:
-            captain = captains_dict[captain_id]
-            duty = duties_dict[duty_id]
+        print(f"Hinted {number_of_hinted_assignments} of {prior_roster.number_of_assignments} prior assignments, "
+              f"{prior_roster.number_of_assignments - number_of_hinted_assignments} match no candidate assignment anymore")
 
-            if duty['aircraft_type'] in captain['qualifications'] or 'ALL' in captain['qualifications']:
-                self.x_captains_to_duties[captain_id, duty_id] = self.model.NewBoolVar(f'capt_{captain_id}_f_{duty_id}')
+    def add_assignment_hints(self, pair_is_assigned_by_role):
+        """
+        Hint every decision variable with its value in a roster given as the assigned pairs of every role
 
-        # Create variables for first officer assignments
-        for first_officer_id, duty_id in self.feasible_first_officers:
-            first_officer = first_officers_dict[first_officer_id]
-            duty = duties_dict[duty_id]
+        Pairs the roster doesn't hold are hinted 0, a crew-day cell is hinted as worked when one of its hinted
+        assignments is.
 
-            if duty['aircraft_type'] in first_officer['qualifications'] or 'ALL' in first_officer['qualifications']:
-                self.x_first_officers_to_duties[first_officer_id, duty_id] = self.model.NewBoolVar(f'fo_{first_officer_id}_f_{duty_id}')
+        Args:
+            pair_is_assigned_by_role: Boolean array per role telling for every (crew, duty) pair whether it is assigned
 
-        # Create variables for cabin crew assignments
-        for cabin_crew_id, duty_id in self.feasible_cabin_crew:
-            cabin_crew = cabin_crew_dict[cabin_crew_id]
-            duty = duties_dict[duty_id]
+        Returns: Number of hinted assignments
+        """
+        number_of_hinted_assignments = 0
 
-            if duty['aircraft_type'] in cabin_crew['qualifications'] or 'ALL' in cabin_crew['qualifications']:
-                self.x_cabin_crew_to_duties[cabin_crew_id, duty_id] = self.model.NewBoolVar(f'cc_{cabin_crew_id}_f_{duty_id}')
+        for role, role_assignments in self.model_index.roles.items():
+            pair_is_assigned = pair_is_assigned_by_role[role]
 
-        # Create "worked on date" variables for captains
-        for captain_id in self.qualified_captains_df['crew_id'].unique():
-            for date in self.unique_duty_dates:
-                self.x_captains_worked_on_dates[captain_id, date] = self.model.NewBoolVar(f'worked_{captain_id}_{date}')
+            for x_assignment_variable, is_assigned in zip(role_assignments.assignment_variables, pair_is_assigned.tolist()):
+                self.model.AddHint(x_assignment_variable, is_assigned)
 
-        # Create "worked on date" variables for first officers
-        for first_officer_id in self.qualified_first_officers_df['crew_id'].unique():
-            for date in self.unique_duty_dates:
-                self.x_first_officers_worked_on_dates[first_officer_id, date] = self.model.NewBoolVar(f'worked_{first_officer_id}_{date}')
+            number_of_hinted_assignments += int(pair_is_assigned.sum())
 
-        # Create "worked on date" variables for cabin crew
-        for cabin_crew_id in self.qualified_cabin_crew_df['crew_id'].unique():
-            for date in self.unique_duty_dates:
-                self.x_cabin_crew_worked_on_dates[cabin_crew_id, date] = self.model.NewBoolVar(f'worked_{cabin_crew_id}_{date}')
+            # Cells with a single pair share the assignment variable, which is hinted already
+            cell_sizes = np.diff(role_assignments.crew_day_indptr)
+            cell_is_worked = np.logical_or.reduceat(pair_is_assigned[role_assignments.crew_day_pairs], role_assignments.crew_day_indptr[:-1])
 
-        print(f"Added {len(self.x_captains_to_duties) + len(self.x_first_officers_to_duties) + len(self.x_cabin_crew_to_duties) +
-            len(self.x_captains_worked_on_dates) + len(self.x_first_officers_worked_on_dates) + len(self.x_cabin_crew_worked_on_dates)} "
-            f"decision variables")
-        print(f"Create variables: {time.time() - t:.2f}s")
+            for crew_day in np.flatnonzero(cell_sizes > 1).tolist():
+                self.model.AddHint(role_assignments.worked_on_day_variables[crew_day], bool(cell_is_worked[crew_day]))
 
-    def add_objective_balance_workload(self):
+        return number_of_hinted_assignments
+
+    def add_objective_balance_workload(self, deviation_weight=0):
         """
         Objective: indirectly balances workload by preferring solutions with fewer total assignments
+
+        Args:
+            deviation_weight: Cost of every prior roster assignment that is given up, 0 doesn't penalize deviations
         """
-        total_assignments = (sum(self.x_captains_to_duties.values()) + sum(self.x_first_officers_to_duties.values()) + sum(self.x_cabin_crew_to_duties.values()))
+        total_assignments = LinearExpr.Sum([
+            x_assignment_variable
+            for role_assignments in self.model_index.roles.values()
+            for x_assignment_variable in role_assignments.assignment_variables
+        ])
+
+        # Every duty keeps its required crew, so giving up a prior assignment always means assigning someone else
+        if deviation_weight and self.prior_assignment_variables:
+            given_up_prior_assignments = len(self.prior_assignment_variables) - LinearExpr.Sum(self.prior_assignment_variables)
+            self.model.Minimize(total_assignments + deviation_weight * given_up_prior_assignments)
+            return
 
         self.model.Minimize(total_assignments)
 
-    def solve(self):
+    def solve(self, solver_config=None):
         """
         Solve the optimization problem
+
+        Args:
+            solver_config: SolverConfig with the search settings, its portfolio (if any) is raced in separate processes
         """
+        solver_config = solver_config or SolverConfig()
 
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 3600
-        solver.parameters.log_search_progress = True
-        solver.parameters.num_search_workers = 8  # Use multiple cores
+        if solver_config.portfolio:
+            result = SolverPortfolio(solver_config.portfolio_configs()).solve(self.model)
+            print(f"Portfolio winner: {result.name}")
+        else:
+            result = solve_model(self.model, solver_config)
 
-        status = solver.Solve(self.model)
+        status = result.status
 
         # Status mapping
         status_map = {
@@ -173,42 +239,34 @@ class AircraftSatSolver():
         status_string = status_map.get(status, cp_model.UNKNOWN)
 
         # Extract solution
-        all_assignments = []
+        pair_is_assigned_by_role = {}
 
-        if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-            # Extract captain assignments
-            all_assignments.extend(
-                self._extract_assignments_for_crew_type(
-                    solver, self.x_captains_to_duties, self.qualified_captains_df, 'Captain'
-                )
-            )
+        if result.has_solution:
+            pair_is_assigned_by_role = {role: result.solution_values[role_assignments.assignment_variable_indices] == 1
+                                        for role, role_assignments in self.model_index.roles.items()}
 
-            # Extract first officer assignments
-            all_assignments.extend(
-                self._extract_assignments_for_crew_type(
-                    solver, self.x_first_officers_to_duties, self.qualified_first_officers_df, 'First Officer'
-                )
-            )
+        return status_string, self.assignments_dataframe(pair_is_assigned_by_role)
 
-            # Extract cabin crew assignments
+    def assignments_dataframe(self, pair_is_assigned_by_role):
+        """
+        Returns: DataFrame with a row per assigned (crew, duty) pair of every role in pair_is_assigned_by_role
+        """
+        all_assignments = []
+
+        for role, pair_is_assigned in pair_is_assigned_by_role.items():
             all_assignments.extend(
-                self._extract_assignments_for_crew_type(
-                    solver, self.x_cabin_crew_to_duties, self.qualified_cabin_crew_df, 'Cabin Crew'
-                )
+                self._extract_assignments_for_crew_type(pair_is_assigned, self.model_index.roles[role], CREW_ROLE_NAMES[role])
             )
 
-        assignments_dataframe = pd.DataFrame(all_assignments)
-
-        return status_string, assignments_dataframe
+        return pd.DataFrame(all_assignments)
 
-    def _extract_assignments_for_crew_type(self, solver, x_crew_assignments, crew_dataframe, crew_role):
+    def _extract_assignments_for_crew_type(self, pair_is_assigned, role_assignments, crew_role):
         """
         Extract assigned duties for a specific crew type from the solved model
 
         Args:
-            solver: The solved CP-SAT solver
-            x_crew_assignments: Dictionary of (crew_id, duty_id) -> BoolVar assignments
-            crew_dataframe: DataFrame of crew members for this type
+            pair_is_assigned: Boolean array telling for every (crew, duty) pair of the role whether it is assigned
+            role_assignments: RoleAssignments with the pairs of this crew type
             crew_role: String describing the role (e.g., 'Captain', 'First Officer', 'Cabin Crew')
 
         Returns:
@@ -217,36 +275,38 @@ class AircraftSatSolver():
 
         assignments = []
 
-        for (crew_id, duty_id), assignment_variable in x_crew_assignments.items():
-            if solver.Value(assignment_variable) == 1:
-                crew_info = crew_dataframe[crew_dataframe['crew_id'] == crew_id].iloc[0]
-                duty_info = self.duties_for_aircraft_df[self.duties_for_aircraft_df['duty_id'] == duty_id].iloc[0]
-
-                assignments.append({
-                    'crew_id': crew_id,
-                    'duty_id': duty_id,
-                    'crew_role': crew_role,
-                    'crew_purser': crew_info['purser'],
-                    'duty_scheduled_departure_utc': duty_info['scheduled_departure_utc'],
-                    'duty_scheduled_outbound_arrival_utc': duty_info['scheduled_outbound_arrival_utc'],
-                    'duty_scheduled_inbound_departure_utc': duty_info['scheduled_inbound_departure_utc'],
-                    "duty_scheduled_arrival_utc": duty_info["scheduled_arrival_utc"],
-                    'duty_aircraft_type': duty_info['aircraft_type'],
-                    'duty_flight_time_hours': duty_info['flight_time_hours'],
-                    'duty_time_hours': duty_info['duty_time_hours'],
-                    "duty_outbound_flight_id": duty_info['outbound_flight_id'],
-                    "duty_inbound_flight_id": duty_info['inbound_flight_id'],
-                    "duty_outbound_departure_icao": duty_info['outbound_departure_icao'],
-                    "duty_outbound_arrival_icao": duty_info['outbound_arrival_icao'],
-                    "duty_inbound_departure_icao": duty_info['inbound_departure_icao'],
-                    "duty_inbound_arrival_icao": duty_info['inbound_arrival_icao'],
-                    "duty_aircraft_registration": duty_info['aircraft_registration'],
-                    'duty_sector_count': duty_info['sector_count'],
-                    'duty_captains_required': duty_info["captains_required"],
-                    'duty_first_officers_required': duty_info["first_officers_required"],
-                    'duty_cabin_crew_required': duty_info["cabin_crew_required"],
-                    'crew_qualifications': crew_info['qualifications'],
-                    'crew_seniority': crew_info['seniority']
-                })
+        duties_df = self.model_index.duties_df
+
+        for crew, duty in zip(role_assignments.pair_crew[pair_is_assigned].tolist(), role_assignments.pair_duty[pair_is_assigned].tolist()):
+            crew_info = role_assignments.crew_df.iloc[crew]
+            duty_info = duties_df.iloc[duty]
+
+            assignments.append({
+                'crew_id': crew_info['crew_id'],
+                'duty_id': duty_info['duty_id'],
+                'crew_role': crew_role,
+                'crew_purser': crew_info['purser'],
+                'duty_scheduled_departure_utc': duty_info['scheduled_departure_utc'],
+                'duty_scheduled_outbound_arrival_utc': duty_info['scheduled_outbound_arrival_utc'],
+                'duty_scheduled_inbound_departure_utc': duty_info['scheduled_inbound_departure_utc'],
+                "duty_scheduled_arrival_utc": duty_info["scheduled_arrival_utc"],
+                'duty_aircraft_type': duty_info['aircraft_type'],
+                'duty_flight_time_hours': duty_info['flight_time_hours'],
+                'duty_time_hours': duty_info['duty_time_hours'],
+                "duty_outbound_flight_id": duty_info['outbound_flight_id'],
+                "duty_inbound_flight_id": duty_info['inbound_flight_id'],
+                "duty_outbound_departure_icao": duty_info['outbound_departure_icao'],
+                "duty_outbound_arrival_icao": duty_info['outbound_arrival_icao'],
+                "duty_inbound_departure_icao": duty_info['inbound_departure_icao'],
+                "duty_inbound_arrival_icao": duty_info['inbound_arrival_icao'],
+                "duty_aircraft_registration": duty_info['aircraft_registration'],
+                'duty_sector_count': duty_info['sector_count'],
+                'duty_flight_ids': duty_info['flight_ids'],
+                'duty_captains_required': duty_info["captains_required"],
+                'duty_first_officers_required': duty_info["first_officers_required"],
+                'duty_cabin_crew_required': duty_info["cabin_crew_required"],
+                'crew_qualifications': crew_info['qualifications'],
+                'crew_seniority': crew_info['seniority']
+            })
 
         return assignments
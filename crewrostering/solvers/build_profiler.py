@@ -0,0 +1,128 @@
+import contextlib
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+
+class BuildProfiler:
+    def __init__(self, enabled=False):
+        """
+        Wall time of every pipeline stage and constraint family, and with profiling enabled a full report
+
+        Every stage prints its wall time. When enabled, a stage also records its CPU time, its peak traced memory
+        (tracemalloc, started here), the variables and constraints it added to the CP-SAT model and the size of the
+        model proto after it, for a JSON report and a table. Stages nest, a stage opened inside another one is
+        reported below it with a deeper indentation. tracemalloc only sees Python allocations, the model proto itself
+        lives in C++ memory and shows up in the model size instead.
+
+        Args:
+            enabled: Record the full report, tracing memory slows the build down so it is off by default
+        """
+        self.enabled = enabled
+
+        # One dictionary per stage, in the order the stages were opened
+        self.records = []
+
+        # Peak traced memory seen so far by every open stage, tracemalloc only keeps a single peak
+        self._open_stage_peaks = []
+
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name, model=None):
+        """
+        Time the body of a with statement as a stage
+
+        Args:
+            name: Stage name, printed with the wall time
+            model: CpModel the stage adds variables or constraints to, if any
+        """
+        t = time.time()
+
+        if not self.enabled:
+            try:
+                yield
+            finally:
+                print(f"{name}: {time.time() - t:.2f}s")
+            return
+
+        record = {'name': name, 'depth': len(self._open_stage_peaks)}
+        self.records.append(record)
+
+        # Keep the peak of the enclosing stage before the peak is reset for this one
+        if self._open_stage_peaks:
+            self._open_stage_peaks[-1] = max(self._open_stage_peaks[-1], tracemalloc.get_traced_memory()[1])
+
+        tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        self._open_stage_peaks.append(start_memory)
+
+        model_proto = model.Proto() if model is not None else None
+        if model_proto is not None:
+            number_of_variables = len(model_proto.variables)
+            number_of_constraints = len(model_proto.constraints)
+
+        cpu_time = time.process_time()
+        t = time.time()
+        failed = True
+
+        # A stage that raises is still recorded (and its peak closed), up to where it failed
+        try:
+            yield
+            failed = False
+        finally:
+            wall_seconds = time.time() - t
+            cpu_seconds = time.process_time() - cpu_time
+
+            peak_memory = max(self._open_stage_peaks.pop(), tracemalloc.get_traced_memory()[1])
+            if self._open_stage_peaks:
+                self._open_stage_peaks[-1] = max(self._open_stage_peaks[-1], peak_memory)
+
+            record['wall_seconds'] = wall_seconds
+            record['cpu_seconds'] = cpu_seconds
+            record['peak_memory_mb'] = (peak_memory - start_memory) / 1024 ** 2
+            record['failed'] = failed
+
+            if model_proto is not None:
+                record['variables_added'] = len(model_proto.variables) - number_of_variables
+                record['constraints_added'] = len(model_proto.constraints) - number_of_constraints
+                record['model_proto_size_mb'] = self.model_proto_size_mb(model)
+
+            print(f"{name}: {wall_seconds:.2f}s{' (failed)' if failed else ''}")
+
+    @staticmethod
+    def model_proto_size_mb(model):
+        """
+        Returns: Size of the model as a binary proto in MB, the Python proto has no serialized size so it is exported
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'model.pb')
+            model.ExportToFile(path)
+
+            return os.path.getsize(path) / 1024 ** 2
+
+    def report(self):
+        """
+        Returns: Dictionary with the stage records, for the JSON report
+        """
+        return {'stages': self.records}
+
+    def write_json(self, path):
+        with open(path, 'w') as report_file:
+            json.dump(self.report(), report_file, indent=2)
+
+    def print_table(self):
+        print(f"{'stage':<60} {'wall':>9} {'cpu':>9} {'peak memory':>12} {'+variables':>11} {'+constraints':>13} {'model size':>11}")
+
+        for record in self.records:
+            model_columns = (f"{record['variables_added']:>11} {record['constraints_added']:>13} "
+                             if 'variables_added' in record else f"{'':>11} {'':>13} ")
+            model_size = f"{record['model_proto_size_mb']:>8.1f} MB" if record.get('model_proto_size_mb') is not None else ''
+
+            name = record['name'] + (' (failed)' if record.get('failed') else '')
+
+            print(f"{'  ' * record['depth'] + name:<60} {record['wall_seconds']:>8.2f}s {record['cpu_seconds']:>8.2f}s "
+                  f"{record['peak_memory_mb']:>9.1f} MB {model_columns}{model_size}")
@@ -0,0 +1,111 @@
+import multiprocessing
+
+import pandas as pd
+
+from crewrostering.solvers.solver_config import SolverConfig
+
+# Scheduler, filter, components and solver config of the decomposed solve, set before the pool forks and inherited by the workers
+_solve_context = None
+
+# Solve statuses from the worst to the best, the status of the decomposed solve is the worst one of its components
+STATUS_ORDER = ['Invalid', 'Infeasible', 'Unknown', 'Feasible', 'Optimal']
+
+
+def _solve_component_task(position):
+    """
+    Worker: build and solve one component on the (forked copy of the) scheduler
+
+    Returns: (component position, status, assignments DataFrame, profiler records of the component)
+    """
+    crew_scheduler, aircraft_type, feasible_assignments_filter, components, solver_config = _solve_context
+
+    # Pool workers are daemonic and can't start worker processes of their own
+    crew_scheduler.constraint_workers = 1
+
+    number_of_records = len(crew_scheduler.profiler.records)
+
+    status, assignments = crew_scheduler.solve_component(aircraft_type, feasible_assignments_filter, components[position],
+                                                         component_solver_config(solver_config, position))
+
+    return position, status, assignments, crew_scheduler.profiler.records[number_of_records:]
+
+
+def component_solver_config(solver_config, position):
+    """
+    Returns: The solver config of one component, logging to its own file
+    """
+    if solver_config.log_file is None:
+        return solver_config
+
+    component_config = SolverConfig(**solver_config.to_dict())
+    component_config.log_file = solver_config.log_path(f"_component_{position}")
+
+    return component_config
+
+
+def has_solution(status):
+    return status in ('Optimal', 'Feasible')
+
+
+class ComponentSolver:
+    def __init__(self, number_of_workers=1):
+        """
+        Builds and solves independent components of the crew-duty eligibility graph as separate models
+
+        Every worker process inherits the scheduler with the filtered assignments, builds the model of one component
+        and solves it. The largest components are started first. A component without solution means the whole
+        roster has none, so the remaining components are then cancelled.
+
+        Args:
+            number_of_workers: Number of worker processes, 1 solves the components one after another in this process
+        """
+        self.number_of_workers = number_of_workers
+
+    def solve(self, crew_scheduler, aircraft_type, feasible_assignments_filter, components, solver_config):
+        """
+        Solve every EligibilityComponent with crew_scheduler.solve_component
+
+        Returns: (status, assignments DataFrame) like AircraftSatSolver.solve, with the assignments of all components
+                 in component order
+        """
+        number_of_workers = min(self.number_of_workers, len(components))
+        results = [None] * len(components)
+
+        # Workers inherit the scheduler by forking, without fork (e.g. on Windows) the components are solved here
+        if number_of_workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            for position, component in enumerate(components):
+                results[position] = crew_scheduler.solve_component(aircraft_type, feasible_assignments_filter, component,
+                                                                   component_solver_config(solver_config, position))
+
+                if not has_solution(results[position][0]):
+                    break
+        else:
+            global _solve_context
+            _solve_context = (crew_scheduler, aircraft_type, feasible_assignments_filter, components,
+                              solver_config.shared_between(number_of_workers))
+
+            positions = sorted(range(len(components)), key=lambda position: components[position].number_of_pairs, reverse=True)
+
+            try:
+                with multiprocessing.get_context('fork').Pool(number_of_workers) as pool:
+                    for position, status, assignments, records in pool.imap_unordered(_solve_component_task, positions):
+                        results[position] = (status, assignments)
+                        crew_scheduler.profiler.records.extend(records)
+
+                        # Leaving the pool terminates the components still running
+                        if not has_solution(status):
+                            break
+            finally:
+                _solve_context = None
+
+        statuses = [result[0] for result in results if result is not None]
+
+        # No component means no variables, which the monolithic model solves trivially
+        status = min(statuses, key=STATUS_ORDER.index) if statuses else 'Optimal'
+
+        if not has_solution(status):
+            return status, pd.DataFrame()
+
+        component_assignments = [assignments for _, assignments in results if not assignments.empty]
+
+        return status, pd.concat(component_assignments, ignore_index=True) if component_assignments else pd.DataFrame()
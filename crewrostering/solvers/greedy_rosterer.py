@@ -0,0 +1,268 @@
+import numpy as np
+
+# Rolling hour limits of MaxHoursRollingPeriodConstraint: (regulation, window days, 'duty' or 'flight' hours)
+ROLLING_HOUR_LIMITS = [
+    ('max_duty_time_hours_7_days', 7, 'duty'),
+    ('max_duty_time_hours_28_days', 28, 'duty'),
+    ('max_flight_time_hours_28_days', 28, 'flight')
+]
+
+# Calendar flight hour limits of FlightTimeHoursPeriodConstraint: (regulation, crew column with the hours already flown)
+PERIOD_FLIGHT_HOUR_LIMITS = [
+    ('max_flight_time_hours_year', 'current_calendar_year_flight_time_hours'),
+    ('max_flight_time_hours_12_months', 'last_11_calendar_months_flight_time_hours')
+]
+
+# Days of the rolling period the rest days are counted in, as in MinWeeklyRestDaysConstraint
+REST_PERIOD_DAYS = 14
+
+
+def first_window_days(day_numbers, window_days):
+    """
+    Windows start on every schedule day and span window_days calendar days, so the windows holding a day start on
+    consecutive day ordinals ending at that day
+
+    Returns: For every day ordinal the first day ordinal whose window holds it
+    """
+    return np.searchsorted(day_numbers, day_numbers - (window_days - 1), side='left')
+
+
+class CrewLoads:
+    def __init__(self, model_index, historical_load_index, role_assignments, regulations_dict):
+        """
+        Loads of the crew of one role under a roster built duty by duty, kept per limit so that checking and adding
+        an assignment only touches the counters of its crew member
+
+        Every limit is counted like its constraint class counts it, hours in hundredths and truncated:
+        - no overlapping duties (duties touching at one minute don't overlap)
+        - sectors and flight duty period hours per crew member and departure day
+        - duty and flight hours of every rolling window starting on a schedule day, including the history of the
+          days before it
+        - flight hours of the calendar year and the last 12 months on top of the hours already flown
+        - worked days of every rest period starting on a schedule day, including the worked days of the history
+
+        Args:
+            model_index: ModelIndex of the duties and candidate pairs
+            historical_load_index: HistoricalLoadIndex with days numbered from the first schedule date
+            role_assignments: RoleAssignments of the role
+            regulations_dict: EASA limits as loaded by FlightDataPreprocessor
+        """
+        self.model_index = model_index
+        number_of_crew = role_assignments.number_of_crew
+        number_of_days = model_index.number_of_days
+        day_numbers = model_index.day_numbers
+        crew_ids = role_assignments.crew_ids.tolist()
+
+        # Duty times in minutes shared with the overlap constraints, duties without duration never overlap
+        self.duty_start_minutes = model_index.duty_start_minutes
+        self.duty_end_minutes = model_index.duty_end_minutes
+        self.busy_until_minutes = np.full(number_of_crew, np.iinfo(np.int64).min, dtype=np.int64)
+
+        # Sectors and flight duty period hours per crew member and day ordinal
+        self.max_sectors_day = int(regulations_dict['max_sectors_day'])
+        self.max_shift_hours_scaled = int(regulations_dict['max_flight_duty_period_hours'] * 100)
+        self.day_sectors = np.zeros((number_of_crew, number_of_days), dtype=np.int64)
+        self.day_duty_hours_scaled = np.zeros((number_of_crew, number_of_days), dtype=np.int64)
+
+        # Rolling windows: (hours per duty ordinal, first window day per day ordinal, load per crew member and window
+        # start day starting from the history, limit)
+        self.rolling_windows = []
+
+        for regulation, window_days, duty_or_flight_mode in ROLLING_HOUR_LIMITS:
+            window_loads = np.zeros((number_of_crew, number_of_days), dtype=np.int64)
+
+            for crew, crew_id in enumerate(crew_ids):
+                crew_prefix_sums = historical_load_index.crew_prefix_sums(crew_id, duty_or_flight_mode)
+                window_loads[crew] = historical_load_index.range_loads(crew_prefix_sums, day_numbers - (window_days - 1), day_numbers - 1)
+
+            hours_scaled = model_index.duty_time_hours_scaled if duty_or_flight_mode == 'duty' else model_index.flight_time_hours_scaled
+
+            self.rolling_windows.append((hours_scaled, first_window_days(day_numbers, window_days), window_loads,
+                                         int(regulations_dict[regulation] * 100)))
+
+        # Flight hours left per crew member in every calendar period
+        self.period_flight_hours_left_scaled = []
+
+        for regulation, hours_already_flown_column in PERIOD_FLIGHT_HOUR_LIMITS:
+            hours_remaining = regulations_dict[regulation] - role_assignments.crew_df[hours_already_flown_column].to_numpy(dtype=float)
+            self.period_flight_hours_left_scaled.append((hours_remaining * 100).astype(np.int64))
+
+        # Worked days per crew member and rest period start day, starting from the history before day 0
+        self.first_rest_period_day = first_window_days(day_numbers, REST_PERIOD_DAYS)
+        self.rest_period_work_days = np.zeros((number_of_crew, number_of_days), dtype=np.int64)
+        self.max_work_days = int(REST_PERIOD_DAYS - regulations_dict['min_weekly_rest_days'])
+
+        for crew, crew_id in enumerate(crew_ids):
+            crew_prefix_sums = historical_load_index.crew_prefix_sums(crew_id, 'work_days')
+            self.rest_period_work_days[crew] = historical_load_index.range_loads(crew_prefix_sums, day_numbers - (REST_PERIOD_DAYS - 1),
+                                                                                 np.full(number_of_days, -1, dtype=np.int64))
+
+        # Duty hours rostered so far, to spread the duties over the crew working as many days
+        self.rostered_duty_hours_scaled = np.zeros(number_of_crew, dtype=np.int64)
+
+    def can_fly(self, crews, duty):
+        """
+        Returns: Boolean array telling for every crew ordinal whether the duty keeps them within every limit
+        """
+        model_index = self.model_index
+        day = model_index.duty_day[duty]
+
+        can_fly = ((self.day_sectors[crews, day] + model_index.sector_count[duty] <= self.max_sectors_day)
+                   & (self.day_duty_hours_scaled[crews, day] + model_index.duty_time_hours_scaled[duty] <= self.max_shift_hours_scaled))
+
+        if self.duty_end_minutes[duty] > self.duty_start_minutes[duty]:
+            can_fly &= self.busy_until_minutes[crews] <= self.duty_start_minutes[duty]
+
+        for hours_left_scaled in self.period_flight_hours_left_scaled:
+            can_fly &= model_index.flight_time_hours_scaled[duty] <= hours_left_scaled[crews]
+
+        for hours_scaled, first_window_day, window_loads, max_hours_scaled in self.rolling_windows:
+            can_fly &= window_loads[crews, first_window_day[day]:day + 1].max(axis=1) + hours_scaled[duty] <= max_hours_scaled
+
+        # Only a first duty of the day adds a worked day
+        adds_work_day = self.day_sectors[crews, day] == 0
+        can_fly &= ~adds_work_day | (self.rest_period_work_days[crews, self.first_rest_period_day[day]:day + 1].max(axis=1) < self.max_work_days)
+
+        return can_fly
+
+    def add(self, crew, duty):
+        """
+        Add the loads of an assignment of the duty to the crew ordinal
+        """
+        model_index = self.model_index
+        day = model_index.duty_day[duty]
+
+        if self.day_sectors[crew, day] == 0:
+            self.rest_period_work_days[crew, self.first_rest_period_day[day]:day + 1] += 1
+
+        self.day_sectors[crew, day] += model_index.sector_count[duty]
+        self.day_duty_hours_scaled[crew, day] += model_index.duty_time_hours_scaled[duty]
+
+        if self.duty_end_minutes[duty] > self.duty_start_minutes[duty]:
+            self.busy_until_minutes[crew] = max(self.busy_until_minutes[crew], self.duty_end_minutes[duty])
+
+        for hours_left_scaled in self.period_flight_hours_left_scaled:
+            hours_left_scaled[crew] -= model_index.flight_time_hours_scaled[duty]
+
+        for hours_scaled, first_window_day, window_loads, max_hours_scaled in self.rolling_windows:
+            window_loads[crew, first_window_day[day]:day + 1] += hours_scaled[duty]
+
+        self.rostered_duty_hours_scaled[crew] += model_index.duty_time_hours_scaled[duty]
+
+    def preference_order(self, crews, duty):
+        """
+        Rest days bind first when duties are spread thin, so crew already working the day of the duty come first,
+        then those with the fewest worked days in the rest periods holding that day and then the fewest duty hours
+
+        Returns: Positions of crews from the most to the least preferred
+        """
+        day = self.model_index.duty_day[duty]
+
+        adds_work_day = self.day_sectors[crews, day] == 0
+        rest_period_work_days = self.rest_period_work_days[crews, self.first_rest_period_day[day]:day + 1].max(axis=1)
+
+        return np.lexsort((self.rostered_duty_hours_scaled[crews], rest_period_work_days, adds_work_day))
+
+
+class GreedyRosterer:
+    def __init__(self, solver, regulations_dict):
+        """
+        Constructive roster without search: duties are taken in departure order and each one gets the preferred
+        candidates (see CrewLoads.preference_order) that can still fly it, cabin crew starting with a purser
+
+        CrewLoads tracks every limit of the constraint classes incrementally, so a roster covering all duties is a
+        solution of the CP-SAT model. Choices are never revised, so a duty can stay uncovered where the model would
+        cover it by rostering the earlier duties differently. Under the plain assignment-count objective
+        (deviation_weight 0) a complete greedy roster is also optimal, as the coverage constraints fix that count; the
+        prior-roster deviation terms added with a deviation_weight are not considered, so there it is only feasible.
+
+        Args:
+            solver: AircraftSatSolver after initialize_data, its model index and historical load index are used and no
+                    variables are needed
+            regulations_dict: EASA limits as loaded by FlightDataPreprocessor
+        """
+        self.solver = solver
+        self.regulations_dict = regulations_dict
+
+        # Boolean array per role telling for every (crew, duty) pair whether the roster assigns it
+        self.pair_is_assigned_by_role = {}
+
+        # Duty ordinals per role whose required crew or purser couldn't be rostered
+        self.uncovered_duties = {}
+
+    def roster(self):
+        """
+        Roster every role, duty by duty in departure order
+
+        Returns: Boolean array per role telling for every (crew, duty) pair whether it is assigned
+        """
+        model_index = self.solver.model_index
+
+        duty_order = np.lexsort((model_index.arrival_utc, model_index.departure_utc)).tolist()
+
+        for role, role_assignments in model_index.roles.items():
+            crew_loads = CrewLoads(model_index, self.solver.historical_load_index, role_assignments, self.regulations_dict)
+            crew_required = model_index.crew_required[role].tolist()
+            needs_purser = role == 'cabin_crew'
+
+            pair_is_assigned = np.zeros(role_assignments.number_of_pairs, dtype=bool)
+            uncovered_duties = []
+
+            for duty in duty_order:
+                pair_positions = role_assignments.pairs_of_duty(duty)
+
+                # Like the coverage constraints, duties without candidates are left out
+                if len(pair_positions) == 0:
+                    continue
+
+                crews = role_assignments.pair_crew[pair_positions]
+                can_fly = crew_loads.can_fly(crews, duty)
+
+                candidates = np.flatnonzero(can_fly)
+                candidates = candidates[crew_loads.preference_order(crews[candidates], duty)]
+
+                if needs_purser and role_assignments.pair_is_purser[pair_positions].any():
+                    candidate_is_purser = role_assignments.pair_is_purser[pair_positions[candidates]]
+
+                    if not candidate_is_purser.any():
+                        uncovered_duties.append(duty)
+                        continue
+
+                    # The preferred purser, then the others in order of preference
+                    first_purser = np.argmax(candidate_is_purser)
+                    candidates = np.concatenate(([candidates[first_purser]], np.delete(candidates, first_purser)))
+
+                # A duty that can't be fully crewed takes nobody, leaving the candidates for later duties
+                if len(candidates) < crew_required[duty]:
+                    uncovered_duties.append(duty)
+                    continue
+
+                for candidate in candidates[:crew_required[duty]].tolist():
+                    crew_loads.add(crews[candidate], duty)
+                    pair_is_assigned[pair_positions[candidate]] = True
+
+            self.pair_is_assigned_by_role[role] = pair_is_assigned
+            self.uncovered_duties[role] = uncovered_duties
+
+        return self.pair_is_assigned_by_role
+
+    def number_of_uncovered_duties(self):
+        return sum(len(uncovered_duties) for uncovered_duties in self.uncovered_duties.values())
+
+    def solve(self):
+        """
+        Roster the duties greedily
+
+        Returns: (status, assignments DataFrame) like AircraftSatSolver.solve, 'Feasible' when every duty is covered
+                 and 'Unknown' without assignments otherwise
+        """
+        self.roster()
+
+        number_of_uncovered_duties = self.number_of_uncovered_duties()
+
+        if number_of_uncovered_duties:
+            print(f"Greedy roster left {number_of_uncovered_duties} duty roles uncovered: "
+                  f"{', '.join(f'{role} {len(duties)}' for role, duties in self.uncovered_duties.items())}")
+            return 'Unknown', self.solver.assignments_dataframe({})
+
+        return 'Feasible', self.solver.assignments_dataframe(self.pair_is_assigned_by_role)
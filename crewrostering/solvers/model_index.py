@@ -0,0 +1,203 @@
+import numpy as np
+
+# Roles in the order the solver and the constraints process them
+ROLES = ('captains', 'first_officers', 'cabin_crew')
+
+
+def build_indptr(ordinals, number_of_ordinals):
+    """
+    Returns: CSR row pointer array for entries grouped by the given ordinals
+    """
+    indptr = np.zeros(number_of_ordinals + 1, dtype=np.int64)
+    np.cumsum(np.bincount(ordinals, minlength=number_of_ordinals), out=indptr[1:])
+
+    return indptr
+
+
+def read_only(array):
+    """
+    Returns: The array, flagged read-only so constraints sharing the index can't modify it
+    """
+    array.flags.writeable = False
+
+    return array
+
+
+class RoleAssignments:
+    def __init__(self, role, qualified_crew_df, feasible_pairs, duty_ordinals, duty_day, number_of_days):
+        """
+        Candidate assignments of one role as parallel arrays over dense crew, duty and day ordinals
+
+        Pairs are sorted by crew and then by duty, so the pairs of crew ordinal c are the pair positions
+        crew_indptr[c]:crew_indptr[c + 1] (CSR layout). The other groupings list pair positions:
+        - by duty: duty_pairs[duty_indptr[d]:duty_indptr[d + 1]]
+        - by crew-day: crew_day_pairs[crew_day_indptr[k]:crew_day_indptr[k + 1]] for the crew-day cell k,
+          cells are ordered by crew and then by day and those of crew c are crew_days_indptr[c]:crew_days_indptr[c + 1]
+
+        The arrays are read-only once built, the variables are set once by the solver.
+
+        Args:
+            role: Role key, one of ROLES
+            qualified_crew_df: Qualified crew of this role, row order defines the crew ordinals
+            feasible_pairs: List of feasible (crew_id, duty_id) pairs
+            duty_ordinals: Dictionary of duty_id -> duty ordinal
+            duty_day: Day ordinal of every duty ordinal
+            number_of_days: Number of day ordinals
+        """
+        self.role = role
+
+        # Crew ordinals follow the rows of the qualified crew frame
+        self.crew_df = qualified_crew_df.reset_index(drop=True)
+        self.crew_ids = read_only(self.crew_df['crew_id'].to_numpy(copy=True))
+        self.crew_ordinals = {crew_id: ordinal for ordinal, crew_id in enumerate(self.crew_ids)}
+        self.number_of_crew = len(self.crew_ids)
+
+        pair_crew = np.fromiter((self.crew_ordinals[crew_id] for crew_id, duty_id in feasible_pairs), dtype=np.int64, count=len(feasible_pairs))
+        pair_duty = np.fromiter((duty_ordinals[duty_id] for crew_id, duty_id in feasible_pairs), dtype=np.int64, count=len(feasible_pairs))
+
+        order = np.lexsort((pair_duty, pair_crew))
+        self.pair_crew = read_only(pair_crew[order])
+        self.pair_duty = read_only(pair_duty[order])
+        self.pair_day = read_only(duty_day[self.pair_duty])
+        self.number_of_pairs = len(order)
+
+        # Whether the crew member of each pair can act as purser
+        self.crew_is_purser = read_only((self.crew_df['purser'] == 'YES').to_numpy(dtype=bool))
+        self.pair_is_purser = read_only(self.crew_is_purser[self.pair_crew])
+
+        # Crew -> pair positions
+        self.crew_indptr = read_only(build_indptr(self.pair_crew, self.number_of_crew))
+
+        # Duty -> pair positions
+        self.duty_pairs = read_only(np.argsort(self.pair_duty, kind='stable'))
+        self.duty_indptr = read_only(build_indptr(self.pair_duty, len(duty_ordinals)))
+
+        # Crew-day cell -> pair positions, for every (crew, day) with at least one candidate duty
+        self.crew_day_pairs = read_only(np.lexsort((self.pair_duty, self.pair_day, self.pair_crew)))
+
+        cell_keys = self.pair_crew[self.crew_day_pairs] * number_of_days + self.pair_day[self.crew_day_pairs]
+        cell_starts = np.flatnonzero(np.diff(cell_keys, prepend=-1))
+
+        self.crew_day_indptr = read_only(np.append(cell_starts, self.number_of_pairs).astype(np.int64))
+        self.crew_day_crew = read_only(self.pair_crew[self.crew_day_pairs[cell_starts]])
+        self.crew_day_day = read_only(self.pair_day[self.crew_day_pairs[cell_starts]])
+        self.number_of_crew_days = len(cell_starts)
+
+        # Crew -> crew-day cells
+        self.crew_days_indptr = read_only(build_indptr(self.crew_day_crew, self.number_of_crew))
+
+        # Decision variables, set by the solver: one per pair and one per crew-day cell
+        # A (crew, day) without a cell has no candidate duty, so its "worked on date" is the constant 0
+        self.assignment_variables = ()
+        self.worked_on_day_variables = ()
+
+        # Model proto index of the assignment variable of every pair, to write linear constraints without expressions
+        self.assignment_variable_indices = read_only(np.zeros(0, dtype=np.int64))
+
+    def set_variables(self, assignment_variables, worked_on_day_variables):
+        """
+        Store the decision variables created for the pairs and the crew-day cells
+        """
+        self.assignment_variables = tuple(assignment_variables)
+        self.worked_on_day_variables = tuple(worked_on_day_variables)
+        self.assignment_variable_indices = read_only(np.array([variable.Index() for variable in self.assignment_variables], dtype=np.int64))
+
+    def pairs_of_crew(self, crew):
+        """
+        Returns: Slice of the pair positions of a crew ordinal
+        """
+        return slice(self.crew_indptr[crew], self.crew_indptr[crew + 1])
+
+    def pairs_of_duty(self, duty):
+        """
+        Returns: Array of the pair positions of a duty ordinal
+        """
+        return self.duty_pairs[self.duty_indptr[duty]:self.duty_indptr[duty + 1]]
+
+    def pairs_of_crew_day(self, crew_day):
+        """
+        Returns: Array of the pair positions of a crew-day cell
+        """
+        return self.crew_day_pairs[self.crew_day_indptr[crew_day]:self.crew_day_indptr[crew_day + 1]]
+
+    def crew_days_of_crew(self, crew):
+        """
+        Returns: Range of the crew-day cells of a crew ordinal, ordered by day
+        """
+        return range(self.crew_days_indptr[crew], self.crew_days_indptr[crew + 1])
+
+    def variables_at(self, pair_positions):
+        """
+        Returns: List of the assignment variables at the given pair positions
+        """
+        if isinstance(pair_positions, slice):
+            return list(self.assignment_variables[pair_positions])
+
+        return [self.assignment_variables[position] for position in pair_positions]
+
+
+class ModelIndex:
+    def __init__(self, duties_for_aircraft_df, qualified_crew_dfs, feasible_pairs):
+        """
+        Dense integer indexing of crew, duties and days shared by the solver and all constraints
+
+        Built once per model: duties are numbered in the row order of duties_for_aircraft_df, days in
+        chronological order of the dates duties depart on. Duty attributes are stored as read-only arrays
+        indexed by duty ordinal, hours scaled by 100 (truncated) like the constraints use them.
+
+        Args:
+            duties_for_aircraft_df: Duties to roster
+            qualified_crew_dfs: Dictionary of role -> qualified crew DataFrame
+            feasible_pairs: Dictionary of role -> list of feasible (crew_id, duty_id) pairs
+        """
+        # Duty ordinals follow the rows of the duties frame
+        self.duties_df = duties_for_aircraft_df.reset_index(drop=True)
+        self.duty_ids = read_only(self.duties_df['duty_id'].to_numpy(copy=True))
+        self.duty_ordinals = {duty_id: ordinal for ordinal, duty_id in enumerate(self.duty_ids)}
+        self.number_of_duties = len(self.duty_ids)
+
+        # Day ordinals over the unique departure dates, and their calendar day number for date arithmetic
+        duty_dates = self.duties_df['scheduled_departure_utc'].dt.normalize().to_numpy(dtype='datetime64[D]')
+        unique_dates, duty_day = np.unique(duty_dates, return_inverse=True)
+        self.duty_day = read_only(duty_day.astype(np.int64))
+        self.day_dates = tuple(date.item() for date in unique_dates)
+        self.day_numbers = read_only((unique_dates - unique_dates[0]).astype(np.int64) if len(unique_dates) else np.zeros(0, dtype=np.int64))
+        self.number_of_days = len(self.day_dates)
+
+        # Day -> duty ordinals
+        self.day_duties = read_only(np.argsort(self.duty_day, kind='stable'))
+        self.day_indptr = read_only(build_indptr(self.duty_day, self.number_of_days))
+
+        # Duty attributes per duty ordinal
+        self.duty_time_hours_scaled = read_only((self.duties_df['duty_time_hours'].to_numpy(dtype=float) * 100).astype(np.int64))
+        self.flight_time_hours_scaled = read_only((self.duties_df['flight_time_hours'].to_numpy(dtype=float) * 100).astype(np.int64))
+        self.sector_count = read_only(self.duties_df['sector_count'].to_numpy(dtype=np.int64, copy=True))
+        self.departure_utc = read_only(self.duties_df['scheduled_departure_utc'].to_numpy(dtype='datetime64[ns]', copy=True))
+        self.arrival_utc = read_only(self.duties_df['scheduled_arrival_utc'].to_numpy(dtype='datetime64[ns]', copy=True))
+
+        # Start and end of every duty in minutes since midnight of the first schedule day, every overlap check uses these
+        schedule_start = unique_dates[0] if len(unique_dates) else np.datetime64(0, 'D')
+        self.duty_start_minutes = read_only((self.departure_utc - schedule_start) // np.timedelta64(1, 'm'))
+        self.duty_end_minutes = read_only((self.arrival_utc - schedule_start) // np.timedelta64(1, 'm'))
+
+        # Number of crew each duty needs per role
+        self.crew_required = {
+            'captains': read_only(self.duties_df['captains_required'].to_numpy(dtype=np.int64, copy=True)),
+            'first_officers': read_only(self.duties_df['first_officers_required'].to_numpy(dtype=np.int64, copy=True)),
+            'cabin_crew': read_only(self.duties_df['cabin_crew_required'].to_numpy(dtype=np.int64, copy=True))
+        }
+
+        self.roles = {
+            role: RoleAssignments(role, qualified_crew_dfs[role], feasible_pairs[role], self.duty_ordinals,
+                                  self.duty_day, self.number_of_days)
+            for role in ROLES
+        }
+
+    def duties_of_day(self, day):
+        """
+        Returns: Array of the duty ordinals departing on a day ordinal
+        """
+        return self.day_duties[self.day_indptr[day]:self.day_indptr[day + 1]]
+
+    def number_of_pairs(self):
+        return sum(role_assignments.number_of_pairs for role_assignments in self.roles.values())
@@ -0,0 +1,195 @@
+import multiprocessing
+
+import numpy as np
+from ortools.sat.python import cp_model_helper
+
+# Scheduler, solver and constraint data of the model being built, set before the pool forks and inherited by the workers
+_build_context = None
+
+# How a serialized constraint is stored
+LINEAR, AT_MOST_ONE, TEXT = 0, 1, 2
+
+
+def _build_constraint_task(task_name):
+    """
+    Worker: add one constraint family to the (forked copy of the) model and return its serialized constraints
+
+    Returns: (number of constraints before the family, serialized constraints, profiler records of the family)
+    """
+    crew_scheduler, solver, constraints_data = _build_context
+
+    model_proto = solver.model.Proto()
+    number_of_variables = len(model_proto.variables)
+    number_of_constraints = len(model_proto.constraints)
+    number_of_records = len(crew_scheduler.profiler.records)
+
+    getattr(crew_scheduler, task_name)(solver, constraints_data)
+
+    # The variable numbering is shared with the parent, so a family can only add constraints
+    if len(model_proto.variables) != number_of_variables:
+        raise ValueError(f"Constraint task {task_name} created variables, it can't be built in a worker")
+
+    # The worker's model only holds this family on top of the variables, so its size says little about the merged model
+    records = crew_scheduler.profiler.records[number_of_records:]
+    for record in records:
+        record['model_proto_size_mb'] = None
+
+    return number_of_constraints, serialize_constraints(model_proto, number_of_constraints), records
+
+
+def serialize_constraints(model_proto, first_constraint):
+    """
+    Serialize the constraints of a model proto from first_constraint on
+
+    The Python protos of OR-Tools only offer the text format, which is large and slow to parse for long linear
+    constraints. Linear and at-most-one constraints are therefore stored as flat integer arrays, the (rare)
+    other constraints as one text format CpModelProto.
+
+    Returns: Dictionary of numpy arrays and the text format proto, see deserialize_constraints
+    """
+    kinds = []
+    number_of_terms = []
+    terms = []
+    coefficients = []
+    domain_sizes = []
+    domains = []
+    text_proto = cp_model_helper.CpModelProto()
+
+    for constraint_index in range(first_constraint, len(model_proto.constraints)):
+        constraint = model_proto.constraints[constraint_index]
+        has_enforcement_literals = len(constraint.enforcement_literal) > 0
+
+        if constraint.has_linear() and not has_enforcement_literals:
+            linear_terms = list(constraint.linear.vars)
+            linear_domain = list(constraint.linear.domain)
+
+            kinds.append(LINEAR)
+            number_of_terms.append(len(linear_terms))
+            terms.extend(linear_terms)
+            coefficients.extend(constraint.linear.coeffs)
+            domain_sizes.append(len(linear_domain))
+            domains.extend(linear_domain)
+        elif constraint.has_at_most_one() and not has_enforcement_literals:
+            literals = list(constraint.at_most_one.literals)
+
+            kinds.append(AT_MOST_ONE)
+            number_of_terms.append(len(literals))
+            terms.extend(literals)
+            coefficients.extend([1] * len(literals))
+            domain_sizes.append(0)
+        else:
+            kinds.append(TEXT)
+            text_proto.constraints.append(constraint)
+
+    return {
+        'kinds': np.array(kinds, dtype=np.int8),
+        'number_of_terms': np.array(number_of_terms, dtype=np.int64),
+        'terms': np.array(terms, dtype=np.int32),
+        'coefficients': np.array(coefficients, dtype=np.int64),
+        'domain_sizes': np.array(domain_sizes, dtype=np.int64),
+        'domains': np.array(domains, dtype=np.int64),
+        'text_proto': str(text_proto) if len(text_proto.constraints) > 0 else ''
+    }
+
+
+def deserialize_constraints(serialized_constraints, model_proto, interval_offset=0):
+    """
+    Append serialized constraints to a model proto, in their original order
+
+    Args:
+        serialized_constraints: Output of serialize_constraints
+        model_proto: CpModelProto to append to
+        interval_offset: Shift of the interval constraint indices referenced by no-overlap constraints
+    """
+    text_proto = cp_model_helper.CpModelProto()
+    if serialized_constraints['text_proto']:
+        text_proto.merge_text_format(serialized_constraints['text_proto'])
+
+    # Interval constraints are referenced by index, which moves with the position the family lands at
+    if interval_offset != 0:
+        for constraint_index in range(len(text_proto.constraints)):
+            constraint = text_proto.constraints[constraint_index]
+
+            if constraint.has_no_overlap():
+                intervals = constraint.no_overlap.intervals
+                for position in range(len(intervals)):
+                    intervals[position] = intervals[position] + interval_offset
+
+    # Slicing Python lists is much faster than converting numpy slices per constraint
+    number_of_terms = serialized_constraints['number_of_terms'].tolist()
+    terms = serialized_constraints['terms'].tolist()
+    coefficients = serialized_constraints['coefficients'].tolist()
+    domain_sizes = serialized_constraints['domain_sizes'].tolist()
+    domains = serialized_constraints['domains'].tolist()
+
+    array_position = 0
+    term_position = 0
+    domain_position = 0
+    text_position = 0
+
+    for kind in serialized_constraints['kinds'].tolist():
+        if kind == TEXT:
+            model_proto.constraints.append(text_proto.constraints[text_position])
+            text_position += 1
+            continue
+
+        next_term_position = term_position + number_of_terms[array_position]
+        constraint = model_proto.constraints.add()
+
+        if kind == LINEAR:
+            next_domain_position = domain_position + domain_sizes[array_position]
+            constraint.linear.vars.extend(terms[term_position:next_term_position])
+            constraint.linear.coeffs.extend(coefficients[term_position:next_term_position])
+            constraint.linear.domain.extend(domains[domain_position:next_domain_position])
+            domain_position = next_domain_position
+        else:
+            constraint.at_most_one.literals.extend(terms[term_position:next_term_position])
+
+        term_position = next_term_position
+        array_position += 1
+
+
+class ParallelConstraintBuilder:
+    def __init__(self, number_of_workers=1):
+        """
+        Adds independent constraint families to a CP-SAT model, concurrently in forked worker processes
+
+        Every worker inherits the model with its variables and the read-only model index, adds one family to its
+        own copy and sends back the new constraints. The parent appends them in task order, so the model is the
+        same as when building the families one after another.
+
+        Args:
+            number_of_workers: Number of worker processes, 1 builds the families in this process
+        """
+        self.number_of_workers = number_of_workers
+
+    def build(self, crew_scheduler, solver, constraints_data, task_names):
+        """
+        Run the crew scheduler methods named in task_names, each adding one constraint family to solver.model
+        """
+        number_of_workers = min(self.number_of_workers, len(task_names))
+
+        # Workers inherit the model by forking, without fork (e.g. on Windows) the families are built here
+        if number_of_workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            for task_name in task_names:
+                getattr(crew_scheduler, task_name)(solver, constraints_data)
+            return
+
+        global _build_context
+        _build_context = (crew_scheduler, solver, constraints_data)
+
+        try:
+            with multiprocessing.get_context('fork').Pool(number_of_workers) as pool:
+                for base_number_of_constraints, serialized_constraints, records in pool.imap(_build_constraint_task, task_names):
+                    self.merge_constraints(solver, base_number_of_constraints, serialized_constraints)
+                    crew_scheduler.profiler.records.extend(records)
+        finally:
+            _build_context = None
+
+    @staticmethod
+    def merge_constraints(solver, base_number_of_constraints, serialized_constraints):
+        """
+        Append the constraints a worker added on top of base_number_of_constraints to the model
+        """
+        model_proto = solver.model.Proto()
+        deserialize_constraints(serialized_constraints, model_proto, len(model_proto.constraints) - base_number_of_constraints)
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+
+class HorizonWindow:
+    def __init__(self, first_date, commit_end_date, solve_end_date):
+        """
+        One step of the rolling horizon: the duties departing in [first_date, solve_end_date) are solved, those
+        departing before commit_end_date are kept and the rest is solved again by the next window
+
+        Args:
+            first_date: First departure date of the window (datetime64[D])
+            commit_end_date: Day after the last committed departure date
+            solve_end_date: Day after the last solved departure date (commit_end_date plus the overlap)
+        """
+        self.first_date = first_date
+        self.commit_end_date = commit_end_date
+        self.solve_end_date = solve_end_date
+
+    def __repr__(self):
+        return f"{self.first_date} to {self.commit_end_date - 1} (solved to {self.solve_end_date - 1})"
+
+
+def departure_dates(departure_utc):
+    """
+    Returns: datetime64[D] array of the departure dates of a departure column
+    """
+    return departure_utc.dt.normalize().to_numpy(dtype='datetime64[D]')
+
+
+class RollingHorizon:
+    def __init__(self, window_days=7, overlap_days=0):
+        """
+        Splits a long planning period into consecutive windows that are solved one after another
+
+        Every window commits window_days days of departures and looks overlap_days days further ahead, so the
+        committed assignments leave room for the duties right after them. The committed assignments become history
+        for the next windows, where the rolling hour and rest day constraints see them like flown duties.
+
+        Args:
+            window_days: Days committed per window
+            overlap_days: Days solved past the committed ones, and solved again by the next window
+        """
+        if window_days < 1 or overlap_days < 0:
+            raise ValueError(f"Invalid rolling horizon of {window_days} days with {overlap_days} days overlap")
+
+        self.window_days = window_days
+        self.overlap_days = overlap_days
+
+    def windows(self, duties_df):
+        """
+        Returns: List of HorizonWindow covering the departure dates of the duties, skipping days without duties
+        """
+        dates = np.unique(departure_dates(duties_df['scheduled_departure_utc']))
+
+        windows = []
+        position = 0
+
+        while position < len(dates):
+            first_date = dates[position]
+            commit_end_date = first_date + np.timedelta64(self.window_days, 'D')
+
+            windows.append(HorizonWindow(first_date, commit_end_date, commit_end_date + np.timedelta64(self.overlap_days, 'D')))
+            position = np.searchsorted(dates, commit_end_date)
+
+        return windows
+
+    @staticmethod
+    def window_duties(duties_df, window):
+        """
+        Returns: The duties solved by a window
+        """
+        dates = departure_dates(duties_df['scheduled_departure_utc'])
+
+        return duties_df[(dates >= window.first_date) & (dates < window.solve_end_date)]
+
+    @staticmethod
+    def committed_assignments(assignments_df, window):
+        """
+        Returns: The assignments of a solved window that are committed, their duties depart before the overlap
+        """
+        if len(assignments_df) == 0:
+            return assignments_df
+
+        dates = departure_dates(assignments_df['duty_scheduled_departure_utc'])
+
+        return assignments_df[dates < window.commit_end_date]
+
+    @staticmethod
+    def as_history(assignments_df):
+        """
+        Returns: Committed assignments in the layout of historical_flights_df, one row per duty
+        """
+        return pd.DataFrame({
+            'crew_id': assignments_df['crew_id'].to_numpy(),
+            'scheduled_departure_utc': assignments_df['duty_scheduled_departure_utc'].to_numpy(),
+            'flight_time_hours': assignments_df['duty_flight_time_hours'].to_numpy(dtype=float),
+            'duty_time_hours': assignments_df['duty_time_hours'].to_numpy(dtype=float)
+        })
+
+    @staticmethod
+    def as_busy_duties(assignments_df):
+        """
+        Returns: Committed assignments as the busy duties of FeasibleAssignmentsFilter.exclude_busy_crew
+        """
+        return pd.DataFrame({
+            'crew_id': assignments_df['crew_id'].to_numpy(),
+            'scheduled_departure_utc': assignments_df['duty_scheduled_departure_utc'].to_numpy(),
+            'scheduled_arrival_utc': assignments_df['duty_scheduled_arrival_utc'].to_numpy()
+        })
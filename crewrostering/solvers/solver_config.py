@@ -0,0 +1,181 @@
+import json
+import os
+
+# Diversified configurations raced by --portfolio when the config file doesn't list its own
+DEFAULT_PORTFOLIO = [
+    {'name': 'default'},
+    {'name': 'core', 'parameters': {'optimize_with_core': True}},
+    {'name': 'lp', 'parameters': {'linearization_level': 2}},
+    {'name': 'light_presolve', 'max_presolve_iterations': 1, 'random_seed': 1}
+]
+
+
+def available_cores():
+    """
+    Returns: Number of cores this process may run on
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+
+class SolverConfig:
+    # Fields of a config file and their defaults, None leaves the CP-SAT default
+    FIELDS = {
+        'name': 'default',
+        'max_time_in_seconds': 3600,
+        'num_workers': None,
+        'relative_gap_limit': None,
+        'absolute_gap_limit': None,
+        'random_seed': None,
+        'log_search_progress': True,
+        'log_file': None,
+        'cp_model_presolve': True,
+        'max_presolve_iterations': None,
+        'parameters': {},
+        'portfolio': []
+    }
+
+    def __init__(self, **fields):
+        """
+        CP-SAT search settings, from defaults, a JSON file and command line overrides
+
+        Args:
+            name: Name of the configuration, reported with the result and used for its log file in a portfolio
+            max_time_in_seconds: Time limit of the solve
+            num_workers: Search workers, None for all available cores (shared out between portfolio members)
+            relative_gap_limit: Stop when (objective - bound) / objective is within this gap
+            absolute_gap_limit: Stop when objective - bound is within this gap
+            random_seed: Seed of the search
+            log_search_progress: Log the search
+            log_file: File the search log is written to, None for stdout
+            cp_model_presolve: Run the CP-SAT presolve
+            max_presolve_iterations: Presolve passes
+            parameters: Further SatParameters fields by name, e.g. {'linearization_level': 2}
+            portfolio: Configurations raced in separate processes, each a dictionary of fields overriding this one
+        """
+        unknown_fields = set(fields) - set(self.FIELDS)
+        if unknown_fields:
+            raise ValueError(f"Unknown solver config fields: {', '.join(sorted(unknown_fields))}")
+
+        for field, default in self.FIELDS.items():
+            value = fields.get(field, default)
+            setattr(self, field, dict(value) if isinstance(value, dict) else list(value) if isinstance(value, list) else value)
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Returns: SolverConfig with the fields of a JSON file
+        """
+        with open(path) as config_file:
+            return cls(**json.load(config_file))
+
+    @classmethod
+    def from_args(cls, args):
+        """
+        Returns: SolverConfig from the --solver-config file (if given) with the other solver arguments applied on top
+        """
+        solver_config = cls.from_file(args.solver_config) if args.solver_config else cls()
+
+        overrides = {
+            'max_time_in_seconds': args.time_limit,
+            'num_workers': args.solver_workers,
+            'relative_gap_limit': args.relative_gap,
+            'absolute_gap_limit': args.absolute_gap,
+            'random_seed': args.seed,
+            'log_file': args.solver_log
+        }
+        for field, value in overrides.items():
+            if value is not None:
+                setattr(solver_config, field, value)
+
+        if args.no_presolve:
+            solver_config.cp_model_presolve = False
+
+        if args.portfolio and not solver_config.portfolio:
+            solver_config.portfolio = [dict(member) for member in DEFAULT_PORTFOLIO]
+
+        return solver_config
+
+    @staticmethod
+    def add_arguments(parser):
+        """
+        Add the solver settings to an argparse parser, unset arguments keep the value of the config file
+        """
+        parser.add_argument('--solver-config', help="JSON file with solver settings, see SolverConfig")
+        parser.add_argument('--time-limit', type=float, help="Solver time limit in seconds")
+        parser.add_argument('--solver-workers', type=int, help="Solver search workers, defaults to all available cores")
+        parser.add_argument('--relative-gap', type=float, help="Stop at this relative optimality gap")
+        parser.add_argument('--absolute-gap', type=float, help="Stop at this absolute optimality gap")
+        parser.add_argument('--seed', type=int, help="Random seed of the search")
+        parser.add_argument('--solver-log', help="Write the search log to this file instead of stdout")
+        parser.add_argument('--no-presolve', action='store_true', help="Disable the CP-SAT presolve")
+        parser.add_argument('--portfolio', action='store_true',
+                            help="Race several solver configurations in separate processes (the config file's portfolio, or a default one)")
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def portfolio_configs(self):
+        """
+        Returns: The configurations to race, each portfolio entry applied on top of this config, with the available
+                 cores shared out between members that don't set their worker count
+        """
+        base_fields = self.to_dict()
+        base_fields['portfolio'] = []
+
+        configs = []
+        for member in self.portfolio:
+            fields = dict(base_fields, **member)
+            fields['parameters'] = dict(base_fields['parameters'], **member.get('parameters', {}))
+            configs.append(SolverConfig(**fields).shared_between(len(self.portfolio)))
+
+        return configs
+
+    def shared_between(self, number_of_solves):
+        """
+        Returns: Copy of this config for one of several solves running at the same time, without portfolio (the solves
+                 already run in their own processes) and with the available cores shared out if the worker count isn't set
+        """
+        solver_config = SolverConfig(**self.to_dict())
+        solver_config.portfolio = []
+
+        if solver_config.num_workers is None:
+            solver_config.num_workers = max(1, available_cores() // max(1, number_of_solves))
+
+        return solver_config
+
+    def log_path(self, suffix=''):
+        """
+        Returns: The log file, with a suffix before the extension (e.g. the portfolio member name), or None for stdout
+        """
+        if self.log_file is None:
+            return None
+
+        root, extension = os.path.splitext(self.log_file)
+
+        return f"{root}{suffix}{extension}"
+
+    def apply(self, cp_solver):
+        """
+        Set the parameters of a CpSolver from this config
+        """
+        parameters = cp_solver.parameters
+
+        parameters.max_time_in_seconds = self.max_time_in_seconds
+        parameters.num_search_workers = self.num_workers if self.num_workers is not None else available_cores()
+        parameters.log_search_progress = self.log_search_progress
+        parameters.cp_model_presolve = self.cp_model_presolve
+
+        if self.relative_gap_limit is not None:
+            parameters.relative_gap_limit = self.relative_gap_limit
+        if self.absolute_gap_limit is not None:
+            parameters.absolute_gap_limit = self.absolute_gap_limit
+        if self.random_seed is not None:
+            parameters.random_seed = self.random_seed
+        if self.max_presolve_iterations is not None:
+            parameters.max_presolve_iterations = self.max_presolve_iterations
+
+        for name, value in self.parameters.items():
+            setattr(parameters, name, value)
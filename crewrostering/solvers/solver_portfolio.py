@@ -0,0 +1,162 @@
+import multiprocessing
+import queue
+import time
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+# Model raced by the portfolio, set before the members fork and inherited by them
+_portfolio_model = None
+
+
+class SolveResult:
+    def __init__(self, name, status, objective, best_bound, wall_time, solution_values):
+        """
+        Outcome of one CP-SAT solve
+
+        Args:
+            name: Name of the solver config
+            status: CP-SAT status (cp_model.OPTIMAL, ...)
+            objective: Objective of the best solution, None without solution
+            best_bound: Best proven bound on the objective
+            wall_time: Solve time in seconds
+            solution_values: Value of every model variable by proto index, empty without solution
+        """
+        self.name = name
+        self.status = status
+        self.objective = objective
+        self.best_bound = best_bound
+        self.wall_time = wall_time
+        self.solution_values = solution_values
+
+    @property
+    def has_solution(self):
+        return self.status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+    @property
+    def is_proven(self):
+        return self.status in (cp_model.OPTIMAL, cp_model.INFEASIBLE)
+
+
+def solve_model(model, solver_config, log_suffix=''):
+    """
+    Solve a CpModel with the parameters of a SolverConfig
+
+    Args:
+        model: CpModel to solve
+        solver_config: SolverConfig with the search settings
+        log_suffix: Added to the log file name, so portfolio members don't share a log
+
+    Returns: SolveResult
+    """
+    cp_solver = cp_model.CpSolver()
+    solver_config.apply(cp_solver)
+
+    t = time.time()
+    log_path = solver_config.log_path(log_suffix)
+
+    if log_path is None:
+        status = cp_solver.Solve(model)
+    else:
+        with open(log_path, 'w') as log_file:
+            cp_solver.parameters.log_to_stdout = False
+            cp_solver.log_callback = lambda message: log_file.write(message + '\n')
+            status = cp_solver.Solve(model)
+
+    wall_time = time.time() - t
+
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return SolveResult(solver_config.name, status, cp_solver.ObjectiveValue(), cp_solver.BestObjectiveBound(), wall_time,
+                           np.array(cp_solver.ResponseProto().solution, dtype=np.int64))
+
+    return SolveResult(solver_config.name, status, None, None, wall_time, np.zeros(0, dtype=np.int64))
+
+
+def _solve_portfolio_member(solver_config, result_queue):
+    """
+    Portfolio member: solve the (forked copy of the) model and report the result
+    """
+    result_queue.put(solve_model(_portfolio_model, solver_config, f"_{solver_config.name}"))
+
+
+class SolverPortfolio:
+    def __init__(self, solver_configs):
+        """
+        Races several solver configurations on the same model, each in its own process
+
+        The members inherit the built model by forking (the Python protos of OR-Tools can't be loaded from a binary
+        file), solve it with their own parameters and send back their result. The first proven result (optimal or
+        infeasible) wins and stops the others, otherwise the best solution at the deadline is kept.
+
+        Args:
+            solver_configs: List of SolverConfig, see SolverConfig.portfolio_configs
+        """
+        self.solver_configs = solver_configs
+
+    def solve(self, model):
+        """
+        Returns: The winning SolveResult
+        """
+        # A single member, or no fork (e.g. on Windows) to share the model, runs here
+        if len(self.solver_configs) == 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            return solve_model(model, self.solver_configs[0])
+
+        global _portfolio_model
+        _portfolio_model = model
+
+        context = multiprocessing.get_context('fork')
+        result_queue = context.Queue()
+        processes = [context.Process(target=_solve_portfolio_member, args=(solver_config, result_queue))
+                     for solver_config in self.solver_configs]
+
+        results = []
+
+        try:
+            for process in processes:
+                process.start()
+
+            while len(results) < len(processes):
+                try:
+                    result = result_queue.get(timeout=1)
+                except queue.Empty:
+                    # Members that crashed never report, stop waiting once none is left running
+                    if not any(process.is_alive() for process in processes):
+                        break
+                    continue
+
+                results.append(result)
+                objective = f"{result.objective:.0f}" if result.has_solution else "-"
+                print(f"Portfolio member {result.name}: {result.status.name} objective {objective} after {result.wall_time:.2f}s")
+
+                if result.is_proven:
+                    break
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+            _portfolio_model = None
+
+        return self.best_result(results, model)
+
+    @staticmethod
+    def best_result(results, model):
+        """
+        Returns: The proven result if any, otherwise the result with the best objective (the first result without any)
+        """
+        if not results:
+            raise RuntimeError("No portfolio member returned a result")
+
+        for result in results:
+            if result.is_proven:
+                return result
+
+        results_with_solution = [result for result in results if result.has_solution]
+        if not results_with_solution:
+            return results[0]
+
+        # CpModel.Maximize stores a negative scaling factor
+        objective_sign = -1 if model.Proto().objective.scaling_factor < 0 else 1
+
+        return min(results_with_solution, key=lambda result: objective_sign * result.objective)
@@ -0,0 +1,162 @@
+import random
+import pandas as pd
+from datetime import datetime, timedelta
+
+
+# Destinations served from the home base with their typical block time range in minutes
+destinations = {
+    'LPPR': [150, 160],
+    'LEPA': [115, 125],
+    'LDDU': [140, 150],
+    'DTTJ': [160, 170],
+    'LGTS': [145, 155],
+    'LEJR': [165, 175],
+    'DTNH': [160, 170],
+    'ESSA': [160, 170],
+    'LTAI': [210, 220],
+    'EGLC': [70, 80],
+    'LFPG': [55, 65],
+    'EDDM': [65, 75],
+    'LSZH': [55, 65],
+    'LIRF': [115, 125],
+    'LEMD': [135, 145],
+    'EIDW': [110, 120]
+}
+
+
+class FlightScheduleGenerator:
+    def __init__(self, aircraft_fleet_df, schedule_start_date, home_base='ELLX', seed=None):
+        """
+        Generate a synthetic flight schedule in the FlightEra export format
+
+        Args:
+            aircraft_fleet_df: DataFrame with the fleet (must have 'registration' and 'model' columns)
+            schedule_start_date: The start date of the schedule (datetime object)
+            home_base: ICAO code of the airport every aircraft rotation starts from
+            seed: Optional random seed for reproducible schedules
+        """
+        self.aircraft_fleet_df = aircraft_fleet_df
+        self.schedule_start_date = schedule_start_date
+        self.home_base = home_base
+        self.random = random.Random(seed)
+
+        self.flights = []
+
+    def generate_flights(self,
+                         number_of_days,
+                         rotations_per_aircraft_day=3,
+                         triangle_share=0.15,
+                         delayed_return_share=0.05,
+                         fleet_multiplier=1):
+        """
+        Generate daily rotations out of the home base for every aircraft
+
+        Most rotations are out-and-back, some are triangles via a second destination and
+        a few returns leave after a long ground time so they can't be paired directly.
+
+        Args:
+            number_of_days: Number of consecutive schedule days
+            rotations_per_aircraft_day: Number of rotations each aircraft flies per day
+            triangle_share: Share of rotations flying home base -> A -> B -> home base
+            delayed_return_share: Share of rotations with a ground time longer than the turnaround limit
+            fleet_multiplier: Replicate the fleet this many times to scale up the schedule
+        """
+
+        for day_offset in range(number_of_days):
+            schedule_date = self.schedule_start_date + timedelta(days=day_offset)
+
+            for copy_index in range(fleet_multiplier):
+                for _, aircraft in self.aircraft_fleet_df.iterrows():
+                    registration = aircraft['registration']
+                    if copy_index > 0:
+                        registration = f"{registration}-{copy_index}"
+
+                    self.generate_aircraft_day(schedule_date, registration, aircraft['model'],
+                                               rotations_per_aircraft_day, triangle_share, delayed_return_share)
+
+    def generate_aircraft_day(self, schedule_date, registration, aircraft_type,
+                              rotations_per_aircraft_day, triangle_share, delayed_return_share):
+        """
+        Generate the rotations of one aircraft on one day, starting between 04:00 and 07:00
+        """
+        current_time = schedule_date.replace(hour=self.random.randint(4, 6), minute=self.random.choice([0, 15, 30, 45]))
+
+        for _ in range(rotations_per_aircraft_day):
+            route = [self.home_base, self.random.choice(list(destinations))]
+
+            if self.random.random() < triangle_share:
+                route.append(self.random.choice([icao for icao in destinations if icao != route[1]]))
+
+            route.append(self.home_base)
+
+            for departure_icao, arrival_icao in zip(route[:-1], route[1:]):
+                block_minutes = self.generate_block_minutes(departure_icao, arrival_icao)
+                arrival_time = current_time + timedelta(minutes=block_minutes)
+
+                self.add_flight(current_time, arrival_time, departure_icao, arrival_icao, registration, aircraft_type)
+
+                # Ground time before the next departure
+                if arrival_icao != self.home_base and self.random.random() < delayed_return_share:
+                    ground_minutes = self.random.randint(300, 420)
+                else:
+                    ground_minutes = self.random.choice([35, 40, 45, 50, 60])
+
+                current_time = arrival_time + timedelta(minutes=ground_minutes)
+
+    def generate_block_minutes(self, departure_icao, arrival_icao):
+        """
+        Block time of a leg based on the non home base airport(s) it serves
+        """
+        leg_destinations = [icao for icao in (departure_icao, arrival_icao) if icao != self.home_base]
+        block_ranges = [destinations[icao] for icao in leg_destinations]
+
+        # Legs between two outstations take roughly the average of both block times
+        minimum = sum(block_range[0] for block_range in block_ranges) // len(block_ranges)
+        maximum = sum(block_range[1] for block_range in block_ranges) // len(block_ranges)
+
+        return self.random.randint(minimum // 5, maximum // 5) * 5
+
+    def add_flight(self, departure_time, arrival_time, departure_icao, arrival_icao, registration, aircraft_type):
+        flight_id = len(self.flights) + 1
+
+        self.flights.append({
+            'flight_id': flight_id,
+            'flnr': f"LG{flight_id}",
+            'date': departure_time.replace(hour=0, minute=0),
+            'scheduled_departure_utc': departure_time,
+            'actual_departure_utc': departure_time,
+            'departure_icao': departure_icao,
+            'arrival_icao': arrival_icao,
+            'scheduled_arrival_utc': arrival_time,
+            'actual_arrival_utc': arrival_time,
+            'aircraft_registration': registration,
+            'aircraft_type': aircraft_type
+        })
+
+    def generate_dataframe(self):
+        """Convert generated flights to DataFrame sorted by departure time"""
+        df = pd.DataFrame(self.flights)
+
+        if len(df) > 0:
+            df = df.sort_values(['scheduled_departure_utc', 'flight_id']).reset_index(drop=True)
+
+        return df
+
+    def save_to_csv(self, path):
+        """Save generated flights to CSV"""
+        df = self.generate_dataframe()
+        df.to_csv(path, index=False)
+        return df
+
+
+if __name__ == "__main__":
+    # Load the fleet
+    aircraft_fleet_df = pd.read_csv('../../assets/resources/aircraft_fleet.csv')
+
+    # Generate one month of flights
+    flight_schedule_generator = FlightScheduleGenerator(aircraft_fleet_df, datetime(2025, 10, 1), seed=42)
+    flight_schedule_generator.generate_flights(number_of_days=31)
+
+    df = flight_schedule_generator.save_to_csv('../../assets/simulated/synthetic_flights.csv')
+
+    print(f"Generated {len(df)} flights")
@@ -0,0 +1,198 @@
+import itertools
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from crewrostering.constraints.max_hours_rolling_period_constraint import MaxHoursRollingPeriodConstraint
+from crewrostering.constraints.min_weekly_rest_days_constraint import MinWeeklyRestDaysConstraint
+from crewrostering.constraints.window_reduction import find_binding_windows
+from crewrostering.solvers.aircraft_sat_solver import AircraftSatSolver
+from crewrostering.solvers.greedy_rosterer import GreedyRosterer
+
+
+def random_windows(rng, number_of_positions):
+    """
+    Returns: (coefficients, first positions, last positions, constants) of random windows over the positions
+    """
+    number_of_windows = int(rng.integers(1, 7))
+
+    coefficients = rng.integers(0, 6, number_of_positions)
+    first_positions = rng.integers(0, number_of_positions + 1, number_of_windows)
+    last_positions = np.array([rng.integers(first_position, number_of_positions + 1) for first_position in first_positions])
+    constants = rng.integers(0, 9, number_of_windows)
+
+    return coefficients, first_positions, last_positions, constants
+
+
+def test_find_binding_windows_keeps_the_feasible_set():
+    """
+    For every 0/1 assignment the kept windows must accept exactly the assignments all windows accept
+    """
+    rng = np.random.default_rng(13)
+
+    for _ in range(3000):
+        number_of_positions = int(rng.integers(0, 7))
+        coefficients, first_positions, last_positions, constants = random_windows(rng, number_of_positions)
+        limit = int(rng.integers(0, 16))
+
+        # Window loads of every assignment: constants + x @ (coefficients restricted to the window)
+        positions = np.arange(number_of_positions)
+        window_coefficients = np.where((positions[:, None] >= first_positions) & (positions[:, None] < last_positions),
+                                       coefficients[:, None], 0)
+        maximum_loads = constants + window_coefficients.sum(axis=0)
+
+        keep = find_binding_windows(first_positions, last_positions, constants, maximum_loads, limit)
+
+        assignments = np.array(list(itertools.product([0, 1], repeat=number_of_positions)),
+                               dtype=np.int64).reshape(2 ** number_of_positions, number_of_positions)
+        within_limit = constants + assignments @ window_coefficients <= limit
+
+        np.testing.assert_array_equal(within_limit.all(axis=1), within_limit[:, keep].all(axis=1))
+
+
+def small_solver(seed, number_of_schedule_days=12):
+    """
+    Returns: AircraftSatSolver with the variables of a small random captains instance with history, without duties
+             for 0 schedule days
+    """
+    rng = np.random.default_rng(seed)
+    schedule_start = pd.Timestamp('2025-03-01')
+
+    departures = sorted(schedule_start + pd.Timedelta(days=int(day), hours=int(rng.integers(5, 12)))
+                        for day in np.repeat(np.arange(number_of_schedule_days), 2) if rng.random() < 0.7)
+    hours = rng.integers(3, 9, len(departures))
+
+    duties_df = pd.DataFrame({
+        'duty_id': np.arange(len(departures)),
+        'scheduled_departure_utc': pd.to_datetime(departures),
+        'scheduled_arrival_utc': pd.to_datetime([departure + pd.Timedelta(hours=int(duty_hours)) for departure, duty_hours in zip(departures, hours)]),
+        'duty_time_hours': hours + 0.5,
+        'flight_time_hours': hours - 0.25,
+        'sector_count': 2,
+        'captains_required': 1,
+        'first_officers_required': 0,
+        'cabin_crew_required': 0
+    })
+
+    crew_df = pd.DataFrame({
+        'crew_id': ['C1', 'C2', 'C3'],
+        'purser': 'NO',
+        'current_calendar_year_flight_time_hours': [100.0, 250.0, 0.0],
+        'last_11_calendar_months_flight_time_hours': [400.0, 600.0, 50.0]
+    })
+    historical_flights_df = pd.DataFrame({
+        'crew_id': ['C1', 'C1', 'C2', 'C3'],
+        'scheduled_departure_utc': [schedule_start - pd.Timedelta(days=days) for days in (1, 3, 2, 6)],
+        'flight_time_hours': [6.0, 7.0, 9.0, 5.0],
+        'duty_time_hours': [8.0, 9.0, 11.0, 7.0]
+    })
+
+    feasible_assignments_filter = types.SimpleNamespace(
+        duties_for_aircraft_df=duties_df,
+        time_off_df=None,
+        qualified_captains_df=crew_df,
+        qualified_first_officers_df=crew_df.iloc[:0],
+        qualified_cabin_crew_df=crew_df.iloc[:0],
+        feasible_captains=[(crew_id, duty_id) for crew_id in crew_df['crew_id'] for duty_id in duties_df['duty_id'] if rng.random() < 0.6],
+        feasible_first_officers=[],
+        feasible_cabin_crew=[]
+    )
+
+    solver = AircraftSatSolver(None, historical_flights_df)
+    solver.initialize_data(feasible_assignments_filter)
+    solver.create_variables()
+
+    return solver
+
+
+def test_solver_without_duties():
+    """
+    A filter without duties gives an empty model on both engines, history or not
+    """
+    solver = small_solver(0, number_of_schedule_days=0)
+
+    assert solver.model_index.number_of_days == 0
+    assert len(solver.model.Proto().variables) == 0
+
+    solver.add_objective_balance_workload()
+    status, assignments_df = solver.solve()
+    assert status == 'Optimal' and len(assignments_df) == 0
+
+    regulations_dict = {
+        'max_sectors_day': 6,
+        'max_flight_duty_period_hours': 13,
+        'max_duty_time_hours_7_days': 60,
+        'max_duty_time_hours_28_days': 190,
+        'max_flight_time_hours_28_days': 100,
+        'max_flight_time_hours_year': 900,
+        'max_flight_time_hours_12_months': 1000,
+        'min_weekly_rest_days': 2
+    }
+    status, assignments_df = GreedyRosterer(solver, regulations_dict).solve()
+    assert status == 'Feasible' and len(assignments_df) == 0
+
+
+def window_rows(seed, make_constraint, reduce_windows):
+    """
+    Returns: List of (coefficient per variable index, upper bound) of the window constraints built on a small instance
+    """
+    solver = small_solver(seed)
+    constraints_data = {
+        'duties_for_aircraft_df': solver.duties_for_aircraft_df,
+        'historical_flights_df': solver.historical_flights_df,
+        'model_index': solver.model_index,
+        'historical_load_index': solver.historical_load_index
+    }
+
+    make_constraint(constraints_data, solver, reduce_windows).generate_constraint_variables()
+
+    rows = []
+
+    for constraint in solver.model.Proto().constraints:
+        assert constraint.has_linear() and not constraint.enforcement_literal
+        assert len(constraint.linear.domain) == 2 and constraint.linear.domain[0] <= 0
+
+        rows.append((dict(zip(constraint.linear.vars, constraint.linear.coeffs)), constraint.linear.domain[1]))
+
+    return rows
+
+
+def implies(row, other_row):
+    """
+    Returns: Whether row implies other_row for binary variables: it holds every term of other_row with no smaller
+             non-negative coefficient and no larger bound
+    """
+    coefficients, upper_bound = row
+    other_coefficients, other_upper_bound = other_row
+
+    return (upper_bound <= other_upper_bound
+            and all(coefficient >= 0 for coefficient in coefficients.values())
+            and all(coefficients.get(variable, 0) >= coefficient for variable, coefficient in other_coefficients.items()))
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2, 3])
+@pytest.mark.parametrize('make_constraint', [
+    lambda constraints_data, solver, reduce_windows: MaxHoursRollingPeriodConstraint(constraints_data, solver, 20, 7, 'duty',
+                                                                                     reduce_windows=reduce_windows),
+    lambda constraints_data, solver, reduce_windows: MaxHoursRollingPeriodConstraint(constraints_data, solver, 16, 5, 'flight',
+                                                                                     reduce_windows=reduce_windows),
+    lambda constraints_data, solver, reduce_windows: MinWeeklyRestDaysConstraint(constraints_data, solver, 3, period_days=7,
+                                                                                 reduce_windows=reduce_windows)
+], ids=['duty_7_days', 'flight_5_days', 'rest_days'])
+def test_dropped_windows_are_implied_or_never_bind(seed, make_constraint):
+    all_rows = window_rows(seed, make_constraint, reduce_windows=False)
+    kept_rows = window_rows(seed, make_constraint, reduce_windows=True)
+
+    assert len(kept_rows) < len(all_rows)
+
+    for row in all_rows:
+        coefficients, upper_bound = row
+        never_binds = sum(coefficients.values()) <= upper_bound
+
+        assert never_binds or any(implies(kept_row, row) for kept_row in kept_rows)
+
+    # Reducing only drops windows, the kept ones are unchanged
+    for kept_row in kept_rows:
+        assert kept_row in all_rows